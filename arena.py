@@ -0,0 +1,328 @@
+"""Compact, array-backed node storage and an A* that uses it.
+
+``Astar`` keeps every generated node alive as a Python object with a ``__dict__``, plus a
+heap entry and hash table entries for its state. ``NodeArena`` instead stores the nodes of a
+search in parallel ``array`` columns (state, g, f, parent index, closed flag), so a node costs
+a couple dozen bytes. ``StateIndex`` is an open-addressing hash table of arena indices keyed
+by state, stored in one more array. Nodes are only materialized when needed:
+
+* ``ArenaNode`` is a ``__slots__`` view of one arena entry;
+* ``ArenaAstar`` rebuilds a real node with ``Node.from_state`` to expand it, and builds the
+  returned path (a list of real nodes, as ``Node.get_path`` returns) from the parent indices.
+
+States are stored in an unsigned 64-bit column when they are non-negative integers below
+2**64 (e.g. PackedFifteensNode), and in a plain list otherwise.
+"""
+
+import heapq
+import time
+from array import array
+
+from search import SearchLimitReached, SearchStats
+
+_NO_PARENT = -1
+
+
+class NodeArena:
+    """Parallel columns holding the nodes of a search.
+
+    Parameters
+    ----------
+    int_states : bool
+        True if every state is an integer in 0 .. 2**64 - 1, stored in an array;
+        otherwise states are kept in a list.
+
+    int_costs : bool
+        True if every g and f is an integer in -2**31 .. 2**31 - 1, stored as 32-bit ints;
+        otherwise they are stored as doubles.
+    """
+
+    def __init__(self, int_states=True, int_costs=True):
+        self.states = array('Q') if int_states else []
+        self.g = array('i' if int_costs else 'd')
+        self.f = array('i' if int_costs else 'd')
+        self.parents = array('i')
+        self.closed = bytearray()
+
+    def add(self, state, g, f, parent=_NO_PARENT):
+        """Appends a node and returns its index."""
+        self.states.append(state)
+        self.g.append(g)
+        self.f.append(f)
+        self.parents.append(parent)
+        self.closed.append(0)
+        return len(self.parents) - 1
+
+    def view(self, index):
+        """Returns an ArenaNode view of the node at `index`."""
+        return ArenaNode(self, index)
+
+    def path_indices(self, index):
+        """Returns the indices from the root to the node at `index`."""
+        indices = []
+        while index != _NO_PARENT:
+            indices.append(index)
+            index = self.parents[index]
+        indices.reverse()
+        return indices
+
+    def nbytes(self):
+        """Returns the number of bytes used by the columns (excluding list-held states)."""
+        columns = [self.g, self.f, self.parents]
+        if isinstance(self.states, array):
+            columns.append(self.states)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.closed)
+
+    def __len__(self):
+        return len(self.parents)
+
+
+class ArenaNode:
+    """A lightweight read-only view of one node of a NodeArena."""
+
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def state(self):
+        return self.arena.states[self.index]
+
+    @property
+    def g(self):
+        return self.arena.g[self.index]
+
+    @property
+    def f(self):
+        return self.arena.f[self.index]
+
+    @property
+    def parent(self):
+        parent = self.arena.parents[self.index]
+        return None if parent == _NO_PARENT else ArenaNode(self.arena, parent)
+
+    def get_path(self):
+        """Returns the views from the root to this node."""
+        return [ArenaNode(self.arena, index) for index in self.arena.path_indices(self.index)]
+
+
+class StateIndex:
+    """Open-addressing hash table mapping states to arena indices, with linear probing.
+
+    Each slot holds an arena index, or -1 if empty; the key of a slot is the state stored
+    in the arena at that index, so the table adds 4 bytes per slot and nothing per state.
+
+    Parameters
+    ----------
+    arena : NodeArena
+        The arena whose states are the keys.
+    """
+
+    def __init__(self, arena, bits=10):
+        self.arena = arena
+        self._slots = array('i', [-1]) * (1 << bits)
+        self._shift = 64 - bits
+        self._mask = (1 << bits) - 1
+        self._size = 0
+
+    def _find(self, state):
+        """Returns the slot holding `state`, or the empty slot where it would go."""
+        slots = self._slots
+        states = self.arena.states
+        mask = self._mask
+        # Fibonacci hashing: the low bits of hash() of an int are the int's low bits, which
+        # cluster badly for packed boards, so take the high bits of a multiplicative mix.
+        slot = ((hash(state) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        while True:
+            index = slots[slot]
+            if index == -1 or states[index] == state:
+                return slot
+            slot = (slot + 1) & mask
+
+    def get(self, state):
+        """Returns the arena index stored for `state`, or -1."""
+        return self._slots[self._find(state)]
+
+    def put(self, state, index):
+        """Stores `index` for `state`, replacing the previous index if any."""
+        slot = self._find(state)
+        if self._slots[slot] == -1:
+            self._size += 1
+            if 2 * self._size > len(self._slots):
+                self._slots[slot] = index
+                self._grow()
+                return
+        self._slots[slot] = index
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('i', [-1]) * (2 * len(old))
+        self._mask = len(self._slots) - 1
+        self._shift -= 1
+        for index in old:
+            if index != -1:
+                self._slots[self._find(self.arena.states[index])] = index
+
+    def nbytes(self):
+        return self._slots.itemsize * len(self._slots)
+
+    def __len__(self):
+        return self._size
+
+
+class IndexBuckets:
+    """Bucket queue of arena indices keyed by non-negative integer f, one array per f.
+
+    Indices are popped in increasing f and, within a bucket, in the order they were
+    pushed, at 4 bytes per entry.
+    """
+
+    def __init__(self):
+        self._buckets = []
+        self._heads = []
+        self._min = 0
+        self._size = 0
+
+    def push(self, f, index):
+        buckets = self._buckets
+        while f >= len(buckets):
+            buckets.append(array('i'))
+            self._heads.append(0)
+        buckets[f].append(index)
+        if f < self._min:
+            self._min = f
+        self._size += 1
+
+    def pop(self):
+        f = self._min
+        while self._heads[f] == len(self._buckets[f]):
+            f += 1
+        self._min = f
+        bucket = self._buckets[f]
+        index = bucket[self._heads[f]]
+        self._heads[f] += 1
+        if self._heads[f] == len(bucket):
+            self._buckets[f] = array('i')
+            self._heads[f] = 0
+        self._size -= 1
+        return index
+
+    def __len__(self):
+        return self._size
+
+
+class _IndexHeap:
+    """Heap of (f, index) pairs, for searches with non-integer costs."""
+
+    def __init__(self):
+        self._heap = []
+
+    def push(self, f, index):
+        heapq.heappush(self._heap, (f, index))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[1]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def ArenaAstar(root, stats=None, max_expansions=None, time_limit=None, return_arena=False):
+    """Runs A* with all the generated nodes stored in a NodeArena.
+
+    It expands the same nodes in the same order as ``Astar(root)`` with the default
+    'fifo' tie-break. With non-negative integer f values the frontier is an IndexBuckets
+    queue, otherwise a heap of (f, index) pairs. The root's class must implement
+    ``Node.from_state``, which rebuilds a node from its state to expand it.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    return_arena: bool, optional
+        If True, returns a ``(path, arena)`` pair, e.g. to measure its size. Default is False.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    state = root.state
+    arena = NodeArena(int_states=isinstance(state, int) and 0 <= state < 1 << 64,
+                      int_costs=isinstance(root.g, int) and isinstance(root.f, int))
+    index = StateIndex(arena)
+    index.put(state, arena.add(state, root.g, root.f))
+    if isinstance(root.f, int) and root.f >= 0:
+        fringe = IndexBuckets()
+    else:
+        fringe = _IndexHeap()
+    fringe.push(root.f, 0)
+    path = None
+    try:
+        while fringe:
+            if len(fringe) > stats.max_frontier:
+                stats.max_frontier = len(fringe)
+            i = fringe.pop()
+            state = arena.states[i]
+            if arena.closed[i] or index.get(state) != i:
+                stats.duplicates += 1
+                continue
+            node = root if i == 0 else root.from_state(state, g=arena.g[i])
+            if node.is_goal():
+                path = _build_path(root, arena, i)
+                break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            arena.closed[i] = 1
+            stats.expanded += 1
+            for child in node.generate_children():
+                stats.generated += 1
+                child_state = child.state
+                known = index.get(child_state)
+                if known != -1 and arena.g[known] <= child.g:
+                    stats.duplicates += 1
+                    continue
+                if known != -1 and arena.closed[known]:
+                    stats.reopened += 1
+                j = arena.add(child_state, child.g, child.f, i)
+                index.put(child_state, j)
+                fringe.push(child.f, j)
+    finally:
+        stats.max_closed = sum(arena.closed)
+        stats.elapsed = clock() - start
+    if return_arena:
+        return path, arena
+    return path
+
+
+def _build_path(root, arena, index):
+    path = []
+    parent = None
+    for i in arena.path_indices(index):
+        parent = root if i == 0 else root.from_state(arena.states[i], parent=parent, g=arena.g[i])
+        path.append(parent)
+    return path
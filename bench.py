@@ -0,0 +1,752 @@
+"""Reproducible benchmarks of the search engines and problem nodes.
+
+``run`` generates seeded FifteensNode instances by random walks from the goal and a
+sweep of SuperqueensNode board sizes, solves each of them with every selected engine
+and node variant in a fresh process, and writes the measurements to a JSON file::
+
+    python bench.py run --depths 10,20,30 --seeds 3 --queens 6,7,8 --out results.json
+
+``compare`` matches the records of two result files and flags the cases that got
+slower, expanded fewer nodes per second or used more memory than allowed by the
+threshold. It exits with status 1 if any regression is found::
+
+    python bench.py compare baseline.json results.json --threshold 0.1
+
+Every record holds the wall time, expansions, expansions per second, peak RSS of the
+process and the largest frontier size (None for engines without a frontier).
+
+``heuristics`` solves the same fifteens instances with every heuristic of the registry
+(see heuristics.py) and reports the expansions saved with respect to Manhattan distance
+next to the time per heuristic evaluation, the two sides of the tradeoff::
+
+    python bench.py heuristics --depths 30,40 --seeds 3 --heuristics manhattan linear-conflict
+
+``scaling`` solves one fifteens instance with ``parallel.HDAstar`` on an increasing
+number of worker processes and reports the expansions per second and the speedup over
+one worker, checking that the cost matches the sequential Astar::
+
+    python bench.py scaling --depth 50 --workers 1,2,4,8,16,32
+
+``pruning`` solves fifteens instances with and without the move-pruning automaton of
+pruning.py and reports the fraction of the duplicates generated by Astar that it removes,
+with the generated nodes and the time of both searches::
+
+    python bench.py pruning --depths 30,40 --seeds 3 --pruning-depth 8
+
+``bidirectional`` solves fifteens instances with Astar and with the MM bidirectional
+search of bidirectional.py and reports the expansions of both, with those of each
+direction of MM::
+
+    python bench.py bidirectional --depths 40,60 --seeds 3
+
+``external`` solves one fifteens instance with ``external.ExternalAstar`` under several
+limits on the records it holds in memory and reports the peak traced bytes of each,
+checking that the cost matches Astar's::
+
+    python bench.py external --depth 50 --max-records 10000,100000
+
+``frontier`` solves fifteens instances with Astar and with the frontier search of
+frontiersearch.py, which keeps no closed list, and reports the nodes stored at once and
+the peak traced bytes of both, with their expansions, checking that the costs match::
+
+    python bench.py frontier --depths 40,50 --seeds 3
+
+``batch`` solves fifteens instances with Astar on PackedFifteensNode and with the NumPy
+batch engine of vectorized.py under several batch sizes, and reports the expansions per
+second of each and their speedup over Astar::
+
+    python bench.py batch --depths 40,50 --seeds 3 --batch-sizes 1024,4096,16384
+
+``memory`` traces the allocations of ``Astar`` and ``ArenaAstar`` on one fifteens instance
+and reports the peak bytes per stored node (every node kept in the arena or the closed
+and open tables)::
+
+    python bench.py memory --depth 40 --seed 0
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from arena import ArenaAstar
+from bidirectional import BidirectionalMM, BidirectionalStats
+from external import ExternalAstar
+from frontiersearch import FrontierAstar
+from heuristics import HEURISTICS
+from node import Node
+from parallel import HDAstar
+from problems import FifteensNode, PackedFifteensNode, SlidingPuzzleNode, SuperqueensNode
+from search import Astar, IDAstar, PEAstar, SearchLimitReached, SearchStats, SMAstar
+from vectorized import BatchAstar
+
+_MOVES = {'L': -1, 'R': 1, 'U': -4, 'D': 4}
+_INVERSE = {'L': 'R', 'R': 'L', 'U': 'D', 'D': 'U'}
+
+
+def random_walk_instance(depth, seed):
+    """Returns the input_str of a 15 puzzle reached by a random walk of `depth` moves from the goal.
+
+    The walk never undoes its previous move, so the optimal solution is at most `depth`
+    moves long; the exact cost is recorded by the benchmark.
+    """
+    rng = random.Random(seed)
+    cells = list(range(1, 16)) + [0]
+    blank = 15
+    previous = None
+    for _ in range(depth):
+        moves = []
+        for move, step in sorted(_MOVES.items()):
+            target = blank + step
+            if move == _INVERSE.get(previous) or not 0 <= target < 16:
+                continue
+            if move in 'LR' and target // 4 != blank // 4:
+                continue
+            moves.append(move)
+        previous = rng.choice(moves)
+        target = blank + _MOVES[previous]
+        cells[blank], cells[target] = cells[target], 0
+        blank = target
+    return '\n'.join(' '.join(str(n) for n in cells[row * 4:row * 4 + 4]) for row in range(4))
+
+
+# Heuristics of the registry compared by default: every one of them, then their maximum.
+HEURISTIC_SPECS = list(HEURISTICS) + [','.join(name for name in HEURISTICS if name != 'manhattan')]
+
+
+def _fifteens_variants(options):
+    variants = {'manhattan': FifteensNode, 'packed': PackedFifteensNode,
+                'packed-pruned': PackedFifteensNode.with_move_pruning()}
+    for spec in HEURISTIC_SPECS[1:]:
+        variants['sliding-' + spec.replace(',', '-')] = SlidingPuzzleNode.with_heuristic(spec)
+    if options.get('pdb_dir'):
+        from patterndb import AdditivePDB
+        variants['pdb'] = FifteensNode.with_heuristic(AdditivePDB.load_dir(options['pdb_dir']))
+    return variants
+
+
+def _superqueens_variants(options):
+    return {'plain': SuperqueensNode, 'symmetric': functools.partial(SuperqueensNode, break_symmetry=True)}
+
+
+# Node variants of every problem, by name. A factory receives the benchmark options.
+VARIANTS = {
+    'fifteens': _fifteens_variants,
+    'superqueens': _superqueens_variants,
+}
+
+
+def make_root(problem, variant, instance, options):
+    node_class = VARIANTS[problem](options)[variant]
+    if problem == 'fifteens':
+        return node_class(input_str=instance)
+    return node_class(n=instance)
+
+
+def _run_astar(frontier, tie_break='fifo'):
+    def run(root, stats, time_limit):
+        return Astar(root, frontier=frontier, tie_break=tie_break, stats=stats, time_limit=time_limit)
+    return run
+
+
+def _run_peastar(root, stats, time_limit):
+    return PEAstar(root, frontier='bucket', stats=stats, time_limit=time_limit)
+
+
+def _run_smastar(max_nodes):
+    def run(root, stats, time_limit):
+        return SMAstar(root, max_nodes, stats=stats, time_limit=time_limit)
+    return run
+
+
+def _run_frontier_astar(root, stats, time_limit):
+    return FrontierAstar(root, stats=stats, time_limit=time_limit)
+
+
+def _run_idastar(root, stats, time_limit):
+    report = []
+    path = IDAstar(root, report=report)
+    stats.expanded = sum(expanded for _, expanded in report)
+    stats.max_frontier = None
+    return path
+
+
+# Search engines, by name. An engine fills in the SearchStats it receives.
+ENGINES = {
+    'astar-heap': _run_astar('heap'),
+    'astar-bucket': _run_astar('bucket'),
+    'astar-bucket-lifo': _run_astar('bucket', 'lifo'),
+    'peastar': _run_peastar,
+    'idastar': _run_idastar,
+    'smastar': _run_smastar(100000),
+    'frontier-astar': _run_frontier_astar,
+}
+
+# The Node hooks an engine needs beyond the base class, by engine name. Cases whose node
+# class does not implement them are left out.
+ENGINE_HOOKS = {
+    'frontier-astar': ('operator_children', 'from_state', 'backward_root'),
+}
+
+
+def supports(engine, node_class):
+    """Returns whether a node class (or a functools.partial of one) implements the hooks
+    of ENGINE_HOOKS that the engine needs.
+    """
+    node_class = getattr(node_class, 'func', node_class)
+    return all(getattr(node_class, hook) is not getattr(Node, hook) for hook in ENGINE_HOOKS.get(engine, ()))
+
+
+def run_case(case):
+    """Solves one benchmark case and returns its record. Meant to run in a fresh process,
+    so that the peak RSS belongs to this case alone. An exception raised by the case is
+    recorded with the 'error' status and its message.
+    """
+    record = dict(case)
+    options = record.pop('options')
+    stats = SearchStats()
+    path = None
+    start = time.perf_counter()
+    try:
+        root = make_root(case['problem'], case['variant'], case['instance'], options)
+        start = time.perf_counter()
+        path = ENGINES[case['engine']](root, stats, options.get('time_limit'))
+    except SearchLimitReached:
+        record['status'] = 'limit'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = '%s: %s' % (type(e).__name__, e)
+    else:
+        record['status'] = 'solved' if path else 'no_solution'
+    seconds = time.perf_counter() - start
+    record.update(
+        cost=path[-1].g if path else None,
+        expanded=stats.expanded,
+        seconds=round(seconds, 6),
+        expansions_per_sec=round(stats.expanded / seconds, 1) if seconds > 0 else None,
+        peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        max_frontier=stats.max_frontier,
+    )
+    return record
+
+
+def _run_in_process(case, context, timeout):
+    with context.Pool(1) as pool:
+        result = pool.apply_async(run_case, (case,))
+        try:
+            return result.get(timeout)
+        except multiprocessing.TimeoutError:
+            record = {key: value for key, value in case.items() if key != 'options'}
+            record['status'] = 'timeout'
+            return record
+        except Exception as e:
+            record = {key: value for key, value in case.items() if key != 'options'}
+            record['status'] = 'error'
+            record['error'] = '%s: %s' % (type(e).__name__, e)
+            return record
+
+
+def make_cases(args):
+    """Lists the benchmark cases selected on the command line, leaving out the engines
+    that the node class of a variant does not support.
+    """
+    options = {'pdb_dir': args.pdb_dir, 'time_limit': args.time_limit}
+    cases = []
+    for depth in args.depths:
+        for seed in range(args.seeds):
+            instance = random_walk_instance(depth, seed)
+            for variant, node_class in VARIANTS['fifteens'](options).items():
+                for engine in (engine for engine in args.engines if supports(engine, node_class)):
+                    cases.append({'problem': 'fifteens', 'label': 'depth=%d seed=%d' % (depth, seed),
+                                  'instance': instance, 'variant': variant, 'engine': engine, 'options': options})
+    for n in args.queens:
+        for variant, node_class in VARIANTS['superqueens'](options).items():
+            for engine in (engine for engine in args.engines if supports(engine, node_class)):
+                cases.append({'problem': 'superqueens', 'label': 'n=%d' % n,
+                              'instance': n, 'variant': variant, 'engine': engine, 'options': options})
+    return cases
+
+
+def run(args):
+    context = multiprocessing.get_context('spawn')
+    records = []
+    for case in make_cases(args):
+        record = _run_in_process(case, context, args.time_limit and args.time_limit * 2)
+        print('%-12s %-16s %-10s %-17s %-8s %10s expanded %8ss' % (
+            record['problem'], record['label'], record['variant'], record['engine'], record['status'],
+            record.get('expanded'), record.get('seconds')), file=sys.stderr)
+        if record['status'] == 'error':
+            print('    %s' % record['error'], file=sys.stderr)
+        records.append(record)
+    results = {
+        'meta': {'python': platform.python_version(), 'machine': platform.machine(), 'time': time.time()},
+        'results': records,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=1)
+
+
+def _key(record):
+    return record['problem'], record['label'], record['variant'], record['engine']
+
+
+def compare(baseline, current, threshold):
+    """Lists the regressions of `current` with respect to `baseline` (both result dicts).
+
+    Returns
+    -------
+        regressions : list of str
+            One message per regressed measurement.
+    """
+    before = {_key(record): record for record in baseline['results']}
+    regressions = []
+    for record in current['results']:
+        old = before.get(_key(record))
+        if old is None or old['status'] != 'solved':
+            continue
+        name = ' '.join(str(part) for part in _key(record))
+        if record['status'] != 'solved':
+            regressions.append('%s: %s (was solved)' % (name, record['status']))
+            continue
+        if record['cost'] != old['cost']:
+            regressions.append('%s: cost %s (was %s)' % (name, record['cost'], old['cost']))
+        for field, worse in (('seconds', 1), ('peak_rss_kb', 1), ('expansions_per_sec', -1)):
+            if not old.get(field) or record.get(field) is None:
+                continue
+            change = (record[field] - old[field]) / old[field]
+            if worse * change > threshold:
+                regressions.append('%s: %s %s (was %s, %+.0f%%)' % (name, field, record[field], old[field],
+                                                                   100 * change))
+    return regressions
+
+
+def _traced_peak(engine, root, **options):
+    tracemalloc.start()
+    try:
+        result = engine(root, **options)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_memory(make_root):
+    """Solves the instance built by `make_root()` with Astar and ArenaAstar while tracing
+    allocations.
+
+    Both engines keep the same nodes: the root and every generated node that was not
+    discarded as a duplicate, i.e. the entries of the arena.
+
+    Returns
+    -------
+        records : dict
+            For each engine name, the path length, the number of stored nodes, the peak
+            traced bytes and the bytes per stored node.
+    """
+    (path, arena), arena_peak = _traced_peak(ArenaAstar, make_root(), return_arena=True)
+    astar_path, astar_peak = _traced_peak(Astar, make_root())
+    stored = len(arena)
+    records = {}
+    for name, found, peak in (('astar', astar_path, astar_peak), ('arena', path, arena_peak)):
+        records[name] = {'length': len(found) if found else None, 'stored': stored, 'peak_bytes': peak,
+                         'bytes_per_node': round(peak / stored, 1)}
+    return records
+
+
+def bidirectional_savings(instances, time_limit=None):
+    """Solves every instance with Astar and BidirectionalMM on PackedFifteensNode.
+
+    Returns
+    -------
+        records : list of dict
+            One record per instance with the cost and expansions of Astar, the cost and
+            the forward and backward expansions of MM, and the seconds of both.
+    """
+    records = []
+    for instance in instances:
+        stats = SearchStats()
+        path = Astar(PackedFifteensNode(input_str=instance), frontier='bucket', stats=stats, time_limit=time_limit)
+        mm_stats = BidirectionalStats()
+        mm_path = BidirectionalMM(PackedFifteensNode(input_str=instance), stats=mm_stats, time_limit=time_limit)
+        records.append({'instance': instance, 'cost': path[-1].g, 'expanded': stats.expanded,
+                        'seconds': round(stats.elapsed, 6), 'mm_cost': mm_path[-1].g,
+                        'mm_forward': mm_stats.expanded_forward, 'mm_backward': mm_stats.expanded_backward,
+                        'mm_seconds': round(mm_stats.elapsed, 6)})
+    return records
+
+
+def external_memory(make_root, record_limits, time_limit=None):
+    """Solves the instance built by `make_root()` with Astar, then with ExternalAstar (with
+    ``locality=2``) under every ``max_records`` of `record_limits`, tracing the allocations.
+
+    Returns
+    -------
+        records : list of dict
+            One record per run, Astar first ('max_records' is None), with the cost,
+            expansions, seconds and peak traced bytes.
+    """
+    records = []
+    for max_records in [None] + list(record_limits):
+        stats = SearchStats()
+        if max_records is None:
+            path, peak = _traced_peak(Astar, make_root(), frontier='bucket', stats=stats, time_limit=time_limit)
+        else:
+            path, peak = _traced_peak(ExternalAstar, make_root(), max_records=max_records, locality=2, stats=stats,
+                                      time_limit=time_limit)
+        records.append({'max_records': max_records, 'cost': path[-1].g if path else None, 'expanded': stats.expanded,
+                        'seconds': round(stats.elapsed, 6), 'peak_bytes': peak})
+    return records
+
+
+def frontier_memory(instances, time_limit=None):
+    """Solves every instance with Astar and FrontierAstar on PackedFifteensNode, tracing
+    the allocations.
+
+    Returns
+    -------
+        records : list of dict
+            One record per instance and engine, with the cost, expansions, seconds, the
+            largest number of nodes stored at once (open and closed) and the peak traced
+            bytes.
+    """
+    records = []
+    for instance in instances:
+        for name, engine, options in (('astar', Astar, {'frontier': 'bucket'}), ('frontier', FrontierAstar, {})):
+            stats = SearchStats()
+            path, peak = _traced_peak(engine, PackedFifteensNode(input_str=instance), stats=stats,
+                                      time_limit=time_limit, **options)
+            records.append({'instance': instance, 'engine': name, 'cost': path[-1].g if path else None,
+                            'expanded': stats.expanded, 'seconds': round(stats.elapsed, 6),
+                            'stored': stats.max_frontier + stats.max_closed, 'peak_bytes': peak})
+    return records
+
+
+def _moves(instance, count, seed=0):
+    """Returns `count` single-tile moves (cells, child cells, blank, pos) of a random walk."""
+    rng = random.Random(seed)
+    node = SlidingPuzzleNode(input_str=instance)
+    moves = []
+    for _ in range(count):
+        child = rng.choice(node.generate_children())
+        moves.append((node.cells, child.cells, node.blank, child.blank))
+        node = child
+    return moves
+
+
+def heuristic_tradeoff(instances, specs, time_limit=None, samples=2000):
+    """Solves every instance with SlidingPuzzleNode and each heuristic of `specs`.
+
+    The time per evaluation is measured apart from the searches, on `samples` moves of a
+    random walk from every instance, as the time to update the parent's heuristic data
+    and get the child's value, which is what a search pays per generated node.
+
+    Returns
+    -------
+        records : list of dict
+            One record per heuristic with the total expansions, the fraction of expansions
+            saved with respect to the first heuristic, the microseconds per evaluation and
+            the total search seconds.
+    """
+    moves = [move for instance in instances for move in _moves(instance, samples)]
+    records = []
+    for spec in specs:
+        node_class = SlidingPuzzleNode.with_heuristic(spec)
+        heuristic = node_class(input_str=instances[0])._heuristic
+        expanded = 0
+        seconds = 0.0
+        for instance in instances:
+            stats = SearchStats()
+            Astar(node_class(input_str=instance), frontier='bucket', stats=stats, time_limit=time_limit)
+            expanded += stats.expanded
+            seconds += stats.elapsed
+        data = [heuristic.evaluate(cells) for cells, _, _, _ in moves]
+        update, value = heuristic.update, heuristic.value
+        start = time.perf_counter()
+        for d, (cells, child, blank, pos) in zip(data, moves):
+            value(update(d, cells, child, blank, pos))
+        per_evaluation = (time.perf_counter() - start) / len(moves)
+        records.append({'heuristic': spec, 'expanded': expanded, 'seconds': round(seconds, 6),
+                        'us_per_evaluation': round(1e6 * per_evaluation, 3)})
+    for record in records:
+        record['saved'] = round(1 - record['expanded'] / records[0]['expanded'], 4) if records[0]['expanded'] else 0.0
+    return records
+
+
+def move_pruning_effect(instances, depth=8, time_limit=None):
+    """Solves every instance with PackedFifteensNode, then with its move-pruning variant.
+
+    Returns
+    -------
+        records : list of dict
+            One record per node class ('plain', then 'pruned') with the total cost,
+            expansions, generated nodes, duplicates (generated nodes whose state was already
+            reached as cheaply) and seconds, and the fraction of the duplicates of the plain
+            search that pruning removes.
+    """
+    records = []
+    for name, node_class in (('plain', PackedFifteensNode), ('pruned', PackedFifteensNode.with_move_pruning(depth))):
+        record = {'nodes': name, 'cost': 0, 'expanded': 0, 'generated': 0, 'duplicates': 0, 'seconds': 0.0}
+        for instance in instances:
+            stats = SearchStats()
+            path = Astar(node_class(input_str=instance), frontier='bucket', stats=stats, time_limit=time_limit)
+            record['cost'] += path[-1].g
+            for counter in ('expanded', 'generated', 'duplicates'):
+                record[counter] += getattr(stats, counter)
+            record['seconds'] += stats.elapsed
+        record['seconds'] = round(record['seconds'], 6)
+        records.append(record)
+    for record in records:
+        record['removed'] = round(1 - record['duplicates'] / records[0]['duplicates'], 4) if records[0]['duplicates'] else 0.0
+    return records
+
+
+def batch_throughput(instances, batch_sizes, time_limit=None):
+    """Solves every instance with Astar on PackedFifteensNode, then with BatchAstar under
+    every batch size of `batch_sizes`.
+
+    Returns
+    -------
+        records : list of dict
+            One record per engine, Astar first ('batch_size' is None), with the total cost,
+            expansions and seconds, the expansions per second and the speedup of that rate
+            over Astar's.
+    """
+    records = []
+    for batch_size in [None] + list(batch_sizes):
+        record = {'batch_size': batch_size, 'cost': 0, 'expanded': 0, 'seconds': 0.0}
+        for instance in instances:
+            stats = SearchStats()
+            root = PackedFifteensNode(input_str=instance)
+            if batch_size is None:
+                path = Astar(root, frontier='bucket', stats=stats, time_limit=time_limit)
+            else:
+                path = BatchAstar(root, batch_size=batch_size, stats=stats, time_limit=time_limit)
+            record['cost'] += path[-1].g
+            record['expanded'] += stats.expanded
+            record['seconds'] += stats.elapsed
+        record['seconds'] = round(record['seconds'], 6)
+        record['expansions_per_sec'] = round(record['expanded'] / record['seconds']) if record['seconds'] else None
+        records.append(record)
+    for record in records:
+        rates = record['expansions_per_sec'], records[0]['expansions_per_sec']
+        record['speedup'] = round(rates[0] / rates[1], 2) if all(rates) else None
+    return records
+
+
+def scaling(make_root, worker_counts, time_limit=None):
+    """Solves the instance built by `make_root()` with Astar, then HDAstar on every number
+    of workers of `worker_counts`.
+
+    Returns
+    -------
+        records : list of dict
+            One record per run, Astar first ('workers' is 0), with the cost, expansions,
+            seconds, expansions per second and the speedup in expansions per second over
+            the first HDAstar run.
+    """
+    records = []
+    for workers in [0] + list(worker_counts):
+        stats = SearchStats()
+        if workers:
+            path = HDAstar(make_root(), workers=workers, stats=stats, time_limit=time_limit)
+        else:
+            path = Astar(make_root(), frontier='bucket', stats=stats, time_limit=time_limit)
+        rate = stats.expanded / stats.elapsed if stats.elapsed > 0 else None
+        records.append({'workers': workers, 'cost': path[-1].g if path else None, 'expanded': stats.expanded,
+                        'seconds': round(stats.elapsed, 6), 'expansions_per_sec': rate and round(rate, 1)})
+    base = records[1]['expansions_per_sec'] if len(records) > 1 else None
+    for record in records:
+        record['speedup'] = round(record['expansions_per_sec'] / base, 2) if base and record['expansions_per_sec'] else None
+    return records
+
+
+def _int_list(text):
+    return [int(n) for n in text.split(',') if n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the search engines and problem nodes.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and write a results file')
+    run_parser.add_argument('--out', default='bench_results.json', help='results file (default: bench_results.json)')
+    run_parser.add_argument('--depths', type=_int_list, default=[10, 20, 30],
+                            help='random-walk depths of the fifteens instances (default: 10,20,30)')
+    run_parser.add_argument('--seeds', type=int, default=3, help='fifteens instances per depth (default: 3)')
+    run_parser.add_argument('--queens', type=_int_list, default=[6, 7, 8],
+                            help='superqueens board sizes (default: 6,7,8)')
+    run_parser.add_argument('--engines', type=lambda text: text.split(','), default=list(ENGINES),
+                            help='comma-separated engines among %s (default: all)' % ', '.join(ENGINES))
+    run_parser.add_argument('--pdb-dir', default=None, help='also benchmark the pattern databases of this directory')
+    run_parser.add_argument('--time-limit', type=float, default=60.0, help='seconds per case (default: 60)')
+
+    compare_parser = subparsers.add_parser('compare', help='flag regressions between two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='tolerated relative change (default: 0.2)')
+
+    memory_parser = subparsers.add_parser('memory', help='measure the bytes per stored node of Astar and ArenaAstar')
+    memory_parser.add_argument('--depth', type=int, default=40, help='random-walk depth of the instance (default: 40)')
+    memory_parser.add_argument('--seed', type=int, default=0, help='random-walk seed (default: 0)')
+
+    heuristics_parser = subparsers.add_parser('heuristics', help='compare the heuristics of the registry')
+    heuristics_parser.add_argument('--depths', type=_int_list, default=[30, 40],
+                                   help='random-walk depths of the fifteens instances (default: 30,40)')
+    heuristics_parser.add_argument('--seeds', type=int, default=3, help='instances per depth (default: 3)')
+    heuristics_parser.add_argument('--heuristics', nargs='+', default=HEURISTIC_SPECS,
+                                   help='heuristics, or comma-separated heuristics for their maximum; '
+                                        'savings are relative to the first (default: %s)' % ' '.join(HEURISTIC_SPECS))
+    heuristics_parser.add_argument('--time-limit', type=float, default=60.0, help='seconds per search (default: 60)')
+
+    scaling_parser = subparsers.add_parser('scaling', help='measure the speedup of HDAstar over its workers')
+    scaling_parser.add_argument('--depth', type=int, default=50, help='random-walk depth of the instance (default: 50)')
+    scaling_parser.add_argument('--seed', type=int, default=0, help='random-walk seed (default: 0)')
+    scaling_parser.add_argument('--workers', type=_int_list, default=[1, 2, 4, 8],
+                                help='numbers of worker processes (default: 1,2,4,8)')
+    scaling_parser.add_argument('--time-limit', type=float, default=600.0, help='seconds per search (default: 600)')
+
+    bidirectional_parser = subparsers.add_parser('bidirectional', help='compare Astar with bidirectional MM')
+    bidirectional_parser.add_argument('--depths', type=_int_list, default=[40, 60],
+                                      help='random-walk depths of the fifteens instances (default: 40,60)')
+    bidirectional_parser.add_argument('--seeds', type=int, default=3, help='instances per depth (default: 3)')
+    bidirectional_parser.add_argument('--time-limit', type=float, default=600.0,
+                                      help='seconds per search (default: 600)')
+
+    external_parser = subparsers.add_parser('external', help='measure the peak memory of ExternalAstar')
+    external_parser.add_argument('--depth', type=int, default=50, help='random-walk depth of the instance (default: 50)')
+    external_parser.add_argument('--seed', type=int, default=0, help='random-walk seed (default: 0)')
+    external_parser.add_argument('--max-records', type=_int_list, default=[10**4, 10**5],
+                                 help='numbers of records held in memory (default: 10000,100000)')
+    external_parser.add_argument('--time-limit', type=float, default=600.0, help='seconds per search (default: 600)')
+
+    pruning_parser = subparsers.add_parser('pruning', help='measure the duplicates removed by move pruning')
+    pruning_parser.add_argument('--depths', type=_int_list, default=[30, 40],
+                                help='random-walk depths of the fifteens instances (default: 30,40)')
+    pruning_parser.add_argument('--seeds', type=int, default=3, help='instances per depth (default: 3)')
+    pruning_parser.add_argument('--pruning-depth', type=int, default=8,
+                                help='length of the longest move strings checked for duplicates (default: 8)')
+    pruning_parser.add_argument('--time-limit', type=float, default=60.0, help='seconds per search (default: 60)')
+
+    frontier_parser = subparsers.add_parser('frontier', help='compare the memory of Astar and frontier search')
+    frontier_parser.add_argument('--depths', type=_int_list, default=[40, 50],
+                                 help='random-walk depths of the fifteens instances (default: 40,50)')
+    frontier_parser.add_argument('--seeds', type=int, default=3, help='instances per depth (default: 3)')
+    frontier_parser.add_argument('--time-limit', type=float, default=600.0, help='seconds per search (default: 600)')
+
+    batch_parser = subparsers.add_parser('batch', help='measure the expansions per second of the NumPy batch engine')
+    batch_parser.add_argument('--depths', type=_int_list, default=[40, 50],
+                              help='random-walk depths of the fifteens instances (default: 40,50)')
+    batch_parser.add_argument('--seeds', type=int, default=3, help='instances per depth (default: 3)')
+    batch_parser.add_argument('--batch-sizes', type=_int_list, default=[1024, 4096, 16384],
+                              help='largest numbers of states expanded at once (default: 1024,4096,16384)')
+    batch_parser.add_argument('--time-limit', type=float, default=600.0, help='seconds per search (default: 600)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'batch':
+        instances = [random_walk_instance(depth, seed) for depth in args.depths for seed in range(args.seeds)]
+        records = batch_throughput(instances, args.batch_sizes, args.time_limit)
+        print('%-8s %6s %10s %10s %12s %8s' % ('batch', 'cost', 'expanded', 'seconds', 'expanded/s', 'speedup'))
+        for record in records:
+            print('%-8s %6d %10d %10.3f %12s %8s' % (record['batch_size'] or 'astar', record['cost'],
+                                                    record['expanded'], record['seconds'],
+                                                    record['expansions_per_sec'], record['speedup']))
+        if any(record['cost'] != records[0]['cost'] for record in records):
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'bidirectional':
+        instances = [random_walk_instance(depth, seed) for depth in args.depths for seed in range(args.seeds)]
+        records = bidirectional_savings(instances, args.time_limit)
+        print('%-6s %10s %9s %10s %10s %9s' % ('cost', 'astar', 'seconds', 'mm fwd', 'mm bwd', 'seconds'))
+        for record in records:
+            print('%-6d %10d %9.3f %10d %10d %9.3f' % (record['cost'], record['expanded'], record['seconds'],
+                                                      record['mm_forward'], record['mm_backward'],
+                                                      record['mm_seconds']))
+        if any(record['cost'] != record['mm_cost'] for record in records):
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'external':
+        instance = random_walk_instance(args.depth, args.seed)
+        records = external_memory(lambda: PackedFifteensNode(input_str=instance), args.max_records, args.time_limit)
+        print('%-10s %6s %10s %10s %12s' % ('records', 'cost', 'expanded', 'seconds', 'peak bytes'))
+        for record in records:
+            print('%-10s %6s %10d %10.3f %12d' % (record['max_records'] or 'astar', record['cost'], record['expanded'],
+                                                 record['seconds'], record['peak_bytes']))
+        if any(record['cost'] != records[0]['cost'] for record in records):
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'frontier':
+        instances = [random_walk_instance(depth, seed) for depth in args.depths for seed in range(args.seeds)]
+        records = frontier_memory(instances, args.time_limit)
+        print('%-9s %6s %10s %10s %10s %12s' % ('engine', 'cost', 'expanded', 'seconds', 'stored', 'peak bytes'))
+        for record in records:
+            print('%-9s %6s %10d %10.3f %10d %12d' % (record['engine'], record['cost'], record['expanded'],
+                                                     record['seconds'], record['stored'], record['peak_bytes']))
+        if any(astar['cost'] != frontier['cost'] for astar, frontier in zip(records[::2], records[1::2])):
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'pruning':
+        instances = [random_walk_instance(depth, seed) for depth in args.depths for seed in range(args.seeds)]
+        records = move_pruning_effect(instances, args.pruning_depth, args.time_limit)
+        print('%-8s %6s %10s %10s %10s %9s' % ('nodes', 'cost', 'expanded', 'generated', 'duplicates', 'seconds'))
+        for record in records:
+            print('%-8s %6d %10d %10d %10d %9.3f' % (record['nodes'], record['cost'], record['expanded'],
+                                                   record['generated'], record['duplicates'], record['seconds']))
+        print('duplicates removed %.1f%%' % (100 * records[-1]['removed']))
+        if records[0]['cost'] != records[-1]['cost']:
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'scaling':
+        instance = random_walk_instance(args.depth, args.seed)
+        records = scaling(lambda: PackedFifteensNode(input_str=instance), args.workers, args.time_limit)
+        print('%-8s %6s %10s %10s %12s %8s' % ('workers', 'cost', 'expanded', 'seconds', 'expanded/s', 'speedup'))
+        for record in records:
+            print('%-8s %6s %10d %10.3f %12s %8s' % (record['workers'] or 'astar', record['cost'], record['expanded'],
+                                                    record['seconds'], record['expansions_per_sec'], record['speedup']))
+        if any(record['cost'] != records[0]['cost'] for record in records):
+            print('cost mismatch', file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'heuristics':
+        instances = [random_walk_instance(depth, seed) for depth in args.depths for seed in range(args.seeds)]
+        print('%-34s %10s %8s %10s %9s' % ('heuristic', 'expanded', 'saved', 'us/eval', 'seconds'))
+        for record in heuristic_tradeoff(instances, args.heuristics, args.time_limit):
+            print('%-34s %10d %7.1f%% %10.2f %9.3f' % (record['heuristic'], record['expanded'], 100 * record['saved'],
+                                                      record['us_per_evaluation'], record['seconds']))
+        return 0
+    if args.command == 'memory':
+        instance = random_walk_instance(args.depth, args.seed)
+        records = measure_memory(lambda: PackedFifteensNode(input_str=instance))
+        for name, record in records.items():
+            print('%-6s %8d nodes %12d bytes %8.1f bytes/node' % (
+                name, record['stored'], record['peak_bytes'], record['bytes_per_node']))
+        print('reduction %.1fx' % (records['astar']['peak_bytes'] / records['arena']['peak_bytes']))
+        return 0
+    if args.command == 'run':
+        unknown = set(args.engines) - set(ENGINES)
+        if unknown:
+            parser.error('unknown engines: %s' % ', '.join(sorted(unknown)))
+        run(args)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for message in regressions:
+        print(message)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Bidirectional heuristic search that meets in the middle (MM).
+
+``BidirectionalMM`` runs one search forward from the root, towards the goal, and one
+backward from the goal, towards the root, from the node returned by
+``root.backward_root()``. Both searches use front-to-end heuristics: the forward nodes
+estimate their cost to the goal, the backward nodes their cost to the root (e.g. the
+Manhattan distance to the root's board for the sliding puzzles). The two searches store
+their nodes by ``_get_state``, so a state reached by both is found with one lookup.
+
+Each direction orders its open nodes by the MM priority ``max(f, 2g)``, so neither search
+goes beyond half of the optimal cost before the other has caught up, and the direction
+with the smaller priority is expanded. Whenever a node is generated whose state the other
+direction has reached, the cost of the path through it is a candidate solution. The search
+stops when the best candidate U is no more than the largest of the lower bounds on the
+cost of any better solution::
+
+    max(C, fmin_forward, fmin_backward, gmin_forward + gmin_backward + min_cost)
+
+where C is the smallest priority of both directions, which guarantees that the path is
+optimal with admissible heuristics (Holte et al., 2016).
+
+The solution is stitched from the forward path to the meeting state and the backward
+path from it, rebuilt as forward nodes with ``Node.from_state``, so it is a list of nodes
+from the root to a goal node as ``Node.get_path`` returns.
+
+    >>> stats = BidirectionalStats()
+    >>> path = BidirectionalMM(PackedFifteensNode(input_str=s), stats=stats)
+    >>> stats.expanded_forward, stats.expanded_backward
+"""
+
+import heapq
+import itertools
+import time
+
+from search import SearchLimitReached, SearchStats
+
+
+class BidirectionalStats(SearchStats):
+    """The counters of a bidirectional search.
+
+    Attributes
+    ----------
+    expanded_forward, expanded_backward : int
+        The nodes expanded by each direction; ``expanded`` is their sum.
+    """
+
+    def __init__(self):
+        super(BidirectionalStats, self).__init__()
+        self.expanded_forward = 0
+        self.expanded_backward = 0
+
+
+class _Direction:
+    """The open and closed nodes of one direction of the search."""
+
+    def __init__(self, root):
+        self.best = {}
+        self.closed = set()
+        self.by_priority = []
+        self.by_f = []
+        self.by_g = []
+        self.counter = itertools.count()
+        self.push(root)
+
+    def push(self, node):
+        self.best[node.state] = node
+        seq = next(self.counter)
+        heapq.heappush(self.by_priority, (max(node.f, 2 * node.g), node.g, seq, node))
+        heapq.heappush(self.by_f, (node.f, seq, node))
+        heapq.heappush(self.by_g, (node.g, seq, node))
+
+    def _is_open(self, node):
+        return self.best[node.state] is node and node.state not in self.closed
+
+    def _top(self, heap):
+        """Drops the entries that are no longer open; returns the smallest key or None."""
+        while heap and not self._is_open(heap[0][-1]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def min_priority(self):
+        return self._top(self.by_priority)
+
+    def min_f(self):
+        return self._top(self.by_f)
+
+    def min_g(self):
+        return self._top(self.by_g)
+
+    def pop(self):
+        self._top(self.by_priority)
+        node = heapq.heappop(self.by_priority)[-1]
+        self.closed.add(node.state)
+        return node
+
+    def offer(self, node):
+        """Records a generated node; returns True if it reaches its state more cheaply."""
+        known = self.best.get(node.state)
+        if known is not None and known.g <= node.g:
+            return False
+        self.closed.discard(node.state)
+        self.push(node)
+        return True
+
+    def frontier(self):
+        return len(self.best) - len(self.closed)
+
+
+def BidirectionalMM(root, min_cost=1, stats=None, max_expansions=None, time_limit=None):
+    """Runs the MM bidirectional search given the root node.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must implement
+        ``Node.backward_root`` and ``Node.from_state``.
+
+    min_cost: int or float, optional
+        The smallest cost of a move, used by the stopping rule. Default is 1.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search; a BidirectionalStats
+        also gets the expansions of each direction.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes in both directions.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if stats is None:
+        stats = BidirectionalStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    goal = root.backward_root()
+    forward = _Direction(root)
+    backward = _Direction(goal)
+    expanded = {forward: 0, backward: 0}
+    best_cost = None
+    meeting = None
+    if root.state == goal.state:
+        best_cost, meeting = root.g, (root, goal)
+    try:
+        while True:
+            priorities = forward.min_priority(), backward.min_priority()
+            if None in priorities:
+                break
+            if best_cost is not None:
+                bound = max(min(priorities), forward.min_f(), backward.min_f(),
+                            forward.min_g() + backward.min_g() + min_cost)
+                if best_cost <= bound:
+                    break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            direction, other = (forward, backward) if priorities[0] <= priorities[1] else (backward, forward)
+            node = direction.pop()
+            expanded[direction] += 1
+            stats.expanded += 1
+            for child in node.generate_children():
+                stats.generated += 1
+                if not direction.offer(child):
+                    stats.duplicates += 1
+                    continue
+                match = other.best.get(child.state)
+                if match is not None and (best_cost is None or child.g + match.g < best_cost):
+                    best_cost = child.g + match.g
+                    meeting = (child, match) if direction is forward else (match, child)
+            frontier = forward.frontier() + backward.frontier()
+            if frontier > stats.max_frontier:
+                stats.max_frontier = frontier
+    finally:
+        stats.max_closed = len(forward.closed) + len(backward.closed)
+        stats.expanded_forward = expanded[forward]
+        stats.expanded_backward = expanded[backward]
+        stats.elapsed = clock() - start
+    if meeting is None:
+        return None
+    return _stitch(root, *meeting)
+
+
+def _stitch(root, forward_node, backward_node):
+    """Joins the forward path to the meeting state with the backward path from it."""
+    path = forward_node.get_path()
+    node = backward_node
+    while node.parent is not None:
+        step = node.g - node.parent.g
+        path.append(root.from_state(node.parent.state, parent=path[-1], g=path[-1].g + step))
+        node = node.parent
+    return path
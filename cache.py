@@ -0,0 +1,282 @@
+"""Persistent cache of solutions and exact distances to the goal, in SQLite.
+
+When a search succeeds, every node of its path is stored with its exact cost to the goal
+and the state that follows it on the path. A later search from any of these states is
+answered from the cache without searching, and ``search.Astar(root, cache=...)`` also
+stops early when it reaches a cached state: the node is put back into the frontier with
+its exact f = g + cost, and when it comes out first the cached suffix completes the path,
+which is then optimal (with an admissible heuristic) just as a searched one.
+
+    >>> cache = SolutionCache('solutions.sqlite')
+    >>> path = Astar(root, cache=cache)
+
+States are keyed by ``_get_state()`` within a namespace: the node class name, plus the
+board size for SuperqueensNode, whose states do not tell the size apart, and the target
+state of a ``backward_root`` node, whose costs are to that state. The database
+runs in WAL mode with a busy timeout, so any number of processes (e.g. the workers of
+solve.py) can share one file; each process opens its own connection. Entries carry a
+last-used time and, once there are more than ``max_entries``, the least recently used
+ones are evicted down to ``EVICT_TO`` of it, so that the entries are only counted again
+after many stores.
+
+Reading the cache does not write to it: the hits and misses, which are counted in the
+database for all the processes together, and the last-used times of the states read are
+kept in memory and written in one transaction with the next store, every
+``flush_every`` of them, by ``counters`` and ``close``, or when the process exits.
+
+The exact costs that Astar checks its nodes against are the most recently used
+``memory_entries`` states of a namespace, loaded once per cache object and process and
+then kept up to date with its own stores. States stored by other processes meanwhile
+are found by ``lookup``, not by the searches that pass through them.
+"""
+
+import multiprocessing.util
+import os
+import pickle
+import sqlite3
+import time
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    state BLOB NOT NULL,
+    cost NUMERIC NOT NULL,
+    next BLOB,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (namespace, state)
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+'''
+COUNTERS = ('hits', 'partial_hits', 'misses')
+# The fraction of max_entries left after an eviction.
+EVICT_TO = 0.9
+
+
+def namespace(node):
+    """Returns the namespace of the cache entries of a node's problem: its class name, its
+    size if it has one, and its `target` if it searches for another state than the goal,
+    as the nodes of ``backward_root`` do.
+    """
+    name = type(node).__name__
+    n = getattr(node, 'n', None)
+    if n is not None:
+        name = '%s/%d' % (name, n)
+    target = getattr(node, 'target', None)
+    return name if target is None else '%s@%r' % (name, target)
+
+
+def _key(state):
+    return pickle.dumps(state, protocol=4)
+
+
+class SolutionCache:
+    """A size-bounded, process-safe store of exact costs to the goal.
+
+    Parameters
+    ----------
+    path : str
+        The SQLite database file. It is created if needed.
+
+    max_entries : int, optional
+        The number of states kept; beyond it, the least recently used ones are evicted
+        down to ``EVICT_TO`` of it. Default is 1000000.
+
+    timeout : float, optional
+        Seconds to wait for another process holding a write lock. Default is 30.
+
+    memory_entries : int, optional
+        The number of states of a namespace whose exact cost is held in memory for the
+        searches. Default is 100000.
+
+    flush_every : int, optional
+        The number of counts and last-used times held in memory before they are written.
+        Default is 1000.
+    """
+
+    def __init__(self, path, max_entries=1000000, timeout=30.0, memory_entries=100000, flush_every=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.memory_entries = memory_entries
+        self.flush_every = flush_every
+        self._connection = None
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        """Forgets the state of the process that opened the connection."""
+        # The exact costs of the loaded namespaces, by namespace and state.
+        self._exact = {}
+        # The entries estimated to be in the database: the last count plus the rows stored since.
+        self._entries = None
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._used = {}
+        self._finalizer = None
+
+    @property
+    def connection(self):
+        """The connection of the current process, opened on first use."""
+        if self._pid != os.getpid():
+            self._reset()
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('PRAGMA busy_timeout=%d' % int(self.timeout * 1000))
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _pending(self):
+        return sum(self._counts.values()) + len(self._used)
+
+    def _defer(self):
+        """Flushes the pending writes if there are enough of them, or else makes sure that
+        they are written when the process exits.
+        """
+        if self._pending() >= self.flush_every:
+            self.flush()
+        elif self._finalizer is None:
+            self._finalizer = multiprocessing.util.Finalize(None, self.flush, exitpriority=0)
+
+    def _write_pending(self, connection):
+        connection.executemany('INSERT INTO counters VALUES (?, ?) '
+                               'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+                               [(name, count) for name, count in self._counts.items() if count])
+        connection.executemany('UPDATE entries SET last_used = ? WHERE namespace = ? AND state = ?',
+                               [(used, space, key) for (space, key), used in self._used.items()])
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._used = {}
+        if self._finalizer is not None:
+            self._finalizer.cancel()
+            self._finalizer = None
+
+    def flush(self):
+        """Writes the counts and last-used times held in memory."""
+        if self._pid != os.getpid() or not self._pending():
+            return
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._write_pending(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _count(self, name):
+        self.connection
+        self._counts[name] += 1
+        self._defer()
+
+    def counters(self):
+        """Returns the hits, partial hits and misses of all the processes so far."""
+        self.flush()
+        values = dict(self.connection.execute('SELECT name, value FROM counters'))
+        return {name: values.get(name, 0) for name in COUNTERS}
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def _chain(self, space, state):
+        """Returns the (state, cost) pairs from `state` to the goal, or None if the state
+        is not cached or the chain was broken by an eviction.
+        """
+        chain = []
+        key = _key(state)
+        while key is not None:
+            row = self.connection.execute('SELECT cost, next FROM entries WHERE namespace = ? AND state = ?',
+                                          (space, key)).fetchone()
+            if row is None:
+                return None
+            chain.append((key, row[0]))
+            key = row[1]
+        now = time.time()
+        for key, _ in chain:
+            self._used[space, key] = now
+        self._defer()
+        return [(pickle.loads(key), cost) for key, cost in chain]
+
+    def complete(self, node):
+        """Returns the path from the root to the goal through `node`, built from the cached
+        states after it, or None if they are not all cached.
+        """
+        chain = self._chain(namespace(node), node.state)
+        if chain is None:
+            return None
+        path = node.get_path()
+        for state, cost in chain[1:]:
+            path.append(node.from_state(state, parent=path[-1], g=node.g + chain[0][1] - cost))
+        return path
+
+    def lookup(self, root):
+        """Returns the cached solution of a root, or None, and counts a hit or a miss."""
+        path = self.complete(root)
+        self._count('misses' if path is None else 'hits')
+        return path
+
+    def count_partial_hit(self):
+        """Counts a search that was completed from a cached state."""
+        self._count('partial_hits')
+
+    def exact_costs(self, root):
+        """Returns the cached cost to the goal of the most recently used states of a root's
+        namespace, at most ``memory_entries`` of them. The dictionary is loaded on the
+        first call for the namespace and shared by the following ones.
+        """
+        space = namespace(root)
+        self.connection
+        exact = self._exact.get(space)
+        if exact is None:
+            rows = self.connection.execute('SELECT state, cost FROM entries WHERE namespace = ? '
+                                           'ORDER BY last_used DESC LIMIT ?', (space, self.memory_entries))
+            exact = self._exact[space] = {pickle.loads(key): cost for key, cost in rows}
+        return exact
+
+    def store(self, path):
+        """Stores every node of a solution path with its exact cost to the goal, with the
+        pending counts and last-used times, then evicts the least recently used states if
+        there are more than max_entries.
+        """
+        space = namespace(path[0])
+        now = time.time()
+        goal_g = path[-1].g
+        keys = [_key(node.state) for node in path]
+        rows = [(space, key, goal_g - node.g, next_key, now)
+                for node, key, next_key in zip(path, keys, keys[1:] + [None])]
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)', rows)
+            self._write_pending(connection)
+            if self._entries is None:
+                self._entries = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            else:
+                self._entries += len(rows)
+            if self._entries > self.max_entries:
+                self._entries = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+                if self._entries > self.max_entries:
+                    excess = self._entries - int(self.max_entries * EVICT_TO)
+                    connection.execute('DELETE FROM entries WHERE rowid IN '
+                                       '(SELECT rowid FROM entries ORDER BY last_used LIMIT ?)', (excess,))
+                    self._entries -= excess
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        exact = self._exact.get(space)
+        if exact is not None:
+            for node in path:
+                if len(exact) >= self.memory_entries:
+                    break
+                exact[node.state] = goal_g - node.g
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+        self._pid = None
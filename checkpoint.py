@@ -0,0 +1,314 @@
+"""Checkpoint and resume of long A* searches.
+
+``CheckpointedAstar`` runs the same search as ``search.Astar`` and journals it to a file,
+so that a search interrupted by a time limit, a crash or a preempted worker can go on
+from where it was with ``resume=True``::
+
+    >>> path = CheckpointedAstar(root, 'search.ckpt', time_limit=3600)
+    SearchLimitReached: time limit of 3600s reached
+    >>> path = CheckpointedAstar(root, 'search.ckpt', resume=True)
+
+Every stored node gets an index, in the order it is pushed onto the frontier. The journal
+records, for every expansion, the index of the expanded node and the (state, g) of the
+children it pushed, whose indices and parent follow from that order. This is all the
+search state: the best g and node of every state, the parent links, the closed nodes and
+the frontier (the nodes that are neither expanded nor superseded by a cheaper node of
+their state) are rebuilt from it. The expansions are buffered and appended every
+`interval` seconds as one record, so writing a checkpoint costs the work done since the
+previous one and never stalls the search on the size of the whole search.
+
+A record is a zlib-compressed pickle framed by its length and CRC-32, followed by the
+search counters at that point, and it is flushed to disk before the next one starts; a
+record torn by a crash is detected and dropped when resuming, which goes on from the
+last complete one. The frontier is rebuilt in push order, so the resumed search pops
+the nodes in the same order as an uninterrupted one and returns the same path (only
+``stats.duplicates`` is lower, as superseded frontier entries are not popped again).
+
+The root's class must implement ``Node.from_state``: the frontier nodes and the returned
+path are rebuilt from their states. ``from_state`` starts the move-pruning automaton of a
+``with_move_pruning`` class over, so for these classes the journal also records the
+automaton state of every child, and the rebuilt frontier nodes get theirs back.
+"""
+
+import os
+import pickle
+import struct
+import time
+import zlib
+from array import array
+
+from frontier import make_frontier
+from pruning import START
+from search import SearchLimitReached, SearchStats
+
+_MAGIC = b'ASTARCK1'
+_FRAME = struct.Struct('<II')
+_NO_PARENT = -1
+# The counters saved with every record.
+_COUNTERS = ('expanded', 'generated', 'duplicates', 'reopened', 'max_frontier', 'max_closed',
+             'f_progression', 'elapsed')
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint file is not a checkpoint of the search being resumed."""
+
+
+def _encode(obj):
+    payload = zlib.compress(pickle.dumps(obj, protocol=4), 1)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path):
+    """Reads the complete records of a journal.
+
+    Returns
+    -------
+        records : list
+            The header, then one (expansions, counters) pair per record.
+
+        end : int
+            The offset after the last complete record, where a torn record may start.
+    """
+    records = []
+    with open(path, 'rb') as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise CheckpointError('%s is not a search checkpoint' % path)
+        end = file.tell()
+        while True:
+            frame = file.read(_FRAME.size)
+            if len(frame) < _FRAME.size:
+                break
+            size, crc = _FRAME.unpack(frame)
+            payload = file.read(size)
+            if len(payload) < size or zlib.crc32(payload) != crc:
+                break
+            records.append(pickle.loads(zlib.decompress(payload)))
+            end = file.tell()
+    if not records:
+        raise CheckpointError('%s has no header' % path)
+    return records, end
+
+
+class _Journal:
+    """An append-only checkpoint file."""
+
+    def __init__(self, path, header=None, end=None):
+        if header is not None:
+            self.file = open(path, 'wb')
+            self.file.write(_MAGIC)
+            self._write(_encode(header))
+        else:
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+        self.expansions = []
+
+    def _write(self, data):
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def commit(self, stats):
+        """Appends the expansions buffered since the last commit."""
+        if self.expansions:
+            self._write(_encode((self.expansions, {name: getattr(stats, name) for name in _COUNTERS})))
+            self.expansions = []
+
+    def close(self):
+        self.file.close()
+
+
+class _Tables:
+    """The stored nodes of a search, by index, and the best node of every state, with
+    their move-pruning automaton state if the search is `pruned`.
+    """
+
+    def __init__(self, pruned=False):
+        self.states = []
+        self.g = []
+        self.parents = array('i')
+        self.expanded = bytearray()
+        self.best = {}
+        self.fsm = array('i') if pruned else None
+
+    def add(self, state, g, parent, fsm=START):
+        index = len(self.states)
+        self.states.append(state)
+        self.g.append(g)
+        self.parents.append(parent)
+        self.expanded.append(0)
+        self.best[state] = index
+        if self.fsm is not None:
+            self.fsm.append(fsm)
+        return index
+
+    def path(self, root, index):
+        indices = []
+        while index != _NO_PARENT:
+            indices.append(index)
+            index = self.parents[index]
+        path = []
+        for i in reversed(indices):
+            path.append(root if i == 0 else root.from_state(self.states[i], parent=path[-1], g=self.g[i]))
+        return path
+
+
+def CheckpointedAstar(root, path, interval=30.0, resume=False, frontier='heap', tie_break='fifo', stats=None,
+                      max_expansions=None, time_limit=None):
+    """Runs A* given the root node, journaling the search to a checkpoint file.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must implement
+        ``Node.from_state``.
+
+    path: str
+        The checkpoint file. A new search overwrites it.
+
+    interval: float, optional
+        Seconds between two checkpoints. The last expansions are also written when the
+        search stops, whatever the reason. Default is 30.
+
+    resume: bool, optional
+        If True, goes on with the search saved in `path` instead of starting a new one.
+        Default is False.
+
+    frontier, tie_break: str, optional
+        As for Astar. A resumed search must use the same ones as the saved search.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search, including the part
+        done before it was resumed.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes in total.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds, in this run.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+
+    CheckpointError
+        If the file to resume is not a checkpoint of the same root, frontier and tie-break.
+    """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    header = {'root': root.state, 'g': root.g, 'frontier': frontier, 'tie_break': tie_break}
+    fringe = make_frontier(frontier, tie_break)
+    pruned = getattr(root, 'move_pruning', None) is not None
+    tables = _Tables(pruned)
+    tables.add(root.state, root.g, _NO_PARENT, getattr(root, '_fsm', START))
+    if resume:
+        records, end = read_records(path)
+        if records[0] != header:
+            raise CheckpointError('%s is a checkpoint of another search: %r' % (path, records[0]))
+        previous = _replay(tables, records[1:], stats)
+        journal = _Journal(path, end=end)
+        nodes = []
+        for i in range(len(tables.states)):
+            if tables.expanded[i] or tables.best[tables.states[i]] != i:
+                continue
+            node = root if i == 0 else root.from_state(tables.states[i], g=tables.g[i])
+            if pruned:
+                node._fsm = tables.fsm[i]
+            nodes.append(node)
+    else:
+        previous = 0.0
+        journal = _Journal(path, header)
+        nodes = [root]
+    for node in nodes:
+        fringe.push(node)
+    # The number of closed states: expanded, and not reopened since.
+    closed = sum(tables.expanded[index] for index in tables.best.values())
+    committed = clock()
+    f_bound = stats.f_progression[-1][0] if stats.f_progression else None
+    result = None
+    states, g_values, parents, expanded, best = tables.states, tables.g, tables.parents, tables.expanded, tables.best
+    automaton = tables.fsm
+    try:
+        while fringe:
+            if len(fringe) > stats.max_frontier:
+                stats.max_frontier = len(fringe)
+            node = fringe.pop()
+            index = best[node.state]
+            if expanded[index] or g_values[index] < node.g:
+                stats.duplicates += 1
+                continue
+            if f_bound is None or node.f > f_bound:
+                f_bound = node.f
+                stats.f_progression.append((f_bound, stats.expanded))
+            if node.is_goal():
+                result = tables.path(root, index)
+                break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            now = clock()
+            if deadline is not None and now > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            if now - committed >= interval:
+                stats.elapsed = previous + now - start
+                journal.commit(stats)
+                committed = clock()
+            expanded[index] = 1
+            stats.expanded += 1
+            closed += 1
+            if closed > stats.max_closed:
+                stats.max_closed = closed
+            pushed = []
+            for child in node.generate_children():
+                stats.generated += 1
+                state = child.state
+                g = child.g
+                known = best.get(state)
+                if known is not None:
+                    if g_values[known] <= g:
+                        stats.duplicates += 1
+                        continue
+                    if expanded[known]:
+                        stats.reopened += 1
+                        closed -= 1
+                # tables.add, inlined.
+                best[state] = len(states)
+                states.append(state)
+                g_values.append(g)
+                parents.append(index)
+                expanded.append(0)
+                if pruned:
+                    automaton.append(child._fsm)
+                    pushed.append((state, g, child._fsm))
+                else:
+                    pushed.append((state, g))
+                # The path is rebuilt from the tables: the children need not keep their parent.
+                child.parent = None
+                fringe.push(child)
+            journal.expansions.append((index, pushed))
+    finally:
+        stats.elapsed = previous + clock() - start
+        journal.commit(stats)
+        journal.close()
+    return result
+
+
+def _replay(tables, records, stats):
+    """Rebuilds the tables and counters of a saved search; returns its elapsed time."""
+    for expansions, counters in records:
+        for index, children in expansions:
+            tables.expanded[index] = 1
+            # (state, g), followed by the automaton state in a pruned search.
+            for child in children:
+                tables.add(child[0], child[1], index, *child[2:])
+        for name, value in counters.items():
+            setattr(stats, name, value)
+    return stats.elapsed
@@ -0,0 +1,258 @@
+"""External-memory A* with delayed duplicate detection.
+
+``ExternalAstar`` keeps its open list and closed list in files instead of hash tables:
+
+* the open nodes are appended, as ``(state, parent state, parent's (h, g))`` records, to
+  one file per (f, g) bucket;
+* the expanded nodes are appended, as the same records, to one file per (h, g) pair.
+
+Buckets are taken in increasing f and, within an f, in increasing g, so the children of
+a bucket that keep its f land in a bucket that is still to come. A bucket is read into a
+dictionary of its distinct states, which removes the duplicates within it; if it holds
+more states than the memory limit allows, it is first split by the hash of the states
+into partition files that are loaded one at a time (the copies of a state always fall in
+the same partition). The states already expanded are then dropped by streaming closed
+files past the loaded states, and the rest are expanded. Every file is written by
+appending whole chunks of records and read from start to end, so all the disk I/O is
+sequential.
+
+With a consistent heuristic the expanded nodes have their optimal g, exactly as in
+``search.Astar``, and the cost of the returned path is the same. A state reached again
+can only have been closed with the same h and a smaller g, so only the closed files of
+that h are streamed. On graphs whose moves can be undone at unit cost, such as the
+sliding puzzles, the smaller g is one of the previous two, which ``locality=2`` uses to
+stream only those. Costs must be integers, so that the h of a state is exactly f - g.
+
+``max_records`` bounds the number of records held in memory at once: a quarter for the
+write buffers of the open buckets, a quarter for those of the closed layers and a half
+for the loaded partition. It does not bound the memory of the process: the bytes of a
+record depend on the size of the states, and the nodes being expanded and the tables of
+the heuristic come on top of them. ``bench.py external`` reports the peak traced bytes
+under several values. The root's class must implement ``Node.from_state``, which
+rebuilds the nodes of a bucket to expand them.
+
+    >>> path = ExternalAstar(PackedFifteensNode(input_str=s), max_records=250000, locality=2)
+"""
+
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from search import SearchLimitReached, SearchStats
+
+class _RecordFile:
+    """An append-only file of pickled chunks of records."""
+
+    __slots__ = ('path', 'count')
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def append(self, records):
+        with open(self.path, 'ab') as file:
+            pickle.dump(records, file, protocol=4)
+        self.count += len(records)
+
+    def read(self):
+        """Yields the records in the order they were appended."""
+        with open(self.path, 'rb') as file:
+            while True:
+                try:
+                    records = pickle.load(file)
+                except EOFError:
+                    return
+                yield from records
+
+    def remove(self):
+        os.remove(self.path)
+
+
+class _Spill:
+    """Record files by key, fed through write buffers of a bounded total size."""
+
+    def __init__(self, directory, prefix, capacity):
+        self.directory = directory
+        self.prefix = prefix
+        self.capacity = capacity
+        self.files = {}
+        self.buffers = {}
+        self.buffered = 0
+        self.written = 0
+
+    def new_file(self):
+        self.written += 1
+        return _RecordFile(os.path.join(self.directory, '%s-%d' % (self.prefix, self.written)))
+
+    def add(self, key, record):
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = []
+        buffer.append(record)
+        self.buffered += 1
+        if self.buffered >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        for key, records in self.buffers.items():
+            file = self.files.get(key)
+            if file is None:
+                file = self.files[key] = self.new_file()
+            file.append(records)
+        self.buffers = {}
+        self.buffered = 0
+
+
+def ExternalAstar(root, directory=None, max_records=1000000, locality=None, stats=None, max_expansions=None,
+                  time_limit=None):
+    """Runs A* with its open and closed lists in files on disk.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must implement
+        ``Node.from_state``, and its heuristic must be consistent.
+
+    directory: str, optional
+        Where to create the working directory of the search, which is removed at the end.
+        Default is the system's temporary directory.
+
+    max_records: int, optional
+        The number of records held in memory at once, at least 8. It is a count, not a
+        number of bytes. Default is 1000000.
+
+    locality: int, optional
+        How much smaller the g of a closed copy of a state reached again can be, e.g. 2
+        for the sliding puzzles. Default is None: every smaller g is checked.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search. ``max_frontier`` is the
+        largest number of states loaded at once and ``max_closed`` the number of records
+        of the closed files.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    capacity = max(8, max_records)
+    workdir = tempfile.mkdtemp(prefix='external-astar-', dir=directory)
+    opened = _Spill(workdir, 'open', capacity // 4)
+    closed = _Spill(workdir, 'closed', capacity // 4)
+    load_limit = capacity - 2 * (capacity // 4)
+    opened.add((root.f, root.g), (root.state, None, None))
+    path = None
+    try:
+        while opened.files or opened.buffers:
+            opened.flush()
+            f, g = key = min(opened.files)
+            bucket = opened.files.pop(key)
+            if not stats.f_progression or f > stats.f_progression[-1][0]:
+                stats.f_progression.append((f, stats.expanded))
+            for entries in _partitions(bucket, opened, load_limit, stats):
+                closed.flush()
+                for (h, closed_g), layer in closed.files.items():
+                    if h != f - g or closed_g >= g or locality is not None and closed_g < g - locality:
+                        continue
+                    for record in layer.read():
+                        if record[0] in entries:
+                            del entries[record[0]]
+                            stats.duplicates += 1
+                for state, (parent, parent_key) in entries.items():
+                    node = root if parent is None else root.from_state(state, g=g)
+                    if node.is_goal():
+                        path = _trace_path(root, closed, node, parent, parent_key)
+                        return path
+                    if max_expansions is not None and stats.expanded >= max_expansions:
+                        raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+                    if deadline is not None and clock() > deadline:
+                        raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+                    stats.expanded += 1
+                    closed.add((f - g, g), (state, parent, parent_key))
+                    for child in node.generate_children():
+                        stats.generated += 1
+                        if child.state == parent:
+                            stats.duplicates += 1
+                            continue
+                        opened.add((child.f, child.g), (child.state, state, (f - g, g)))
+    finally:
+        stats.max_closed = sum(layer.count for layer in closed.files.values()) + closed.buffered
+        stats.elapsed = clock() - start
+        shutil.rmtree(workdir, ignore_errors=True)
+    return path
+
+
+def _partitions(bucket, spill, limit, stats, level=0):
+    """Yields the distinct states of a bucket file, as dictionaries of their parent state
+    and its (h, g), at most `limit` states at a time. The file is removed once read.
+    """
+    entries = {}
+    duplicates = 0
+    for state, parent, parent_key in bucket.read():
+        if state in entries:
+            duplicates += 1
+        elif len(entries) < limit:
+            entries[state] = (parent, parent_key)
+        else:
+            break
+    else:
+        bucket.remove()
+        stats.duplicates += duplicates
+        if len(entries) > stats.max_frontier:
+            stats.max_frontier = len(entries)
+        yield entries
+        return
+    # Too many states: split the file by the hash of the states, salted by the level so that
+    # a partition that is still too large splits differently.
+    entries = None
+    parts = [spill.new_file() for _ in range(max(2, math.ceil(2 * bucket.count / limit)))]
+    buffers = [[] for _ in parts]
+    chunk = max(1, spill.capacity // len(parts))
+    for record in bucket.read():
+        i = hash((level, record[0])) % len(parts)
+        buffers[i].append(record)
+        if len(buffers[i]) >= chunk:
+            parts[i].append(buffers[i])
+            buffers[i] = []
+    bucket.remove()
+    for part, records in zip(parts, buffers):
+        if records:
+            part.append(records)
+        if part.count:
+            yield from _partitions(part, spill, limit, stats, level + 1)
+
+
+def _trace_path(root, closed, goal, parent, parent_key):
+    """Follows the parents of the goal back to the root through the closed files."""
+    closed.flush()
+    states = [(goal.state, goal.g)]
+    while parent is not None:
+        states.append((parent, parent_key[1]))
+        for state, grandparent, grandparent_key in closed.files[parent_key].read():
+            if state == parent:
+                break
+        parent, parent_key = grandparent, grandparent_key
+    states.reverse()
+    path = [root]
+    for state, g in states[1:]:
+        path.append(root.from_state(state, parent=path[-1], g=g))
+    return path
@@ -0,0 +1,238 @@
+"""Frontier (open list) and closed table implementations used by the search engines.
+
+Two frontier backends are provided:
+
+* ``HeapFrontier`` -- a binary heap keyed on ``node.f``. Works with any numeric costs.
+* ``BucketFrontier`` -- an array of buckets indexed by ``node.f``. Push and pop are O(1)
+  amortized, but ``node.f`` must be a non-negative integer (e.g. FifteensNode).
+
+Both backends accept a tie-break policy that decides which node is popped among the
+nodes that share the smallest f:
+
+* ``'fifo'``   -- the node that was pushed first (the behaviour of the original list fringe).
+* ``'lifo'``   -- the node that was pushed last.
+* ``'high-g'`` -- the node with the largest g, i.e. the deepest one.
+* ``'low-g'``  -- the node with the smallest g.
+
+``ClosedTable`` keeps the best g found so far for every generated state, so duplicates
+are rejected with a single dictionary lookup and stale frontier entries are dropped
+lazily when they are popped.
+"""
+
+import heapq
+import operator
+from collections import deque
+from itertools import count
+
+TIE_BREAKS = ('fifo', 'lifo', 'high-g', 'low-g')
+
+
+def _check_tie_break(tie_break):
+    if tie_break not in TIE_BREAKS:
+        raise ValueError('Unknown tie-break policy %r, expected one of %s' % (tie_break, ', '.join(TIE_BREAKS)))
+
+
+class HeapFrontier:
+    """Binary-heap frontier ordered by ``node.f`` and then by the tie-break policy.
+
+    Parameters
+    ----------
+    tie_break : str, optional
+        The tie-break policy among nodes with equal f. Default is 'fifo'.
+    """
+
+    def __init__(self, tie_break='fifo'):
+        _check_tie_break(tie_break)
+        self.tie_break = tie_break
+        self._heap = []
+        self._counter = count()
+
+    def push(self, node):
+        """Adds a node to the frontier."""
+        seq = next(self._counter)
+        if self.tie_break == 'fifo':
+            key = (node.f, 0, seq)
+        elif self.tie_break == 'lifo':
+            key = (node.f, 0, -seq)
+        elif self.tie_break == 'high-g':
+            key = (node.f, -node.g, seq)
+        else:
+            key = (node.f, node.g, seq)
+        heapq.heappush(self._heap, (key, node))
+
+    def pop(self):
+        """Removes and returns the best node of the frontier."""
+        return heapq.heappop(self._heap)[1]
+
+    def peek_f(self):
+        """Returns the smallest f in the frontier without removing the node."""
+        return self._heap[0][0][0]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class BucketFrontier:
+    """Bucket-queue frontier for non-negative integer f values.
+
+    Buckets are indexed by f. With the 'high-g' and 'low-g' policies every bucket is
+    further split by g, so the policy is applied without any comparison-based structure.
+
+    Parameters
+    ----------
+    tie_break : str, optional
+        The tie-break policy among nodes with equal f. Default is 'fifo'.
+    """
+
+    def __init__(self, tie_break='fifo'):
+        _check_tie_break(tie_break)
+        self.tie_break = tie_break
+        self._buckets = []
+        self._min = 0
+        self._size = 0
+
+    def push(self, node):
+        """Adds a node to the frontier.
+
+        Raises
+        ------
+        TypeError
+            If ``node.f`` is not an integer.
+        ValueError
+            If ``node.f`` is negative.
+        """
+        f = operator.index(node.f)
+        if f < 0:
+            raise ValueError('BucketFrontier requires non-negative f values, got %d' % f)
+        buckets = self._buckets
+        if f >= len(buckets):
+            buckets.extend(None for _ in range(f + 1 - len(buckets)))
+        bucket = buckets[f]
+        if self.tie_break in ('fifo', 'lifo'):
+            if bucket is None:
+                bucket = buckets[f] = deque()
+            bucket.append(node)
+        else:
+            if bucket is None:
+                bucket = buckets[f] = {}
+            bucket.setdefault(node.g, deque()).append(node)
+        if f < self._min:
+            self._min = f
+        self._size += 1
+
+    def _first_bucket(self):
+        buckets = self._buckets
+        i = self._min
+        while not buckets[i]:
+            i += 1
+        self._min = i
+        return buckets[i]
+
+    def pop(self):
+        """Removes and returns the best node of the frontier."""
+        if not self._size:
+            raise IndexError('pop from an empty frontier')
+        bucket = self._first_bucket()
+        self._size -= 1
+        if self.tie_break == 'fifo':
+            return bucket.popleft()
+        if self.tie_break == 'lifo':
+            return bucket.pop()
+        g = max(bucket) if self.tie_break == 'high-g' else min(bucket)
+        nodes = bucket[g]
+        node = nodes.popleft()
+        if not nodes:
+            del bucket[g]
+        return node
+
+    def peek_f(self):
+        """Returns the smallest f in the frontier without removing the node."""
+        if not self._size:
+            raise IndexError('peek into an empty frontier')
+        self._first_bucket()
+        return self._min
+
+    def __len__(self):
+        return self._size
+
+
+FRONTIERS = {
+    'heap': HeapFrontier,
+    'bucket': BucketFrontier,
+}
+
+
+def make_frontier(kind='heap', tie_break='fifo'):
+    """Creates an empty frontier.
+
+    Parameters
+    ----------
+    kind : str
+        The frontier backend, one of the keys of ``FRONTIERS`` ('heap' or 'bucket').
+
+    tie_break : str
+        The tie-break policy, one of ``TIE_BREAKS``.
+
+    Returns
+    -------
+        frontier : HeapFrontier or BucketFrontier
+            The new, empty frontier.
+    """
+    try:
+        cls = FRONTIERS[kind]
+    except KeyError:
+        raise ValueError('Unknown frontier %r, expected one of %s' % (kind, ', '.join(FRONTIERS)))
+    return cls(tie_break)
+
+
+class ClosedTable:
+    """Hash table of the best g found for every generated state, plus the set of closed states.
+
+    A generated node is only worth adding to the frontier if its state has never been seen
+    or was seen with a larger g. A popped node is stale if its state is already closed or a
+    cheaper copy of it has been generated since it was pushed.
+    """
+
+    def __init__(self):
+        self._best_g = {}
+        self._closed = set()
+        self.reopened = 0
+
+    def offer(self, node):
+        """Records a generated node.
+
+        Returns
+        -------
+            improved : bool
+                True if the node reached its state more cheaply than any previous node,
+                in which case it should be pushed onto the frontier. A closed state that
+                is reached more cheaply is reopened.
+        """
+        state = node.state
+        best = self._best_g.get(state)
+        if best is not None and best <= node.g:
+            return False
+        self._best_g[state] = node.g
+        if state in self._closed:
+            self._closed.discard(state)
+            self.reopened += 1
+        return True
+
+    def is_stale(self, node):
+        """Decides whether a popped node should be skipped."""
+        state = node.state
+        return state in self._closed or self._best_g[state] < node.g
+
+    def close(self, node):
+        """Marks the state of an expanded node as closed."""
+        self._closed.add(node.state)
+
+    def is_closed(self, node):
+        return node.state in self._closed
+
+    def g(self, state):
+        """Returns the best known g of a state, or None if it was never generated."""
+        return self._best_g.get(state)
+
+    def __len__(self):
+        return len(self._closed)
@@ -0,0 +1,199 @@
+"""Frontier A* (Korf et al., 2005): A* without a closed list.
+
+``FrontierAstar`` keeps only the open nodes, in a table by state. The closed list of
+``search.Astar`` serves two purposes, and both are done without it:
+
+* Duplicates: every open node carries a bit mask of its used moves, the moves that lead
+  back to a node that generated it. When a node is expanded, it marks in each child the
+  inverse of the move that produced it, and it skips its own used moves. So an expanded
+  node, which has left the table, is never generated again by a neighbour. The masks of
+  two copies of a state are merged. With a consistent heuristic, an expanded node already
+  has its optimal g, so it never needs to be reopened.
+
+* The solution path: the nodes keep no parent. Instead, every node beyond a relay depth,
+  half of the estimated cost of the search, keeps its relay: the last node of its path up
+  to that depth and the first node past it. When the goal is found, its relay splits the
+  problem into the start to the first relay node and the second relay node to the goal,
+  two searches of at most half the cost. These are solved the same way, recursively,
+  bounded by their known cost. A subproblem whose goal is an inner state of the path is
+  searched with the class of ``target.backward_root()``, rebuilt at the start state with
+  ``Node.from_state``, which tests for that state and estimates the cost to reach it.
+
+The root's class must implement ``Node.operator_children``, ``Node.from_state`` and
+``Node.backward_root``, with moves of the same cost in both directions, as for the
+sliding puzzles. The memory held is that of the largest frontier, instead of that of
+every node reached. The path recovery costs a search per level of a log2(cost) deep
+recursion, each on a fraction of the problem.
+
+    >>> stats = SearchStats()
+    >>> path = FrontierAstar(FifteensNode(input_str=s), stats=stats)
+    >>> stats.max_frontier, stats.max_closed
+"""
+
+import heapq
+import itertools
+import time
+
+from search import SearchLimitReached, SearchStats
+
+
+class _Search:
+    """The limits and counters shared by the searches of one FrontierAstar call."""
+
+    def __init__(self, stats, max_expansions, deadline, time_limit):
+        self.stats = stats
+        self.max_expansions = max_expansions
+        self.deadline = deadline
+        self.time_limit = time_limit
+        self.counter = itertools.count()
+
+    def run(self, start, middle, bound=None, progress=False):
+        """Searches from `start` to a goal of its class, without a closed list.
+
+        Parameters
+        ----------
+        start : Node
+            The start node.
+
+        middle : int or float
+            The relay depth: nodes with a g above it keep a relay.
+
+        bound : int or float, optional
+            The cost of the solution, if known: nodes with a larger f are not stored.
+
+        progress : bool, optional
+            If True, records the f progression in the stats.
+
+        Returns
+        -------
+            found : tuple or None
+                The goal node and its relay, ``(last state, its g, next state, its g)``,
+                or None if there is no solution.
+        """
+        stats = self.stats
+        clock = time.perf_counter
+        counter = self.counter
+        # Every open state's [node, used moves, relay].
+        table = {start.state: [start, 0, None]}
+        fringe = [(start.f, -start.g, next(counter), start)]
+        f_bound = None
+        while fringe:
+            if len(table) > stats.max_frontier:
+                stats.max_frontier = len(table)
+            node = heapq.heappop(fringe)[-1]
+            entry = table.get(node.state)
+            if entry is None or entry[0] is not node:
+                stats.duplicates += 1
+                continue
+            if progress and (f_bound is None or node.f > f_bound):
+                f_bound = node.f
+                stats.f_progression.append((f_bound, stats.expanded))
+            if node.is_goal():
+                return node, entry[2]
+            if self.max_expansions is not None and stats.expanded >= self.max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % self.max_expansions, stats)
+            if self.deadline is not None and clock() > self.deadline:
+                raise SearchLimitReached('time limit of %gs reached' % self.time_limit, stats)
+            del table[node.state]
+            stats.expanded += 1
+            _, used, relay = entry
+            for child, inverse in node.operator_children(used):
+                stats.generated += 1
+                child.parent = None
+                if bound is not None and child.f > bound:
+                    continue
+                known = table.get(child.state)
+                if known is not None:
+                    known[1] |= 1 << inverse
+                    if known[0].g <= child.g:
+                        stats.duplicates += 1
+                        continue
+                    known[0] = child
+                else:
+                    known = table[child.state] = [child, 1 << inverse, None]
+                if relay is not None:
+                    known[2] = relay
+                elif child.g > middle:
+                    known[2] = (node.state, node.g, child.state, child.g)
+                else:
+                    known[2] = None
+                heapq.heappush(fringe, (child.f, -child.g, next(counter), child))
+        return None
+
+    def recover(self, start, cost):
+        """Returns the (state, g) pairs of an optimal path from `start` to a goal of its
+        class, whose cost is known, with g relative to the start.
+        """
+        if start.is_goal():
+            return [(start.state, 0)]
+        found = self.run(start, start.g + cost / 2, bound=start.g + cost)
+        if found is None:
+            raise RuntimeError('no path of cost %r from a state of the solution' % cost)
+        return self.join(start, *found)
+
+    def join(self, start, goal, relay):
+        """Solves the two halves of the path split by the relay of the goal."""
+        last, last_g, after, after_g = relay
+        if last == start.state:
+            first_half = [(start.state, 0)]
+        else:
+            target = start.from_state(last).backward_root()
+            first_half = self.recover(target.from_state(start.state), last_g - start.g)
+        if after == goal.state:
+            second_half = [(goal.state, 0)]
+        else:
+            second_half = self.recover(start.from_state(after), goal.g - after_g)
+        offset = after_g - start.g
+        return first_half + [(state, g + offset) for state, g in second_half]
+
+
+def FrontierAstar(root, stats=None, max_expansions=None, time_limit=None):
+    """Runs frontier A* given the root node, recovering the path by divide and conquer.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must implement
+        ``Node.operator_children``, ``Node.from_state`` and ``Node.backward_root``, and its
+        heuristic must be consistent.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of all the searches, the path recovery
+        included. ``max_frontier`` is the largest number of stored nodes and
+        ``max_closed`` stays 0; ``f_progression`` is that of the first search.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    search = _Search(stats, max_expansions, deadline, time_limit)
+    try:
+        if root.is_goal():
+            return [root]
+        found = search.run(root, root.g + (root.f - root.g) / 2, progress=True)
+        if found is None:
+            return None
+        states = search.join(root, *found)
+    finally:
+        stats.elapsed = clock() - start
+    path = [root]
+    for state, g in states[1:]:
+        path.append(root.from_state(state, parent=path[-1], g=root.g + g))
+    return path
@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
 
-# DO NOT MODIFY THIS FILE
-
 class Node(ABC):
     """Abstract class that represents a Node of the A* algorithm.
 
@@ -80,6 +78,108 @@ class Node(ABC):
         """
         pass
 
+    def successors(self):
+        """Lists the moves out of this node with the change of f they cause, without
+        necessarily building the children. Partial-expansion search uses it to build only
+        the children it keeps, with ``make_child``.
+
+        The default implementation builds all the children with ``generate_children`` and
+        uses them as the moves; subclasses that can compute the change of f cheaply
+        override both methods.
+
+        Returns
+        -------
+            successors : list of pairs
+                A ``(move, delta_f)`` pair per child, where the child's f is
+                ``self.f + delta_f``.
+        """
+        return [(child, child.f - self.f) for child in self.generate_children()]
+
+    def make_child(self, move):
+        """Builds the child reached by a move returned by ``successors``.
+
+        Returns
+        -------
+            child : Node
+                The child node.
+        """
+        return move
+
+    def operator_children(self, used=0):
+        """Generates the children of this node with the inverse of each move, for engines
+        that keep no closed list and mark instead the moves that lead back to expanded
+        nodes (frontier search). The moves of a node are numbered from 0, and every move
+        must have an inverse of the same cost. Subclasses that support it override this
+        method.
+
+        Parameters
+        ----------
+        used : int, optional
+            A bit mask of the moves to skip: bit i stands for move i. Default is 0.
+
+        Returns
+        -------
+            children : list of pairs
+                A ``(child, inverse)`` pair per move not in `used`, where ``inverse`` is
+                the number of the child's move that leads back to this node.
+        """
+        raise NotImplementedError('%s cannot enumerate its inverse moves' % type(self).__name__)
+
+    def regenerate_children(self, states):
+        """Generates again the children of this node that a memory-bounded search forgot.
+
+        The default implementation filters ``generate_children``; subclasses that can
+        build some children alone may override it.
+
+        Parameters
+        ----------
+        states : container of states
+            The states of the children to build.
+
+        Returns
+        -------
+            children : list of Nodes
+                The child nodes whose state is in `states`.
+        """
+        return [child for child in self.generate_children() if child.state in states]
+
+    def from_state(self, state, parent=None, g=0):
+        """Builds a node of the same problem as this one from a state returned by `_get_state`.
+
+        Search engines that store bare states instead of nodes use it to rebuild nodes.
+        Subclasses that support it override this method.
+
+        Parameters
+        ----------
+        state : tuple
+            The hashable representation of the search state.
+
+        parent : Node, optional
+            The parent of the new node. Default is None.
+
+        g : int or float, optional
+            The cost to reach the new node from the start node. Default is 0.
+
+        Returns
+        -------
+            node : Node
+                The node of that state.
+        """
+        raise NotImplementedError('%s cannot be rebuilt from its state' % type(self).__name__)
+
+    def backward_root(self):
+        """Returns the root of a search from the goal back to this node, for bidirectional
+        search: a node of the goal state whose ``is_goal`` tests for this node's state and
+        whose heuristic estimates the cost to reach it. Every move must be reversible at
+        the same cost. Subclasses that support it override this method.
+
+        Returns
+        -------
+            node : Node
+                The node of the goal state.
+        """
+        raise NotImplementedError('%s cannot be searched backward' % type(self).__name__)
+
     def get_path(self):
         """Returns the path from the start node to this node.
 
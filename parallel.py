@@ -0,0 +1,367 @@
+"""Hash-distributed parallel A* (HDA*).
+
+``HDAstar`` runs one search over several worker processes. Every state is owned by the
+worker ``hash(state) % workers``, which keeps the open list and the best g (and parent)
+of its states. A worker expands its best open node and sends each child to its owner,
+batching the children per destination to amortize the queue traffic; children it owns
+itself go straight to its open list as nodes. Other children are sent as
+``(state, g, f, parent state)`` and their owner rebuilds them with ``Node.from_state``
+when it expands them, so the root's class must implement ``from_state``, and its states
+must hash the same way in every process (ints and tuples of ints do; strings only do
+with a fixed PYTHONHASHSEED).
+
+A worker that pops a goal reports its cost to the coordinator, which broadcasts the best
+cost found so far; every worker then drops the nodes whose f is not below it. The search
+is over when no worker has a node below the bound and no node is in flight. The
+coordinator detects this with the four-counter method: it polls every worker for its
+idle flag and its counts of nodes sent and received, and stops after two consecutive
+rounds in which all workers are idle, the counts are unchanged and every sent node has
+been received. At that point every node with f below the cost of the best goal was
+expanded, so with an admissible heuristic the solution is optimal, exactly as for
+``search.Astar``.
+
+The path is then traced back one state at a time, asking the owner of each state for its
+parent, and returned as a list of nodes like ``Node.get_path``.
+
+A worker that raises an exception sends it to the coordinator before exiting, and the
+coordinator raises it again, with the worker's traceback as its cause. A worker that
+exits without a word (e.g. killed) makes the coordinator raise WorkerError.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+import traceback
+
+from search import SearchLimitReached, SearchStats
+
+# Seconds a coordinator or an idle worker waits on its queue before looking around again.
+_POLL = 0.01
+
+
+class WorkerError(Exception):
+    """Raised when a worker process dies; also the cause, holding the worker's traceback,
+    of an exception raised by a worker.
+    """
+
+
+class _Worker:
+    """The search state of one worker process."""
+
+    def __init__(self, wid, root, inboxes, results, batch_size):
+        self.wid = wid
+        self.root = root
+        self.inboxes = inboxes
+        self.inbox = inboxes[wid]
+        self.results = results
+        self.batch_size = batch_size
+        self.best = {}
+        self.open = []
+        self.counter = itertools.count()
+        self.out = [[] for _ in inboxes]
+        self.bound = float('inf')
+        self.sent = 0
+        self.received = 0
+        self.stats = SearchStats()
+
+    def has_work(self):
+        return bool(self.open) and self.open[0][0] < self.bound
+
+    def add(self, state, g, f, parent, node=None):
+        known = self.best.get(state)
+        if known is not None and known[0] <= g:
+            self.stats.duplicates += 1
+            return
+        if known is not None:
+            self.stats.reopened += 1
+        self.best[state] = (g, parent)
+        heapq.heappush(self.open, (f, -g, next(self.counter), state, node))
+
+    def flush(self, owner=None):
+        owners = range(len(self.out)) if owner is None else (owner,)
+        for owner in owners:
+            batch = self.out[owner]
+            if batch:
+                self.inboxes[owner].put(('nodes', batch))
+                self.sent += len(batch)
+                self.out[owner] = []
+
+    def expand(self):
+        f, minus_g, _, state, node = heapq.heappop(self.open)
+        g = -minus_g
+        if self.best[state][0] != g:
+            return
+        if node is None:
+            node = self.root.from_state(state, g=g)
+        if node.is_goal():
+            if g < self.bound:
+                self.bound = g
+                self.results.put(('goal', g, state))
+            return
+        self.stats.expanded += 1
+        workers = len(self.out)
+        for child in node.generate_children():
+            self.stats.generated += 1
+            if child.f >= self.bound:
+                continue
+            child_state = child.state
+            owner = hash(child_state) % workers
+            if owner == self.wid:
+                # Nodes kept locally need not be rebuilt; drop their parent link so that
+                # expanded nodes can be freed.
+                child.parent = None
+                self.add(child_state, child.g, child.f, state, child)
+            else:
+                batch = self.out[owner]
+                batch.append((child_state, child.g, child.f, state))
+                if len(batch) >= self.batch_size:
+                    self.flush(owner)
+
+    def handle(self, message):
+        """Handles one message; returns False on 'stop'."""
+        kind = message[0]
+        if kind == 'nodes':
+            self.received += len(message[1])
+            for entry in message[1]:
+                self.add(*entry)
+        elif kind == 'bound':
+            self.bound = min(self.bound, message[1])
+        elif kind == 'probe':
+            idle = not self.has_work()
+            if idle:
+                self.flush()
+            self.results.put(('status', message[1], self.wid, idle, self.sent, self.received))
+        elif kind == 'parent':
+            g, parent = self.best[message[1]]
+            self.results.put(('parent', message[1], parent, g))
+        elif kind == 'stop':
+            self.stats.max_closed = len(self.best)
+            self.results.put(('stats', self.wid, self.stats.as_dict()))
+            return False
+        return True
+
+    def run(self):
+        while True:
+            busy = self.has_work()
+            if not busy:
+                self.flush()
+            try:
+                message = self.inbox.get_nowait() if busy else self.inbox.get(timeout=_POLL)
+                while True:
+                    if not self.handle(message):
+                        return
+                    message = self.inbox.get_nowait()
+            except queue.Empty:
+                pass
+            # Expand a batch of nodes between two looks at the inbox. Children that are not
+            # full batches yet are sent along, so that other workers are not kept waiting.
+            for _ in range(self.batch_size):
+                if not self.has_work():
+                    break
+                self.expand()
+                if len(self.open) > self.stats.max_frontier:
+                    self.stats.max_frontier = len(self.open)
+            self.flush()
+
+
+def _run_worker(wid, root, inboxes, results, batch_size):
+    try:
+        _Worker(wid, root, inboxes, results, batch_size).run()
+    except BaseException as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = WorkerError('%s: %s' % (type(e).__name__, e))
+        results.put(('error', wid, e, traceback.format_exc()))
+
+
+def HDAstar(root, workers=None, batch_size=64, stats=None, time_limit=None):
+    """Runs A* on several processes, each owning the states of one hash partition.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved. Its class must implement
+        ``Node.from_state``.
+
+    workers: int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    batch_size: int, optional
+        The number of nodes sent to another worker in one message, and the number of
+        nodes a worker expands between two looks at its inbox. Default is 64.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of all the workers added up
+        (max_frontier and max_closed are summed over the workers too).
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If time_limit is exceeded.
+
+    WorkerError
+        If a worker process died. An exception raised by a worker is raised again as is.
+    """
+    if stats is None:
+        stats = SearchStats()
+    workers = workers or os.cpu_count() or 1
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    processes = [context.Process(target=_run_worker, args=(wid, root, inboxes, results, batch_size), daemon=True)
+                 for wid in range(workers)]
+    for process in processes:
+        process.start()
+
+    root_state = root.state
+    inboxes[hash(root_state) % workers].put(('nodes', [(root_state, root.g, root.f, None)]))
+    sent = 1
+    bound = float('inf')
+    goal = None
+    path = None
+    wave = 0
+    previous = None
+    replies = {}
+    # Seconds to wait for the stats of the workers once they are stopped.
+    patience = 5
+    try:
+        for inbox in inboxes:
+            inbox.put(('probe', wave))
+        while True:
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            message = _receive(results, processes)
+            if message is None:
+                continue
+            if message[0] == 'goal':
+                if message[1] < bound:
+                    bound, goal = message[1], message[2]
+                    for inbox in inboxes:
+                        inbox.put(('bound', bound))
+                continue
+            _, probe, wid, idle, worker_sent, worker_received = message
+            if probe != wave:
+                continue
+            replies[wid] = (idle, worker_sent, worker_received)
+            if len(replies) < workers:
+                continue
+            counts = [replies[wid] for wid in range(workers)]
+            done = (counts == previous and all(idle for idle, _, _ in counts)
+                    and sent + sum(c[1] for c in counts) == sum(c[2] for c in counts))
+            if done:
+                break
+            previous = counts
+            replies = {}
+            wave += 1
+            for inbox in inboxes:
+                inbox.put(('probe', wave))
+        if goal is not None:
+            path = _trace_path(root, goal, inboxes, results, processes)
+    except BaseException as e:
+        # A worker that died may hold a lock of the results queue: do not wait long for
+        # the others to report.
+        if not isinstance(e, SearchLimitReached):
+            patience = 1
+        raise
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        _collect_stats(stats, results, workers, processes, patience)
+        stats.elapsed = clock() - start
+    return path
+
+
+def _receive(results, processes):
+    """Returns the next message of the workers, or None if none comes within _POLL seconds.
+
+    Raises
+    ------
+    Exception
+        The exception raised by a worker, or WorkerError if a worker has exited.
+    """
+    try:
+        message = results.get(timeout=_POLL)
+    except queue.Empty:
+        for wid, process in enumerate(processes):
+            if process.exitcode is not None:
+                _raise_failure(results, wid, process)
+        return None
+    if message[0] == 'error':
+        _reraise(message)
+    return message
+
+
+def _raise_failure(results, wid, process):
+    """Raises the exception of the worker that has exited, sent just before it exited,
+    or WorkerError if it sent none.
+    """
+    while True:
+        try:
+            message = results.get(timeout=_POLL)
+        except queue.Empty:
+            break
+        if message[0] == 'error':
+            _reraise(message)
+    raise WorkerError('worker %d exited with code %d' % (wid, process.exitcode))
+
+
+def _reraise(message):
+    _, wid, error, trace = message
+    raise error from WorkerError('worker %d failed:\n%s' % (wid, trace))
+
+
+def _trace_path(root, goal, inboxes, results, processes):
+    """Asks the owners of the states along the path for their parents."""
+    entries = []
+    state = goal
+    while state is not None:
+        inboxes[hash(state) % len(inboxes)].put(('parent', state))
+        while True:
+            message = _receive(results, processes)
+            if message is not None and message[0] == 'parent' and message[1] == state:
+                break
+        entries.append((state, message[3]))
+        state = message[2]
+    entries.reverse()
+    path = [root]
+    for state, g in entries[1:]:
+        path.append(root.from_state(state, parent=path[-1], g=g))
+    return path
+
+
+def _collect_stats(stats, results, workers, processes, patience):
+    reported = 0
+    deadline = time.perf_counter() + patience
+    while reported < workers and time.perf_counter() < deadline:
+        try:
+            message = results.get(timeout=_POLL)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+            continue
+        if message[0] != 'stats':
+            continue
+        reported += 1
+        for name, value in message[2].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                setattr(stats, name, getattr(stats, name) + value)
+    for process in processes:
+        process.join(1)
+        if process.is_alive():
+            process.terminate()
@@ -1,5 +1,7 @@
 from node import Node
+from pruning import START, MovePruning, move_index
 import copy
+import functools
 
 class FifteensNode(Node):
     """Extends the Node class to solve the 15 puzzle.
@@ -41,8 +43,25 @@ class FifteensNode(Node):
       9  3 14 10
       6 13 15 12
 
+    Using another heuristic, e.g. an additive pattern database (see patterndb.py) ::
+    #>>> Node = FifteensNode.with_heuristic(AdditivePDB.load_dir('pdbs/'))
+    #>>> n = Node(input_str=initial_state_str)
+
+    or one of the heuristics registry (see heuristics.py) by name ::
+    #>>> Node = FifteensNode.with_heuristic('linear-conflict')
+
     """
 
+    # Optional replacement for the Manhattan distance: a callable that receives the
+    # cells of the board in row-major order. Set it with `with_heuristic`.
+    heuristic = None
+    # Optional pruning.MovePruning automaton, set with `with_move_pruning`, and the state
+    # of the automaton after the moves that led to this node.
+    move_pruning = None
+    _fsm = START
+    # The cells of the board to reach instead of the goal, set by `backward_root`.
+    target = None
+
     def __init__(self, parent=None, g=0, board=None, input_str=None):
         # NOTE: You shouldn't modify the constructor
         if input_str:
@@ -54,6 +73,44 @@ class FifteensNode(Node):
 
         super(FifteensNode, self).__init__(parent, g)
 
+    @classmethod
+    def with_heuristic(cls, heuristic):
+        """Returns a subclass whose nodes, and all their descendants, use another heuristic.
+
+        Parameters
+        ----------
+        heuristic : callable or str
+            Called with the cells of the board in row-major order (a tuple of 16 ints),
+            returns h(n). It must be admissible for A* to return optimal paths. A name
+            known to ``heuristics.make_heuristic`` selects a heuristic of the registry.
+
+        Returns
+        -------
+            node_class : type
+                The new subclass of this class.
+        """
+        if isinstance(heuristic, str):
+            from heuristics import make_heuristic
+            heuristic = make_heuristic(heuristic, 4)
+        return type(cls.__name__, (cls,), {'heuristic': staticmethod(heuristic)})
+
+    @classmethod
+    def with_move_pruning(cls, depth=8):
+        """Returns a subclass whose nodes skip the moves cut by a move-pruning automaton.
+
+        Parameters
+        ----------
+        depth : int, optional
+            The length of the longest move strings enumerated to find duplicates
+            (see pruning.find_duplicates). Default is 8.
+
+        Returns
+        -------
+            node_class : type
+                The new subclass of this class.
+        """
+        return _with_move_pruning(cls, depth)
+
     def generate_children(self):
         """Generates children by trying all 4 possible moves of the empty cell.
 
@@ -74,48 +131,123 @@ class FifteensNode(Node):
                     zero_row=i
                     zero_col=j
         children = []
+        # The automaton states after moving left, right, up and down; -1 prunes the move.
+        fsm = (START,) * 4 if self.move_pruning is None else self.move_pruning.table[self._fsm]
         # create new board
         # generate a child
         # put it in list
 
         # swap w/ left
-        if zero_col != 0:
+        if zero_col != 0 and fsm[0] >= 0:
             newboard = copy.deepcopy(self.board)
             newboard[zero_row][zero_col] = newboard[zero_row][zero_col-1]
             newboard[zero_row][zero_col-1] = 0
-            childnode1 = FifteensNode(parent=self, g=self.g+1, board=newboard)
+            childnode1 = type(self)(parent=self, g=self.g+1, board=newboard)
+            childnode1._fsm = fsm[0]
             # print(childnode1.__str__())
             children.append(childnode1)
 
         # swap w/ right
-        if zero_col != 3:
+        if zero_col != 3 and fsm[1] >= 0:
             newboard = copy.deepcopy(self.board)
             newboard[zero_row][zero_col] = newboard[zero_row][zero_col+1]
             newboard[zero_row][zero_col+1] = 0
-            childnode2 = FifteensNode(parent=self, g=self.g+1, board=newboard)
+            childnode2 = type(self)(parent=self, g=self.g+1, board=newboard)
+            childnode2._fsm = fsm[1]
             # print(childnode2.__str__())
             children.append(childnode2)
 
         # swap w/ up
-        if zero_row != 0:
+        if zero_row != 0 and fsm[2] >= 0:
             newboard = copy.deepcopy(self.board)
             newboard[zero_row][zero_col] = newboard[zero_row-1][zero_col]
             newboard[zero_row-1][zero_col] = 0
-            childnode3 = FifteensNode(parent=self, g=self.g+1, board=newboard)
+            childnode3 = type(self)(parent=self, g=self.g+1, board=newboard)
+            childnode3._fsm = fsm[2]
             # print(childnode3.__str__())
             children.append(childnode3)
 
         # swap w/ down
-        if zero_row != 3:
+        if zero_row != 3 and fsm[3] >= 0:
             newboard = copy.deepcopy(self.board)
             newboard[zero_row][zero_col] = newboard[zero_row+1][zero_col]
             newboard[zero_row+1][zero_col] = 0
-            childnode4 = FifteensNode(parent=self, g=self.g+1, board=newboard)
+            childnode4 = type(self)(parent=self, g=self.g+1, board=newboard)
+            childnode4._fsm = fsm[3]
             # print(childnode4.__str__())
             children.append(childnode4)
 
         return children
 
+    def successors(self):
+        """Lists the moves of the empty cell with the change of f, computed from the
+        Manhattan distance of the moving tile without building the child. With another
+        `heuristic`, the children are built.
+
+        Returns
+        -------
+            successors : list of pairs
+                A ``(move, delta_f)`` pair per child, where a move holds the cells of the
+                empty cell and of the moving tile, and the automaton state of the child.
+        """
+        if self.heuristic is not None:
+            return Node.successors(self)
+        blank = self.state.index(0)
+        zero_row, zero_col = divmod(blank, 4)
+        fsm = (START,) * 4 if self.move_pruning is None else self.move_pruning.table[self._fsm]
+        successors = []
+        for move, (row, col) in enumerate(((zero_row, zero_col - 1), (zero_row, zero_col + 1),
+                                           (zero_row - 1, zero_col), (zero_row + 1, zero_col))):
+            if not (0 <= row < 4 and 0 <= col < 4) or fsm[move] < 0:
+                continue
+            # The same distances as evaluate_heuristic, by tile and cell.
+            manhattan = _PACKED_MANHATTAN[self.board[row][col]]
+            successors.append(((zero_row, zero_col, row, col, fsm[move]),
+                               1 + manhattan[blank] - manhattan[4 * row + col]))
+        return successors
+
+    def make_child(self, move):
+        """Builds the child of a move returned by ``successors``, copying only the rows of
+        the board that change and sharing the others with this node.
+        """
+        if isinstance(move, Node):
+            return move
+        zero_row, zero_col, row, col, fsm = move
+        newboard = list(self.board)
+        newboard[zero_row] = list(newboard[zero_row])
+        if row != zero_row:
+            newboard[row] = list(newboard[row])
+        newboard[zero_row][zero_col] = newboard[row][col]
+        newboard[row][col] = 0
+        child = type(self)(parent=self, g=self.g + 1, board=newboard)
+        child._fsm = fsm
+        return child
+
+    def operator_children(self, used=0):
+        """Generates the children of the moves of the empty cell that are not in `used`,
+        numbered as in pruning.MOVES: left, right, up, down. The inverse of a move is the
+        other move of its pair, i.e. its number xor 1.
+
+        Returns
+        -------
+            children : list of pairs
+                A ``(child, inverse)`` pair per move.
+        """
+        zero_row, zero_col = divmod(self.state.index(0), 4)
+        fsm = (START,) * 4 if self.move_pruning is None else self.move_pruning.table[self._fsm]
+        children = []
+        for move, (row, col) in enumerate(((zero_row, zero_col - 1), (zero_row, zero_col + 1),
+                                           (zero_row - 1, zero_col), (zero_row + 1, zero_col))):
+            if used >> move & 1 or not (0 <= row < 4 and 0 <= col < 4) or fsm[move] < 0:
+                continue
+            newboard = [list(line) for line in self.board]
+            newboard[zero_row][zero_col] = newboard[row][col]
+            newboard[row][col] = 0
+            child = type(self)(parent=self, g=self.g + 1, board=newboard)
+            child._fsm = fsm[move]
+            children.append((child, move ^ 1))
+        return children
+
     def is_goal(self):
         """Decides whether this search state is the final state of the puzzle.
 
@@ -128,6 +260,8 @@ class FifteensNode(Node):
         # TODO: add your code here
         # You should use self.board to decide.
 
+        if self.target is not None:
+            return self.state == self.target
         bool = True
         bool = bool and (self.board[0][0]==1) and (self.board[0][1]==2) and (self.board[0][2]==3) and (self.board[0][3]==4)
         bool = bool and (self.board[1][0]==5) and (self.board[1][1]==6) and (self.board[1][2]==7) and (self.board[1][3]==8)
@@ -145,8 +279,8 @@ class FifteensNode(Node):
                 The heuristic value for this state.
         """
 
-        # TODO: add your code here
-        # You may want to use self.board here.
+        if self.heuristic is not None:
+            return self.heuristic(tuple([n for row in self.board for n in row]))
 
         h = 0
         for i in range(len(self.board)):
@@ -171,6 +305,18 @@ class FifteensNode(Node):
         # NOTE: You shouldn't modify this method.
         return tuple([n for row in self.board for n in row])
 
+    def from_state(self, state, parent=None, g=0):
+        """Builds a node of the same class from a state returned by `_get_state`."""
+        return type(self)(parent=parent, g=g, board=[list(state[i:i + 4]) for i in range(0, 16, 4)])
+
+    def backward_root(self):
+        """Returns a node of the goal board whose goal is this board instead, with the
+        Manhattan distance to this board as its heuristic.
+        """
+        node_class = type(type(self).__name__, (type(self),),
+                          {'heuristic': staticmethod(ManhattanTo(self.state)), 'target': self.state})
+        return node_class(board=[[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 0]])
+
     def __str__(self):
         """Returns the string representation of this node.
 
@@ -194,6 +340,649 @@ class FifteensNode(Node):
         return ''.join(sb)
 
 
+class ManhattanTo:
+    """The Manhattan distance to any target board, as a heuristic callable.
+
+    Parameters
+    ----------
+    target : tuple
+        The cells of the target board in row-major order.
+
+    Attributes
+    ----------
+    table : list of lists
+        ``table[tile][pos]`` is the distance of `tile` at cell `pos` to its target cell,
+        0 for the blank.
+    """
+
+    def __init__(self, target):
+        cells = len(target)
+        size = int(round(cells ** 0.5))
+        self.target = tuple(target)
+        self.table = [[0] * cells for _ in range(cells)]
+        for goal, tile in enumerate(self.target):
+            if tile:
+                self.table[tile] = [abs(pos // size - goal // size) + abs(pos % size - goal % size)
+                                    for pos in range(cells)]
+
+    def __call__(self, cells):
+        table = self.table
+        return sum(table[tile][pos] for pos, tile in enumerate(cells))
+
+
+# Tables shared by all PackedFifteensNode instances. Cell i (row-major) of the board is
+# stored in bits 4*i .. 4*i+3 of the packed integer.
+_PACKED_GOAL = sum(((i + 1) % 16) << (4 * i) for i in range(16))
+_PACKED_MANHATTAN = [[0] * 16] + [
+    [abs(pos // 4 - (tile - 1) // 4) + abs(pos % 4 - (tile - 1) % 4) for pos in range(16)]
+    for tile in range(1, 16)
+]
+# Positions the blank can move to, in the same order as FifteensNode.generate_children:
+# left, right, up, down.
+_PACKED_NEIGHBOURS = [
+    tuple(p for p, ok in ((pos - 1, pos % 4 != 0), (pos + 1, pos % 4 != 3),
+                          (pos - 4, pos >= 4), (pos + 4, pos < 12)) if ok)
+    for pos in range(16)
+]
+# The same, as (position, index of the move in pruning.MOVES) pairs.
+_PACKED_MOVES = [
+    tuple((p, i) for i, (p, ok) in enumerate(((pos - 1, pos % 4 != 0), (pos + 1, pos % 4 != 3),
+                                              (pos - 4, pos >= 4), (pos + 4, pos < 12))) if ok)
+    for pos in range(16)
+]
+
+
+def _with_move_pruning(cls, depth):
+    return type(cls.__name__, (cls,), {'move_pruning': MovePruning.for_depth(depth)})
+
+
+class PackedFifteensNode(Node):
+    """A compact FifteensNode that stores the board as 16 nibbles of a single integer.
+
+    The packed integer is also the hashable state of the node. Children are generated with
+    shifts and masks, and their heuristic is updated from the parent's by the change in the
+    Manhattan distance of the one tile that moved.
+
+    Parameters
+    ----------
+    parent : Node, optional
+        The parent node. Default is None.
+
+    g : int, optional
+        The number of moves to reach this node from the initial configuration. Default is 0.
+
+    board : list of lists, optional
+        A 4x4 board, as for FifteensNode. Ignored if input_str or packed is provided.
+        A board given here or as input_str is checked like a SlidingPuzzleNode root board,
+        so an unsolvable one raises UnsolvableError.
+
+    input_str : str, optional
+        The input string to be parsed to create the board, as for FifteensNode.
+
+    packed : int, optional
+        The packed board. Cell i (row-major) is held in bits 4*i to 4*i+3.
+
+    blank : int, optional
+        The row-major index of the empty cell. Computed from the board if omitted.
+
+    h : int, optional
+        The heuristic value of the board. Computed from the board if omitted.
+
+    Examples
+    ----------
+    Initialization with an input string, exactly as for FifteensNode:
+    #>>> n = PackedFifteensNode(input_str=initial_state_str)
+    #>>> print(n)
+      5  1  4  8
+      7     2 11
+      9  3 14 10
+      6 13 15 12
+
+    Generating a child node from the parent's packed board:
+    #>>> n = PackedFifteensNode(parent=p, g=p.g+1, packed=updated_packed, blank=new_blank, h=updated_h)
+
+    """
+
+    move_pruning = None
+    _fsm = START
+    with_move_pruning = classmethod(FifteensNode.with_move_pruning.__func__)
+    # The packed board to reach and the distances of the tiles to it, replaced by
+    # `backward_root`, which also sets `target` to that board, as for FifteensNode.
+    _goal = _PACKED_GOAL
+    _manhattan = _PACKED_MANHATTAN
+    target = None
+
+    def __init__(self, parent=None, g=0, board=None, input_str=None, packed=None, blank=None, h=None):
+        if packed is None:
+            if input_str:
+                board = parse_board(input_str)
+            cells = check_board(board)
+            if len(cells) != 16:
+                raise ValueError('PackedFifteensNode needs a 4x4 board, use SlidingPuzzleNode for other sizes')
+            packed = sum(n << (4 * i) for i, n in enumerate(cells))
+            blank = cells.index(0)
+        elif blank is None:
+            blank = next(i for i in range(16) if not (packed >> (4 * i)) & 15)
+        self.packed = packed
+        self.blank = blank
+        self._h = h
+        super(PackedFifteensNode, self).__init__(parent, g)
+
+    @property
+    def board(self):
+        """The board as a 4x4 list of lists."""
+        packed = self.packed
+        return [[(packed >> (4 * (4 * i + j))) & 15 for j in range(4)] for i in range(4)]
+
+    def generate_children(self):
+        """Generates children by trying all the possible moves of the empty cell.
+
+        Returns
+        -------
+            children : list of Nodes
+                The list of child nodes.
+        """
+        packed = self.packed
+        blank = self.blank
+        h = self.f - self.g
+        g = self.g + 1
+        blank_shift = 4 * blank
+        node_class = type(self)
+        distances = self._manhattan
+        pruning = self.move_pruning
+        children = []
+        if pruning is None:
+            for pos in _PACKED_NEIGHBOURS[blank]:
+                shift = 4 * pos
+                tile = (packed >> shift) & 15
+                manhattan = distances[tile]
+                children.append(node_class(
+                    parent=self, g=g,
+                    packed=packed - (tile << shift) + (tile << blank_shift), blank=pos,
+                    h=h + manhattan[blank] - manhattan[pos]))
+            return children
+        fsm = pruning.table[self._fsm]
+        for pos, move in _PACKED_MOVES[blank]:
+            state = fsm[move]
+            if state < 0:
+                continue
+            shift = 4 * pos
+            tile = (packed >> shift) & 15
+            manhattan = distances[tile]
+            child = node_class(parent=self, g=g, packed=packed - (tile << shift) + (tile << blank_shift), blank=pos,
+                               h=h + manhattan[blank] - manhattan[pos])
+            child._fsm = state
+            children.append(child)
+        return children
+
+    def successors(self):
+        """Lists the moves of the empty cell, as the cell it moves to, with the change of f,
+        computed from the Manhattan distance of the moving tile without building the child.
+
+        Returns
+        -------
+            successors : list of pairs
+                A ``(position, delta_f)`` pair per child.
+        """
+        packed = self.packed
+        blank = self.blank
+        fsm = None if self.move_pruning is None else self.move_pruning.table[self._fsm]
+        distances = self._manhattan
+        successors = []
+        for pos, move in _PACKED_MOVES[blank]:
+            if fsm is not None and fsm[move] < 0:
+                continue
+            manhattan = distances[(packed >> (4 * pos)) & 15]
+            successors.append((pos, 1 + manhattan[blank] - manhattan[pos]))
+        return successors
+
+    def make_child(self, pos):
+        """Builds the child where the empty cell moved to `pos`."""
+        packed = self.packed
+        blank = self.blank
+        shift = 4 * pos
+        tile = (packed >> shift) & 15
+        manhattan = self._manhattan[tile]
+        child = type(self)(parent=self, g=self.g + 1, packed=packed - (tile << shift) + (tile << (4 * blank)),
+                           blank=pos, h=self.f - self.g + manhattan[blank] - manhattan[pos])
+        if self.move_pruning is not None:
+            child._fsm = self.move_pruning.table[self._fsm][move_index(blank, pos, 4)]
+        return child
+
+    def operator_children(self, used=0):
+        """Generates the children of the moves of the empty cell that are not in `used`,
+        numbered as in pruning.MOVES, with the inverse of each (its number xor 1).
+
+        Returns
+        -------
+            children : list of pairs
+                A ``(child, inverse)`` pair per move.
+        """
+        fsm = None if self.move_pruning is None else self.move_pruning.table[self._fsm]
+        return [(self.make_child(pos), move ^ 1) for pos, move in _PACKED_MOVES[self.blank]
+                if not used >> move & 1 and (fsm is None or fsm[move] >= 0)]
+
+    def is_goal(self):
+        """Decides whether this search state is the final state of the puzzle.
+
+        Returns
+        -------
+            is_goal : bool
+                True if this search state is the goal state, False otherwise.
+        """
+        return self.packed == self._goal
+
+    def evaluate_heuristic(self):
+        """Returns the Manhattan distance of the board, computing it only if it was not
+        given to the constructor.
+
+        Returns
+        -------
+            h : int
+                The heuristic value for this state.
+        """
+        if self._h is None:
+            packed = self.packed
+            self._h = sum(self._manhattan[(packed >> (4 * i)) & 15][i] for i in range(16))
+        return self._h
+
+    def _get_state(self):
+        """Returns an hashable representation of this search state.
+
+        Returns
+        -------
+            state: int
+                The packed board.
+        """
+        return self.packed
+
+    def from_state(self, state, parent=None, g=0):
+        """Builds a node of the same class from a packed board."""
+        return type(self)(parent=parent, g=g, packed=state)
+
+    def backward_root(self):
+        """Returns a node of the goal board whose goal is this board instead, with the
+        Manhattan distance to this board as its heuristic.
+        """
+        cells = [(self.packed >> (4 * i)) & 15 for i in range(16)]
+        node_class = type(type(self).__name__, (type(self),),
+                          {'_goal': self.packed, '_manhattan': ManhattanTo(cells).table, 'target': self.packed})
+        return node_class(packed=_PACKED_GOAL, blank=15)
+
+    __str__ = FifteensNode.__str__
+
+
+class UnsolvableError(ValueError):
+    """Raised when a sliding puzzle cannot reach the goal from the given board."""
+
+
+class _SlidingTables:
+    """The tables of one size of sliding puzzle, shared by all its nodes.
+
+    Attributes
+    ----------
+    size : int
+        The number of rows (and columns) of the board.
+
+    goal : tuple
+        The goal cells in row-major order: 1, 2, ..., size*size - 1, then 0.
+
+    manhattan : list of lists
+        ``manhattan[tile][pos]`` is the distance of `tile` at cell `pos` to its goal cell,
+        0 for the blank.
+
+    neighbours : list of tuples
+        The cells the blank can move to from every cell: left, right, up, down.
+
+    moves : list of tuples
+        The same, as (cell, index of the move in pruning.MOVES) pairs.
+    """
+
+    def __init__(self, size):
+        cells = size * size
+        self.size = size
+        self.goal = tuple(range(1, cells)) + (0,)
+        self.manhattan = [[0] * cells] + [
+            [abs(pos // size - (tile - 1) // size) + abs(pos % size - (tile - 1) % size) for pos in range(cells)]
+            for tile in range(1, cells)
+        ]
+        self.moves = [
+            tuple((p, i) for i, (p, ok) in enumerate(((pos - 1, pos % size != 0), (pos + 1, pos % size != size - 1),
+                                                      (pos - size, pos >= size), (pos + size, pos < cells - size)))
+                  if ok)
+            for pos in range(cells)
+        ]
+        self.neighbours = [tuple(p for p, _ in moves) for moves in self.moves]
+
+
+@functools.lru_cache(maxsize=None)
+def sliding_tables(size):
+    """Returns the tables of the size x size sliding puzzle, built once per size."""
+    return _SlidingTables(size)
+
+
+def is_solvable(cells, size):
+    """Decides whether a sliding puzzle can reach the goal, in O(size**2).
+
+    A move swaps the blank with a neighbour, so it flips the parity of the permutation of
+    the cells and of the blank's Manhattan distance to its goal cell (the last one). The
+    goal is reachable if and only if both parities are equal. The parity of the permutation
+    is found from its cycles instead of by counting inversions.
+
+    Parameters
+    ----------
+    cells : sequence of int
+        The board in row-major order, a permutation of 0 .. size*size - 1 with 0 for the blank.
+
+    size : int
+        The number of rows of the board.
+
+    Returns
+    -------
+        is_solvable : bool
+    """
+    n = size * size
+    # target[i] is the goal cell of the value found at cell i.
+    target = [(value - 1) % n for value in cells]
+    seen = bytearray(n)
+    transpositions = 0
+    for start in range(n):
+        if seen[start]:
+            continue
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = 1
+            i = target[i]
+            length += 1
+        transpositions += length - 1
+    blank = list(cells).index(0)
+    distance = (size - 1 - blank // size) + (size - 1 - blank % size)
+    return transpositions % 2 == distance % 2
+
+
+def parse_board(input_str):
+    """Parses a board given as lines of space-separated numbers into a list of lists."""
+    return [[int(n) for n in line.split()] for line in filter(None, input_str.splitlines())]
+
+
+def check_board(board):
+    """Checks that a board is a solvable square sliding puzzle before any search begins.
+
+    Parameters
+    ----------
+    board : list of lists
+        The rows of the board, with 0 for the blank.
+
+    Returns
+    -------
+        cells : tuple
+            The cells of the board in row-major order.
+
+    Raises
+    ------
+    ValueError
+        If the board is not square or its cells are not 0 .. size*size - 1.
+
+    UnsolvableError
+        If the goal cannot be reached from the board.
+    """
+    size = len(board)
+    if size < 2 or any(len(row) != size for row in board):
+        raise ValueError('A sliding puzzle board must be square and at least 2x2')
+    cells = tuple(n for row in board for n in row)
+    if sorted(cells) != list(range(size * size)):
+        raise ValueError('A %dx%d board must hold the numbers 0 to %d once each' % (size, size, size * size - 1))
+    if not is_solvable(cells, size):
+        raise UnsolvableError('This %dx%d board cannot reach the goal' % (size, size))
+    return cells
+
+
+class SlidingPuzzleNode(Node):
+    """Extends the Node class to solve the N x N sliding puzzle (8, 15, 24 puzzles...).
+
+    The size is taken from the root board. All the nodes of a size share precomputed tables
+    (see ``sliding_tables``): the goal state, the Manhattan distance of every tile on every
+    cell and the neighbours of every cell. The state is the tuple of the cells in row-major
+    order, so the goal test is a single comparison. A root board is checked when the node is
+    built and an unsolvable one raises UnsolvableError, instead of letting the search
+    exhaust half of the state space.
+
+    Parameters
+    ----------
+    parent : Node, optional
+        The parent node. Default is None.
+
+    g : int, optional
+        The number of moves to reach this node from the initial configuration. Default is 0.
+
+    board : list of lists, optional
+        The N x N board, with 0 for the empty cell. Ignored if input_str or cells is provided.
+
+    input_str : str, optional
+        The input string to be parsed to create the board, as for FifteensNode.
+
+    cells : tuple, optional
+        The board in row-major order. Children are built from their parent's cells, and are
+        not checked again.
+
+    blank : int, optional
+        The row-major index of the empty cell. Computed from the cells if omitted.
+
+    h_data : optional
+        The data of the registry heuristic for the board (see heuristics.py). Computed
+        from the board if omitted.
+
+    Examples
+    ----------
+    #>>> n = SlidingPuzzleNode(input_str='1 2 3\n4 0 6\n7 5 8')
+    #>>> print(n)
+     1 2 3
+     4   6
+     7 5 8
+
+    Using the maximum of two heuristics of the registry (see heuristics.py) ::
+    #>>> Node = SlidingPuzzleNode.with_heuristic('linear-conflict,walking-distance')
+    #>>> n = Node(input_str=initial_state_str)
+
+    """
+
+    # The heuristic: a name of the heuristics registry (see heuristics.py), whose value is
+    # updated incrementally from parent to child, or a callable that receives the cells of
+    # the board in row-major order. Set it with `with_heuristic`.
+    heuristic = 'manhattan'
+    move_pruning = None
+    _fsm = START
+    with_move_pruning = classmethod(FifteensNode.with_move_pruning.__func__)
+    # The cells of the board to reach instead of the goal, set by `backward_root`.
+    target = None
+
+    def __init__(self, parent=None, g=0, board=None, input_str=None, cells=None, blank=None, h_data=None):
+        if cells is None:
+            if input_str:
+                board = parse_board(input_str)
+            cells = check_board(board)
+        if blank is None:
+            blank = cells.index(0)
+        self.cells = cells
+        self.blank = blank
+        if parent is not None:
+            self._tables = parent._tables
+            self._heuristic = parent._heuristic
+        else:
+            self._tables = sliding_tables(int(round(len(cells) ** 0.5)))
+            self._heuristic = None
+            if isinstance(self.heuristic, str):
+                from heuristics import make_heuristic
+                self._heuristic = make_heuristic(self.heuristic, self._tables.size)
+        self._h_data = h_data
+        super(SlidingPuzzleNode, self).__init__(parent, g)
+
+    @classmethod
+    def with_heuristic(cls, heuristic):
+        """Returns a subclass whose nodes, and all their descendants, use another heuristic.
+
+        Parameters
+        ----------
+        heuristic : str or callable
+            A name known to ``heuristics.make_heuristic``, e.g. 'linear-conflict' or
+            'linear-conflict,walking-distance', or a callable as for FifteensNode.with_heuristic.
+
+        Returns
+        -------
+            node_class : type
+                The new subclass of this class.
+        """
+        if not isinstance(heuristic, str):
+            heuristic = staticmethod(heuristic)
+        return type(cls.__name__, (cls,), {'heuristic': heuristic})
+
+    @property
+    def size(self):
+        """The number of rows (and columns) of the board."""
+        return self._tables.size
+
+    @property
+    def board(self):
+        """The board as a list of lists."""
+        size = self._tables.size
+        return [list(self.cells[i:i + size]) for i in range(0, len(self.cells), size)]
+
+    def generate_children(self):
+        """Generates children by trying all the possible moves of the empty cell:
+        left, right, up, down.
+
+        Returns
+        -------
+            children : list of Nodes
+                The list of child nodes.
+        """
+        return [self.make_child(move) for move in self._moves()]
+
+    def _moves(self):
+        """Returns a (new blank position, new cells, heuristic data, automaton state) tuple
+        per move that is not pruned.
+        """
+        cells = self.cells
+        blank = self.blank
+        heuristic = self._heuristic
+        fsm = None if self.move_pruning is None else self.move_pruning.table[self._fsm]
+        moves = []
+        for pos, move in self._tables.moves[blank]:
+            if fsm is not None and fsm[move] < 0:
+                continue
+            child = list(cells)
+            child[blank] = cells[pos]
+            child[pos] = 0
+            child = tuple(child)
+            h_data = None if heuristic is None else heuristic.update(self._h_data, cells, child, blank, pos)
+            moves.append((pos, child, h_data, START if fsm is None else fsm[move]))
+        return moves
+
+    def successors(self):
+        """Lists the moves of the empty cell with the change of f, updating the heuristic
+        without building the children. With a callable `heuristic`, the children are built.
+
+        Returns
+        -------
+            successors : list of pairs
+                A ``(move, delta_f)`` pair per child, where a move holds the new position of
+                the empty cell, the new cells and their heuristic data.
+        """
+        heuristic = self._heuristic
+        if heuristic is None:
+            return Node.successors(self)
+        h = self.f - self.g
+        return [(move, 1 + heuristic.value(move[2]) - h) for move in self._moves()]
+
+    def make_child(self, move):
+        """Builds the child of a move returned by ``successors``."""
+        if isinstance(move, Node):
+            return move
+        pos, cells, h_data, fsm = move
+        child = type(self)(parent=self, g=self.g + 1, cells=cells, blank=pos, h_data=h_data)
+        child._fsm = fsm
+        return child
+
+    def operator_children(self, used=0):
+        """Generates the children of the moves of the empty cell that are not in `used`,
+        numbered as in pruning.MOVES, with the inverse of each (its number xor 1).
+
+        Returns
+        -------
+            children : list of pairs
+                A ``(child, inverse)`` pair per move.
+        """
+        size = self._tables.size
+        children = []
+        for move in self._moves():
+            number = move_index(self.blank, move[0], size)
+            if not used >> number & 1:
+                children.append((self.make_child(move), number ^ 1))
+        return children
+
+    def is_goal(self):
+        """Decides whether this search state is the final state of the puzzle.
+
+        Returns
+        -------
+            is_goal : bool
+                True if this search state is the goal state, False otherwise.
+        """
+        return self.cells == (self._tables.goal if self.target is None else self.target)
+
+    def evaluate_heuristic(self):
+        """Returns the value of the `heuristic` of the class. A registry heuristic is only
+        evaluated from scratch for the root, children update their parent's data.
+
+        Returns
+        -------
+            h : int or float
+                The heuristic value for this state.
+        """
+        heuristic = self._heuristic
+        if heuristic is None:
+            return self.heuristic(self.cells)
+        if self._h_data is None:
+            self._h_data = heuristic.evaluate(self.cells)
+        return heuristic.value(self._h_data)
+
+    def _get_state(self):
+        """Returns an hashable representation of this search state.
+
+        Returns
+        -------
+            state: tuple
+                The cells of the board in row-major order.
+        """
+        return self.cells
+
+    def from_state(self, state, parent=None, g=0):
+        """Builds a node of the same class from the cells of a board."""
+        return type(self)(parent=parent, g=g, cells=state)
+
+    def backward_root(self):
+        """Returns a node of the goal board whose goal is this board instead, with the
+        Manhattan distance to this board as its heuristic.
+        """
+        node_class = type(type(self).__name__, (type(self),),
+                          {'heuristic': staticmethod(ManhattanTo(self.cells)), 'target': self.cells})
+        return node_class(cells=self._tables.goal)
+
+    def __str__(self):
+        """Returns the string representation of this node.
+
+        Returns
+        -------
+            state_str : str
+                The string representation of the node.
+        """
+        width = len(str(len(self.cells) - 1)) + 1
+        return ''.join(
+            ''.join((str(n) if n else '').rjust(width) for n in self.cells[i:i + self.size]) + '\n'
+            for i in range(0, len(self.cells), self.size))
+
+
 class SuperqueensNode(Node):
     """Extends the Node class to solve the Superqueens problem.
 
@@ -220,6 +1009,12 @@ class SuperqueensNode(Node):
     n : int
         The size of the board (n x n)
 
+    break_symmetry : bool, optional
+        The board is symmetric under the mirror row r <-> n-1-r, and a placement and its mirror
+        have the same number of attacking pairs. If True, the first queen is only placed on
+        the rows r with r <= n-1-r, which halves the search and still finds an optimal
+        placement. The option is inherited by all the descendants. Default is False.
+
     Examples
     ----------
     Initialization with a board size (Only the first/root construction call should be formatted like this):
@@ -240,90 +1035,111 @@ class SuperqueensNode(Node):
 
     """
 
-    def __init__(self, parent=None, g=0, queen_positions=[], n=1):
-        # NOTE: You shouldn't modify the constructor
-        self.queen_positions = queen_positions
+    def __init__(self, parent=None, g=0, queen_positions=[], n=1, break_symmetry=False):
         self.n = n
+        self.break_symmetry = break_symmetry
+        self.queen_positions = queen_positions
         super(SuperqueensNode, self).__init__(parent, g)
 
+    # The node keeps the positions as a tuple, shared with its state, plus occupancy
+    # counters packed into integers with one field of `_width` bits per line of the board:
+    #   _rows           bit r is set if row r holds a queen
+    #   _diagonals      queens on the diagonal row - col + n - 1
+    #   _anti_diagonals queens on the anti-diagonal row + col
+    #   _knights        knight attacks from the two previous columns on every row of the
+    #                   next column to fill
+    # and one bit per line in _diagonal_bits and _anti_diagonal_bits, set if the line holds a queen.
+
+    @property
+    def queen_positions(self):
+        """The list of (row, column) positions of the queens."""
+        return list(self._positions)
+
+    @queen_positions.setter
+    def queen_positions(self, queen_positions):
+        self._positions = tuple(queen_positions)
+        n = self.n
+        width = self._width = max(1, n.bit_length())
+        col = len(self._positions)
+        self._rows = self._diagonals = self._anti_diagonals = self._knights = 0
+        self._diagonal_bits = self._anti_diagonal_bits = 0
+        for r, c in self._positions:
+            self._rows |= 1 << r
+            self._diagonals += 1 << (width * (r - c + n - 1))
+            self._anti_diagonals += 1 << (width * (r + c))
+            self._diagonal_bits |= 1 << (r - c + n - 1)
+            self._anti_diagonal_bits |= 1 << (r + c)
+            if c == col - 1:
+                self._knights += self._knight_attacks(r, 2)
+            elif c == col - 2:
+                self._knights += self._knight_attacks(r, 1)
+
+    def _knight_attacks(self, row, distance):
+        """Returns the packed counters of rows row - distance and row + distance."""
+        attacks = 0
+        if row >= distance:
+            attacks += 1 << (self._width * (row - distance))
+        if row + distance < self.n:
+            attacks += 1 << (self._width * (row + distance))
+        return attacks
+
+    def _child(self, row, g):
+        """Builds the child that adds a queen at (row, next column) without rebuilding the counters."""
+        n = self.n
+        width = self._width
+        col = len(self._positions)
+        child = type(self).__new__(type(self))
+        child.n = n
+        child.break_symmetry = self.break_symmetry
+        child._width = width
+        child._positions = self._positions + ((row, col),)
+        child._rows = self._rows | (1 << row)
+        child._diagonals = self._diagonals + (1 << (width * (row - col + n - 1)))
+        child._anti_diagonals = self._anti_diagonals + (1 << (width * (row + col)))
+        child._diagonal_bits = self._diagonal_bits | (1 << (row - col + n - 1))
+        child._anti_diagonal_bits = self._anti_diagonal_bits | (1 << (row + col))
+        child._knights = self._knight_attacks(row, 2)
+        if col:
+            child._knights += self._knight_attacks(self._positions[-1][0], 1)
+        Node.__init__(child, self, g)
+        return child
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _row_order(n):
+        """Returns the rows from the edges of the board toward the middle."""
+        return tuple(sorted(range(n), key=lambda row: -abs(2 * row - (n - 1))))
+
     def generate_children(self):
-        """Generates children by adding a new queen.
+        """Generates children by adding a new queen in the next column, on every free row.
+
+        The number of new attacking pairs of each child is read from the occupancy counters
+        in constant time. Children are generated from the outer rows toward the middle, so
+        with a 'lifo' tie-break the middle rows, which attack the fewest cells of the later
+        columns, are tried first.
 
         Returns
         -------
             children : list of Nodes
                 The list of child nodes.
         """
-        # TODO: add your code here
-        # You should use self.queen_positions and self.n to produce children.
-        # Don't forget to create a new queen_positions list for each child.
-        # You can use copy.deepcopy function from the standard library.
-
+        n = self.n
+        width = self._width
+        mask = (1 << width) - 1
+        col = len(self._positions)
+        if col >= n:
+            return []
+        diagonals = self._diagonals >> (width * (n - 1 - col))
+        anti_diagonals = self._anti_diagonals >> (width * col)
+        knights = self._knights
         children = []
-
-        # add child column by column
-        col = len(self.queen_positions)
-
-        # for every row
-        for row in range(self.n):
-
-            # check if this row is empty by comparing with existing queen_positions
-            is_empty = True
-            for value in self.queen_positions:
-                if value[0] == row:
-                    is_empty = False
-                    break
-
-            # if this row is empty, add a child
-            if is_empty:
-                # print(row, col)
-
-                # 1) update queens position
-                updated_queens_positions = copy.deepcopy(self.queen_positions)
-                updated_queens_positions.append((row, col))
-
-                # 2) calculate new g
-                updated_g = self.g
-
-                test_row = row
-                test_col = col
-                while test_row > 0 and test_col > 0:
-                    # print("check 1")
-                    test_row = test_row-1
-                    test_col = test_col-1
-                    if (test_row, test_col) in self.queen_positions:
-                        updated_g = updated_g + 1
-
-                test_row = row
-                test_col = col
-                while test_row < self.n and test_col > 0:
-                    # print("check 2")
-                    test_row = test_row + 1
-                    test_col = test_col - 1
-                    if (test_row, test_col) in self.queen_positions:
-                        updated_g = updated_g + 1
-
-                test_row = row-2
-                test_col = col-1
-                if (test_row, test_col) in self.queen_positions:
-                    updated_g = updated_g + 1
-                test_row = row - 1
-                test_col = col - 2
-                if (test_row, test_col) in self.queen_positions:
-                    updated_g = updated_g + 1
-                test_row = row + 2
-                test_col = col - 1
-                if (test_row, test_col) in self.queen_positions:
-                    updated_g = updated_g + 1
-                test_row = row + 1
-                test_col = col - 2
-                if (test_row, test_col) in self.queen_positions:
-                    updated_g = updated_g + 1
-
-                # 3) generate child
-                child = SuperqueensNode(parent=self, g=updated_g, queen_positions=updated_queens_positions, n=self.n)
-                children.append(child)
-
+        mirrored = self.break_symmetry and col == 0
+        for row in self._row_order(n):
+            if self._rows >> row & 1 or (mirrored and 2 * row > n - 1):
+                continue
+            shift = width * row
+            conflicts = ((diagonals >> shift) & mask) + ((anti_diagonals >> shift) & mask) + ((knights >> shift) & mask)
+            children.append(self._child(row, self.g + conflicts))
         return children
 
     def is_goal(self):
@@ -334,21 +1150,62 @@ class SuperqueensNode(Node):
             is_goal : bool
                 True if all the queens are placed on the board, False otherwise.
         """
-        # You should use self.queen_positions and self.n to decide.
-
-        return len(self.queen_positions) == self.n
+        return len(self._positions) == self.n
 
     def evaluate_heuristic(self):
         """Heuristic function h(n) that estimates the minimum number of conflicts required to reach the final state.
 
+        Every empty column will hold a queen on one of the free rows. If all the free rows of
+        a column are attacked by the queens already placed, that queen adds at least as many
+        attacking pairs as the least attacked free row. Pairs with the queens already placed
+        are counted in one column only, and pairs among the future queens are ignored, so
+        the sum over the empty columns never overestimates. Free rows that are attacked in
+        all the empty columns give a second bound, and the larger of the two is returned.
+
         Returns
         -------
             h : int or float
                 The heuristic value for this state.
         """
-        # If you want to design a heuristic for this problem, you should use self.queen_positions and self.n.
-        # TODO: add your code here (optional)
-        return 0
+        n = self.n
+        col = len(self._positions)
+        free = ~self._rows & ((1 << n) - 1)
+        if not free:
+            return 0
+        # Rows of the next two columns attacked by a knight jump from the last two queens.
+        knights = [0, 0]
+        for r, c in self._positions[-2:]:
+            for offset in (0, 1):
+                distance = 3 - (col + offset - c)
+                if distance in (1, 2):
+                    knights[offset] |= (1 << (r + distance)) | (1 << r >> distance)
+        h = 0
+        reachable = 0
+        for c in range(col, n):
+            attacked = (self._diagonal_bits >> (n - 1 - c)) | (self._anti_diagonal_bits >> c)
+            if c - col < 2:
+                attacked |= knights[c - col]
+            safe = free & ~attacked
+            if safe:
+                reachable |= safe
+            else:
+                h += min(self._conflicts(row, c) for row in range(n) if free >> row & 1)
+        # Symmetrically, every free row will hold one of the future queens, so a free row
+        # that is attacked in every empty column costs at least one pair too. The two
+        # bounds may count the same queen, hence the max.
+        return max(h, bin(free & ~reachable).count('1'))
+
+    def _conflicts(self, row, col):
+        """Returns the number of placed queens that attack (row, col), for an empty column col."""
+        width = self._width
+        mask = (1 << width) - 1
+        conflicts = ((self._diagonals >> (width * (row - col + self.n - 1))) & mask) + \
+            ((self._anti_diagonals >> (width * (row + col))) & mask)
+        for r, c in self._positions[-2:]:
+            dr, dc = abs(row - r), col - c
+            if (dr, dc) in ((1, 2), (2, 1)):
+                conflicts += 1
+        return conflicts
 
     def _get_state(self):
         """Returns an hashable representation of this search state.
@@ -358,8 +1215,11 @@ class SuperqueensNode(Node):
             state: tuple
                 The hashable representation of the search state
         """
-        # NOTE: You shouldn't modify this method.
-        return tuple(self.queen_positions)
+        return self._positions
+
+    def from_state(self, state, parent=None, g=0):
+        """Builds a node of the same board size and options from a tuple of queen positions."""
+        return type(self)(parent=parent, g=g, queen_positions=state, n=self.n, break_symmetry=self.break_symmetry)
 
     def __str__(self):
         """Returns the string representation of this node.
@@ -0,0 +1,176 @@
+"""Move pruning for the sliding puzzle, driven by a finite-state machine.
+
+A move is the direction the empty cell goes in: 'L', 'R', 'U' or 'D'. Two strings of
+moves are equivalent if, from any position where the longer one can be played, both
+leave the board in the same state. Any path that contains the longer string of such a
+pair can be shortened, so it is never part of an optimal path and can be cut as soon as
+its last move is generated, without looking the state up in a closed list.
+
+``find_duplicates`` enumerates the move strings up to a length, breadth-first, on a board
+large enough for the empty cell never to reach an edge, and records a string as a
+duplicate when it leads to a state already reached by a strictly shorter string whose
+cells it covers (so the shorter string can be played wherever the longer one can). The
+obvious pairs are the inverse moves ('LR' and the empty string, ...); the next ones are
+the cycles of the empty cell around a 2 x 2 block.
+
+``MovePruning`` compiles the duplicates into an Aho-Corasick automaton: a node carries
+the state of the automaton after its path, and a move is allowed when it does not lead
+to the end of a duplicate. Only strictly shorter equivalents are used, which keeps the
+pruning safe together with the duplicate detection of Astar (a path cut by the automaton
+is never the only optimal one), as well as in engines without a closed list (IDAstar).
+
+    >>> Node = PackedFifteensNode.with_move_pruning()
+    >>> path = IDAstar(Node(input_str=initial_state_str))
+"""
+
+import functools
+from collections import deque
+
+MOVES = 'LRUD'
+_STEPS = {'L': (0, -1), 'R': (0, 1), 'U': (-1, 0), 'D': (1, 0)}
+
+# The automaton state of a node that has no known move history, e.g. a root.
+START = 0
+
+
+def _play(moves):
+    """Plays a string of moves from (0, 0) on an unbounded board.
+
+    Returns
+    -------
+        state : tuple
+            The cell of the empty cell and the sorted (cell, origin) pairs of every tile
+            that is not on its starting cell.
+
+        cells : frozenset
+            The cells visited by the empty cell.
+    """
+    blank = (0, 0)
+    origin = {}
+    visited = {blank}
+    for move in moves:
+        dr, dc = _STEPS[move]
+        target = (blank[0] + dr, blank[1] + dc)
+        tile = origin.pop(target, target)
+        if tile != blank:
+            origin[blank] = tile
+        blank = target
+        visited.add(blank)
+    return (blank, tuple(sorted(origin.items()))), frozenset(visited)
+
+
+@functools.lru_cache(maxsize=None)
+def find_duplicates(depth):
+    """Lists the move strings of at most `depth` moves that have a strictly shorter
+    equivalent, keeping only the minimal ones (no proper substring is listed).
+
+    Parameters
+    ----------
+    depth : int
+        The length of the longest strings enumerated.
+
+    Returns
+    -------
+        duplicates : tuple of str
+            In breadth-first order.
+    """
+    reached = {}
+    duplicates = []
+    found = set()
+    layer = ['']
+    for length in range(depth + 1):
+        next_layer = []
+        for moves in layer:
+            # Strings ending with a duplicate found later in the previous layer.
+            if any(moves[i:] in found for i in range(1, length - 1)):
+                continue
+            state, cells = _play(moves)
+            known = reached.get(state)
+            if known is not None:
+                shorter, shorter_cells = known
+                if len(shorter) < length and shorter_cells <= cells:
+                    duplicates.append(moves)
+                    found.add(moves)
+                    continue
+            else:
+                reached[state] = (moves, cells)
+            if length < depth:
+                next_layer.extend(moves + move for move in MOVES
+                                  if not any((moves + move)[i:] in found for i in range(length)))
+        layer = next_layer
+    return tuple(duplicates)
+
+
+class MovePruning:
+    """The Aho-Corasick automaton of a set of duplicate move strings.
+
+    Parameters
+    ----------
+    duplicates : iterable of str
+        The move strings to cut.
+
+    Attributes
+    ----------
+    table : list of tuples
+        ``table[state][i]`` is the state after move ``MOVES[i]``, or -1 if the move ends a
+        duplicate and must be skipped.
+    """
+
+    def __init__(self, duplicates):
+        self.duplicates = tuple(duplicates)
+        children = [{}]
+        final = [False]
+        for duplicate in self.duplicates:
+            state = START
+            for move in duplicate:
+                if move not in children[state]:
+                    children.append({})
+                    final.append(False)
+                    children[state][move] = len(children) - 1
+                state = children[state][move]
+            final[state] = True
+        # Breadth-first over the trie: complete the transitions with the failure links.
+        table = [None] * len(children)
+        fail = [START] * len(children)
+        queue = deque([START])
+        while queue:
+            state = queue.popleft()
+            row = []
+            for move in MOVES:
+                child = children[state].get(move)
+                if child is None:
+                    row.append(table[fail[state]][MOVES.index(move)] if state != START else START)
+                    continue
+                fail[child] = table[fail[state]][MOVES.index(move)] if state != START else START
+                final[child] = final[child] or final[fail[child]]
+                queue.append(child)
+                row.append(child)
+            table[state] = row
+        self.table = [tuple(-1 if final[target] else target for target in row) for row in table]
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def for_depth(cls, depth):
+        """Returns the automaton of ``find_duplicates(depth)``, built once per depth."""
+        return cls(find_duplicates(depth))
+
+    def allowed(self, moves, state=START):
+        """Decides whether a string of moves survives the pruning from `state`."""
+        for move in moves:
+            state = self.table[state][MOVES.index(move)]
+            if state < 0:
+                return False
+        return True
+
+    def __len__(self):
+        return len(self.table)
+
+
+def move_index(blank, target, size):
+    """Returns the index in MOVES of the move of the empty cell from `blank` to `target`."""
+    step = target - blank
+    if step == -1:
+        return 0
+    if step == 1:
+        return 1
+    return 2 if step == -size else 3
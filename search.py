@@ -1,15 +1,125 @@
 """Implementation of the A* algorithm.
 
-This file contains a skeleton implementation of the A* algorithm. It is a single
-method that accepts the root node and runs the A* algorithm
-using that node's methods to generate children, evaluate heuristics, etc.
-This way, plugging in root nodes of different types, we can run this A* to
-solve different problems.
+This file contains the A* algorithm. It is a single method that accepts the root
+node and runs the A* algorithm using that node's methods to generate children,
+evaluate heuristics, etc. This way, plugging in root nodes of different types,
+we can run this A* to solve different problems.
+
+The open list and the closed table live in ``frontier.py``.
 
 """
 
+import copy
+import heapq
+import itertools
+import time
+
+from frontier import ClosedTable, make_frontier
+from node import Node
+
+
+class SearchStats:
+    """Counters filled in by a search.
+
+    Attributes
+    ----------
+    expanded : int
+        The number of nodes whose children were generated.
+
+    generated : int
+        The number of child nodes generated.
+
+    duplicates : int
+        The number of generated nodes dropped because their state had already been
+        reached at least as cheaply, including stale frontier entries dropped when popped.
+
+    reopened : int
+        The number of closed states that were reached again more cheaply and reopened.
+
+    max_frontier : int
+        The largest number of entries held by the frontier.
+
+    max_closed : int
+        The largest number of closed states.
+
+    f_progression : list of (f, expanded) pairs
+        Every time the f of the expanded nodes increases, the new f and the number
+        of nodes expanded before it.
+
+    time_successors : float
+        Seconds spent generating children, excluding their heuristic evaluation.
+        Only measured when the search runs with ``timing=True``.
+
+    time_heuristic : float
+        Seconds spent evaluating the heuristic. Only measured with ``timing=True``.
+
+    time_queue : float
+        Seconds spent pushing to and popping from the frontier. Only measured with ``timing=True``.
+
+    elapsed : float
+        The wall-clock duration of the search in seconds.
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.reopened = 0
+        self.max_frontier = 0
+        self.max_closed = 0
+        self.f_progression = []
+        self.time_successors = 0.0
+        self.time_heuristic = 0.0
+        self.time_queue = 0.0
+        self.elapsed = 0.0
 
-def Astar(root):
+    def as_dict(self):
+        """Returns the counters as a JSON-serializable dict."""
+        return dict(vars(self))
+
+    def __repr__(self):
+        return 'SearchStats(%s)' % ', '.join('%s=%r' % item for item in vars(self).items())
+
+
+class SearchLimitReached(Exception):
+    """Raised when a search exceeds its expansion or time limit before it finishes.
+
+    Attributes
+    ----------
+    stats : SearchStats or None
+        The counters of the interrupted search.
+    """
+
+    def __init__(self, message, stats=None):
+        super(SearchLimitReached, self).__init__(message)
+        self.stats = stats
+
+
+def _timed_copy(root, stats):
+    """Returns a copy of `root` whose class is a subclass of its own, with the same name,
+    that adds the run time of ``evaluate_heuristic`` to ``stats``. The children inherit
+    the subclass, so only the nodes of this search are timed and the class of the root
+    is left untouched.
+    """
+    node_class = type(root)
+    evaluate = node_class.evaluate_heuristic
+    clock = time.perf_counter
+
+    def evaluate_heuristic(self):
+        start = clock()
+        try:
+            return evaluate(self)
+        finally:
+            stats.time_heuristic += clock() - start
+
+    timed = copy.copy(root)
+    timed.__class__ = type(node_class.__name__, (node_class,),
+                           {'__slots__': (), 'evaluate_heuristic': evaluate_heuristic})
+    return timed
+
+
+def Astar(root, frontier='heap', tie_break='fifo', stats=None, max_expansions=None, time_limit=None,
+          return_stats=False, timing=False, on_expand=None, on_generate=None, on_goal=None, cache=None):
     """Runs the A* algorithm given the root node. The class of the root node
     defines the problem that's being solved. The algorithm either returns the solution
     as a path from the start node to the goal node or returns None if there's no solution.
@@ -19,44 +129,667 @@ def Astar(root):
     root: Node
         The start node of the problem to be solved.
 
+    frontier: str, optional
+        The frontier backend: 'heap' (any costs) or 'bucket' (non-negative integer f only).
+        Default is 'heap'.
+
+    tie_break: str, optional
+        Which node to expand among the nodes with the smallest f:
+        'fifo', 'lifo', 'high-g' or 'low-g'. Default is 'fifo'.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    return_stats: bool, optional
+        If True, returns a ``(path, stats)`` pair instead of the path alone. Default is False.
+
+    timing: bool, optional
+        If True, measures the time spent in successor generation, heuristic evaluation
+        and frontier operations. The heuristic is timed by searching from a copy of the
+        root whose class is a subclass with a timed ``evaluate_heuristic``; the nodes of the
+        path are given back the root's class. Default is False.
+
+    on_expand, on_generate, on_goal: callable, optional
+        Called with the node about to be expanded, with every generated child, and with
+        the goal node once it is found.
+
+    cache: cache.SolutionCache, optional
+        If given, a cached solution of the root is returned without searching, a node
+        whose state is cached goes back into the frontier with its exact f and completes
+        the path from the cache when it is popped, and the solution found is stored.
+
     Returns
     -------
         path: list of Nodes or None
             The solution, a path from the initial node to the goal node.
             If there is no solution it should return None
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
     """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    exact = {}
+    if cache is not None:
+        path = cache.lookup(root)
+        if path is None:
+            exact = cache.exact_costs(root)
+        else:
+            stats.elapsed = clock() - start
+            return (path, stats) if return_stats else path
+    node_class = type(root)
+    if timing:
+        root = _timed_copy(root, stats)
+    # The nodes pushed back with their exact f, by state.
+    completed = {}
+    fringe = make_frontier(frontier, tie_break)
+    table = ClosedTable()
+    table.offer(root)
+    fringe.push(root)
+    f_bound = None
+    path = None
+    try:
+        while fringe:
+            if len(fringe) > stats.max_frontier:
+                stats.max_frontier = len(fringe)
+            if timing:
+                t = clock()
+                node = fringe.pop()
+                stats.time_queue += clock() - t
+            else:
+                node = fringe.pop()
+            if table.is_stale(node):
+                stats.duplicates += 1
+                continue
+            if f_bound is None or node.f > f_bound:
+                f_bound = node.f
+                stats.f_progression.append((f_bound, stats.expanded))
+            if exact and node.state in exact and not node.is_goal():
+                if completed.get(node.state) is node:
+                    path = cache.complete(node)
+                    if path is not None:
+                        cache.count_partial_hit()
+                        if on_goal is not None:
+                            on_goal(path[-1])
+                        break
+                    # Evicted meanwhile: expand the node as any other.
+                    del exact[node.state]
+                else:
+                    node.f = node.g + exact[node.state]
+                    completed[node.state] = node
+                    fringe.push(node)
+                    continue
+            if node.is_goal():
+                if on_goal is not None:
+                    on_goal(node)
+                path = node.get_path()
+                break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            if on_expand is not None:
+                on_expand(node)
+            table.close(node)
+            if len(table) > stats.max_closed:
+                stats.max_closed = len(table)
+            stats.expanded += 1
+            if timing:
+                t = clock()
+                heuristic_before = stats.time_heuristic
+                children = node.generate_children()
+                stats.time_successors += clock() - t - (stats.time_heuristic - heuristic_before)
+            else:
+                children = node.generate_children()
+            for child in children:
+                stats.generated += 1
+                if on_generate is not None:
+                    on_generate(child)
+                if table.offer(child):
+                    if timing:
+                        t = clock()
+                        fringe.push(child)
+                        stats.time_queue += clock() - t
+                    else:
+                        fringe.push(child)
+                else:
+                    stats.duplicates += 1
+    finally:
+        stats.reopened = table.reopened
+        stats.elapsed = clock() - start
+    if timing and path is not None:
+        for node in path:
+            node.__class__ = node_class
+    if cache is not None and path is not None:
+        cache.store(path)
+    if return_stats:
+        return path, stats
+    return path
 
-    # TODO: add your code here
-    # Some helper pseudo-code:
-    # 1. Create an empty fringe and add your root node (you can use lists, sets, heaps, ... )
-    # 2. While the container is not empty:
-    # 3.      Pop the best? node (Use the attribute `node.f` in comparison)
-    # 4.      If that's a goal node, return node.get_path()
-    # 5.      Otherwise, add the children of the node to the fringe
-    # 6. Return None
-
-    fringe = [root]
-    visited = []
-    while fringe:
-        min = 0
-        for i in range(len(fringe)):
-            if fringe[i].f < fringe[min].f:
-                min = i
-        exploreNode = fringe.pop(min)
-        if exploreNode._get_state() not in visited:
-            visited.append(exploreNode._get_state())
-            if exploreNode.is_goal():
-                return exploreNode.get_path()
+
+class _Requeued:
+    """A frontier entry for a partially expanded node, ordered by its next stored f."""
+
+    __slots__ = ('node', 'f', 'g', 'state')
+
+    def __init__(self, node, f):
+        self.node = node
+        self.f = f
+        self.g = node.g
+        self.state = node.state
+
+
+def PEAstar(root, frontier='heap', tie_break='fifo', stats=None, max_expansions=None, time_limit=None):
+    """Runs partial-expansion A* given the root node.
+
+    Expanding a node asks it for its ``successors``, the moves with the change of f they
+    cause, and only builds (with ``make_child``) and stores the children whose f equals
+    the node's stored value F, initially its f. If other children have a larger f, the
+    node goes back into the frontier with F set to the smallest of them, to be expanded
+    again when no better node is left; otherwise it is closed. Children whose f exceeds
+    the cost of the solution are never built, and the frontier only holds nodes that are
+    likely to be expanded. The path returned is as short as Astar's.
+
+    Nodes whose class implements ``successors`` cheaply (PackedFifteensNode, and
+    FifteensNode and SlidingPuzzleNode with their default heuristic) save the allocations.
+    The others still save frontier memory, but the default ``successors`` builds all the
+    children at every partial expansion, so they are all counted and a node expanded
+    several times costs more than in Astar.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    frontier, tie_break, stats, max_expansions, time_limit: optional
+        As for Astar. ``stats.expanded`` counts every partial expansion and
+        ``stats.generated`` the children actually built, by ``successors`` or by
+        ``make_child``.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    fringe = make_frontier(frontier, tie_break)
+    table = ClosedTable()
+    table.offer(root)
+    fringe.push(root)
+    path = None
+    try:
+        while fringe:
+            if len(fringe) > stats.max_frontier:
+                stats.max_frontier = len(fringe)
+            entry = fringe.pop()
+            if type(entry) is _Requeued:
+                node, stored = entry.node, entry.f
+            else:
+                node, stored = entry, entry.f
+            if table.is_stale(node):
+                stats.duplicates += 1
+                continue
+            if node.is_goal():
+                path = node.get_path()
+                break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            stats.expanded += 1
+            # On the first expansion, children below f (inconsistent heuristics) are kept too;
+            # later expansions only take the children of the stored value.
+            first = stored == node.f
+            next_f = None
+            successors = node.successors()
+            # The default successors are the children themselves, all built before any is kept.
+            prebuilt = bool(successors) and isinstance(successors[0][0], Node)
+            if prebuilt:
+                stats.generated += len(successors)
+            for move, delta_f in successors:
+                f = node.f + delta_f
+                if f > stored:
+                    if next_f is None or f < next_f:
+                        next_f = f
+                    continue
+                if f < stored and not first:
+                    continue
+                child = node.make_child(move)
+                if not prebuilt:
+                    stats.generated += 1
+                if table.offer(child):
+                    fringe.push(child)
+                else:
+                    stats.duplicates += 1
+            if next_f is None:
+                table.close(node)
+                if len(table) > stats.max_closed:
+                    stats.max_closed = len(table)
             else:
-                fringe.extend(exploreNode.generate_children())
-    return None
+                fringe.push(_Requeued(node, next_f))
+    finally:
+        stats.reopened = table.reopened
+        stats.elapsed = clock() - start
+    return path
+
+
+class MemoryBoundedStats(SearchStats):
+    """The counters of a memory-bounded search.
+
+    Attributes
+    ----------
+    forgotten : int
+        The nodes dropped to stay within the memory bound.
+
+    regenerated : int
+        The nodes generated again after they were dropped; ``generated`` includes them.
+    """
 
+    def __init__(self):
+        super(MemoryBoundedStats, self).__init__()
+        self.forgotten = 0
+        self.regenerated = 0
 
 
+class _Held:
+    """A node held by SMAstar, with its backed-up f and its children in memory."""
+
+    __slots__ = ('node', 'parent', 'f', 'depth', 'children', 'forgotten', 'forgotten_f', 'expanded', 'open_key',
+                 'alive')
+
+    def __init__(self, node, parent, f):
+        self.node = node
+        self.parent = parent
+        self.f = f
+        self.depth = 1 if parent is None else parent.depth + 1
+        self.children = []
+        # The backed-up f of the dropped children, by state, and the smallest of them.
+        self.forgotten = None
+        self.forgotten_f = _INFINITY
+        self.expanded = False
+        self.open_key = None
+        self.alive = True
+
+
+_INFINITY = float('inf')
+
+
+def SMAstar(root, max_nodes, stats=None, max_expansions=None, time_limit=None):
+    """Runs simplified memory-bounded A* (SMA*) given the root node.
+
+    The search holds at most `max_nodes` nodes between two expansions (an expansion adds
+    its children before the worst leaves are dropped), as a tree of the nodes generated
+    from the root. It expands the leaf of smallest f, the deepest first. When memory is full, it
+    drops the worst leaf (the largest f, the shallowest first), and its parent remembers
+    the leaf's state and f. Once the smallest f of a node's forgotten children is the
+    smallest f of the tree, they are rebuilt with ``Node.regenerate_children`` and get their
+    remembered f back. The f of every expanded node is backed up to the smallest f of its
+    children, held or forgotten. So the search never loses track of a subtree's lower
+    bound, and it regenerates a subtree only when it becomes the most promising one. The
+    bound counts the nodes; the remembered (state, f) pairs of the forgotten children come
+    on top of it.
+
+    Within the bound the solution is optimal with an admissible heuristic, as with Astar.
+    A child whose state is held with a g at most as large is skipped. A node whose path
+    takes `max_nodes` nodes is not expanded. If that cut every solution, the search raises
+    SearchLimitReached instead of returning None, because it cannot tell that there is no
+    solution.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    max_nodes: int
+        The largest number of nodes held at once, at least 2.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search; a MemoryBoundedStats
+        also counts the forgotten and regenerated nodes. ``max_frontier`` is the largest
+        number of nodes held.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes, regenerations included.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded, or if the solutions need more than
+        `max_nodes` nodes.
+    """
+    if max_nodes < 2:
+        raise ValueError('max_nodes must be at least 2')
+    if stats is None:
+        stats = MemoryBoundedStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    counter = itertools.count()
+    # The nodes to expand, by (f, -depth), and the leaves to drop, by (-f, depth).
+    fringe = []
+    leaves = []
+    held = {}
+    size = 1
+    forgotten = regenerated = 0
+    cut = False
+
+    def schedule(entry, key):
+        entry.open_key = key
+        heapq.heappush(fringe, (key, -entry.depth, next(counter), entry))
+
+    def mark_leaf(entry):
+        if entry.parent is not None:
+            heapq.heappush(leaves, (-entry.f, entry.depth, next(counter), entry))
+
+    top = _Held(root, None, root.f)
+    held[root.state] = top
+    schedule(top, root.f)
+    path = None
+    try:
+        while fringe:
+            key, _, _, entry = heapq.heappop(fringe)
+            if not entry.alive or key != entry.open_key:
+                continue
+            if key == _INFINITY:
+                break
+            entry.open_key = None
+            node = entry.node
+            if not entry.expanded and node.is_goal():
+                path = node.get_path()
+                break
+            if max_expansions is not None and stats.expanded >= max_expansions:
+                raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            stats.expanded += 1
+            if entry.depth >= max_nodes:
+                # No room for a child next to the path: this node is a dead end here.
+                cut = True
+                children = []
+            elif entry.expanded:
+                children = node.regenerate_children({state for state, f in entry.forgotten.items() if f < _INFINITY})
+                regenerated += len(children)
+            else:
+                children = node.generate_children()
+            # A new child's f is at least its parent's; a regenerated one gets its f back.
+            remembered = entry.forgotten if entry.expanded else None
+            entry.expanded = True
+            best = None
+            for child in children:
+                stats.generated += 1
+                f = entry.f if remembered is None else remembered.pop(child.state, child.f)
+                known = held.get(child.state)
+                if known is not None and known.node.g <= child.g:
+                    stats.duplicates += 1
+                    continue
+                added = held[child.state] = _Held(child, entry, max(child.f, f))
+                entry.children.append(added)
+                size += 1
+                schedule(added, added.f)
+                mark_leaf(added)
+                if best is None or added.f < best.f:
+                    best = added
+            # The forgotten children left are dead ends.
+            entry.forgotten_f = _INFINITY
+            if not entry.children:
+                mark_leaf(entry)
+            # Back the f values up towards the root.
+            backed = entry
+            while backed is not None:
+                f = min([child.f for child in backed.children] + [backed.forgotten_f])
+                if f <= backed.f:
+                    break
+                backed.f = f
+                if not backed.children:
+                    mark_leaf(backed)
+                backed = backed.parent
+            # Drop the worst leaves, but not the best new child, which is expanded next.
+            spared = []
+            while size > max_nodes:
+                item = heapq.heappop(leaves)
+                f, depth, _, leaf = item
+                if not leaf.alive or leaf.children or -f != leaf.f:
+                    continue
+                if leaf is best:
+                    spared.append(item)
+                    continue
+                leaf.alive = False
+                parent = leaf.parent
+                parent.children.remove(leaf)
+                if held.get(leaf.node.state) is leaf:
+                    del held[leaf.node.state]
+                size -= 1
+                forgotten += 1
+                if parent.forgotten is None:
+                    parent.forgotten = {}
+                parent.forgotten[leaf.node.state] = leaf.f
+                if leaf.f < parent.forgotten_f:
+                    parent.forgotten_f = leaf.f
+                    schedule(parent, leaf.f)
+                if not parent.children:
+                    mark_leaf(parent)
+            for item in spared:
+                heapq.heappush(leaves, item)
+            if size > stats.max_frontier:
+                stats.max_frontier = size
+    finally:
+        if isinstance(stats, MemoryBoundedStats):
+            stats.forgotten = forgotten
+            stats.regenerated = regenerated
+        stats.elapsed = clock() - start
+    if path is None and cut:
+        raise SearchLimitReached('no solution fits in %d nodes' % max_nodes, stats)
+    return path
+
+
+def IDAstar(root, report=None):
+    """Runs the iterative-deepening A* algorithm given the root node.
+
+    Each iteration is a depth-first search that prunes nodes whose f exceeds the
+    current threshold; the next threshold is the smallest f that was pruned. Only the
+    current path and the children of the nodes on it are kept in memory. A child that
+    returns to the state of its grandparent is skipped.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    report: list, optional
+        If given, a ``(threshold, expanded)`` pair is appended to it for every iteration,
+        where ``expanded`` is the number of nodes expanded with that f-threshold.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node.
+            If there is no solution it returns None
+    """
+    threshold = root.f
+    while True:
+        expanded = 0
+        next_threshold = None
+        stack = [iter([root])]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            if node.f > threshold:
+                if next_threshold is None or node.f < next_threshold:
+                    next_threshold = node.f
+                continue
+            if node.is_goal():
+                if report is not None:
+                    report.append((threshold, expanded))
+                return node.get_path()
+            expanded += 1
+            parent = node.parent
+            children = node.generate_children()
+            if parent is not None:
+                children = [child for child in children if child.state != parent.state]
+            stack.append(iter(children))
+        if report is not None:
+            report.append((threshold, expanded))
+        if next_threshold is None:
+            return None
+        threshold = next_threshold
+
+
+class AnytimeSolution:
+    """A solution published by ARAstar.
+
+    Attributes
+    ----------
+    path : list of Nodes
+        The path from the root to a goal node.
+
+    cost : int or float
+        The cost of the path, i.e. the g of its last node.
+
+    bound : float
+        The suboptimality bound: the cost is at most ``bound`` times the optimal cost.
+        It is 1 once the solution is proven optimal.
+
+    weight : float
+        The heuristic weight of the iteration that published the solution.
+
+    expanded : int
+        The number of nodes expanded by the search so far.
+
+    elapsed : float
+        The seconds since the search started.
+    """
+
+    def __init__(self, path, bound, weight, expanded, elapsed):
+        self.path = path
+        self.cost = path[-1].g
+        self.bound = bound
+        self.weight = weight
+        self.expanded = expanded
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return 'AnytimeSolution(cost=%r, bound=%r, weight=%r, expanded=%r, elapsed=%r)' % (
+            self.cost, self.bound, self.weight, self.expanded, self.elapsed)
+
+
+def ARAstar(root, weights=(5, 3, 2, 1.5, 1), max_expansions=None, time_limit=None):
+    """Runs the anytime repairing A* algorithm (ARA*) given the root node.
+
+    The search orders the frontier by g + w*h, starting with a large weight w so that a
+    first solution is found quickly, then repeats with every smaller weight. Each repetition
+    reuses the g values and the frontier of the previous ones: only the nodes whose g
+    improved since they were expanded are expanded again. It is a generator: every time the
+    solution or its suboptimality bound improves, an AnytimeSolution is yielded, and it
+    returns once the last weight is done or when the expansion or time budget runs out.
+
+    Parameters
+    ----------
+    root: Node
+        The start node of the problem to be solved.
+
+    weights: sequence of float, optional
+        The decreasing heuristic weights, all >= 1. The last one should be 1 for the search
+        to end with an optimal solution. Default is (5, 3, 2, 1.5, 1).
+
+    max_expansions: int, optional
+        Stops after expanding this many nodes.
+
+    time_limit: float, optional
+        Stops after running for this many seconds.
+
+    Returns
+    -------
+        solutions: iterator of AnytimeSolution
+            The solutions, with decreasing costs or bounds. Nothing is yielded if there is
+            no solution or none was found within the budget.
+    """
+    weights = list(weights)
+    if not weights or min(weights) < 1 or weights != sorted(weights, reverse=True):
+        raise ValueError('weights must be a non-empty decreasing sequence of values >= 1')
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    counter = itertools.count()
+    best = {root.state: root}
+    incumbent = root if root.is_goal() else None
+    published = None
+    expanded = 0
+    inconsistent = {root.state: root}
+    for weight in weights:
+        def key(node):
+            return node.g + weight * (node.f - node.g)
 
-    #
-    # Some notes:
-    # You can access the state of a node by `node.state`. (You may also want to store evaluated states)
-    # You should consider the states evaluated and the ones in the fringe to avoid repeated calculation in 5. above.
-    # You can compare two node states by node1.state == node2.state
-    pass
+        fringe = [(key(node), next(counter), node) for node in inconsistent.values()]
+        heapq.heapify(fringe)
+        inconsistent = {}
+        closed = set()
+        while fringe and (incumbent is None or fringe[0][0] < incumbent.g):
+            _, _, node = heapq.heappop(fringe)
+            if node.state in closed or best[node.state] is not node:
+                continue
+            if (max_expansions is not None and expanded >= max_expansions) or \
+                    (deadline is not None and clock() > deadline):
+                return
+            closed.add(node.state)
+            expanded += 1
+            for child in node.generate_children():
+                known = best.get(child.state)
+                if known is not None and known.g <= child.g:
+                    continue
+                best[child.state] = child
+                if child.is_goal() and (incumbent is None or child.g < incumbent.g):
+                    incumbent = child
+                if child.state in closed:
+                    inconsistent[child.state] = child
+                else:
+                    heapq.heappush(fringe, (key(child), next(counter), child))
+        # Carry the unexpanded nodes over to the next weight.
+        for _, _, node in fringe:
+            if node.state not in closed and best[node.state] is node:
+                inconsistent[node.state] = node
+        if incumbent is None:
+            if not inconsistent:
+                return
+            continue
+        lower = min((node.f for node in inconsistent.values()), default=incumbent.g)
+        if lower >= incumbent.g:
+            bound = 1.0
+        elif lower > 0:
+            bound = min(weight, incumbent.g / lower)
+        else:
+            bound = weight
+        if published is None or incumbent.g < published.cost or bound < published.bound:
+            published = AnytimeSolution(incumbent.get_path(), bound, weight, expanded, clock() - start)
+            yield published
+        if bound == 1.0:
+            return
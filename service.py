@@ -0,0 +1,438 @@
+"""Asyncio solver service.
+
+``SolverService`` accepts solve jobs, in the instance format of solve.py, and runs them on
+a fixed number of worker processes, one search per process at a time. It is served as
+JSON lines over stdin/stdout, a Unix socket or a local TCP port::
+
+    python service.py --workers 4 --max-queue 100 --socket /tmp/solver.sock
+
+Every line a client sends is a request:
+
+* ``{"id": "a", "problem": "fifteens", "board": "...", "deadline": 10}`` solves an
+  instance (``"op": "solve"`` is the default); ``deadline`` is in seconds from now, and
+  ``max_expansions`` bounds the search;
+* ``{"op": "cancel", "id": "a"}`` cancels request "a", queued or running;
+* ``{"op": "stats"}`` returns the counters of the service.
+
+Every solve request gets exactly one answer line, with its id: the result of
+``solve.solve_instance`` plus ``queue_wait`` and ``run_time``, the seconds the request
+waited for a worker and the seconds its search ran. The status is one of the statuses of
+solve.py, 'cancelled', or 'rejected' when the queue is full. A cancel gets an
+acknowledgement line saying whether the request was found.
+
+Identical concurrent requests (the same problem, root ``_get_state()`` and expansion
+limit) are coalesced into one search whose result is sent to all of them, marked
+``"coalesced": true`` for the requests that joined an existing search. A search is
+cancelled once none of its requests waits for it any more, because they were cancelled
+or their deadline passed: a running search is stopped by killing its worker process,
+which is replaced by a new one. The search itself gets the latest deadline of its
+requests as its time limit when it starts, so a request only joins a running search
+whose time limit does not end before its own deadline; otherwise it gets a new search.
+
+Admission control counts the searches waiting for a worker: a request that needs a new
+search while ``max_queue`` of them wait is rejected at once.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+
+from cache import namespace
+from solve import make_root, solve_instance
+
+# The result fields of a request that never reached a search.
+_EMPTY = {'expanded': 0, 'generated': 0, 'seconds': 0.0}
+
+
+def _serve(connection, cache_path):
+    """The loop of a worker process: solves the instances it receives until None."""
+    while True:
+        job = connection.recv()
+        if job is None:
+            return
+        instance, max_expansions, time_limit = job
+        connection.send(solve_instance(instance, max_expansions, time_limit, cache_path))
+
+
+class _WorkerProcess:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.process = None
+        self.connection = None
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context()
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, self.cache_path), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    async def run(self, instance, max_expansions, time_limit):
+        """Solves an instance on the process. If the call is cancelled, the process is
+        killed and replaced.
+        """
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self.connection.fileno()
+        try:
+            self.connection.send((instance, max_expansions, time_limit))
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+            try:
+                await readable
+            finally:
+                loop.remove_reader(fd)
+            return self.connection.recv()
+        except asyncio.CancelledError:
+            self.kill()
+            self.start()
+            raise
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class _Request:
+    """One solve request waiting for the result of a search."""
+
+    def __init__(self, client, rid, deadline, coalesced, loop):
+        self.client = client
+        self.id = rid
+        self.submitted = loop.time()
+        self.deadline = None if deadline is None else self.submitted + deadline
+        self.coalesced = coalesced
+        self.future = loop.create_future()
+        self.timer = None
+
+
+class _Job:
+    """One search, shared by the requests that wait for it."""
+
+    def __init__(self, key, instance, max_expansions):
+        self.key = key
+        self.instance = instance
+        self.max_expansions = max_expansions
+        self.requests = []
+        self.started = None
+        # The loop time at which the running search gives up, or None if it has no limit.
+        self.until = None
+        self.runner = None
+        self.cancelled = False
+
+    def admits(self, deadline):
+        """Returns whether a request with this absolute deadline (None for none) can wait
+        for the search: always before it starts, and afterwards only if the search's time
+        limit does not end before the deadline.
+        """
+        if self.started is None or self.until is None:
+            return True
+        return deadline is not None and deadline <= self.until
+
+    def time_limit(self, now):
+        """Returns the seconds until the latest deadline of the requests, or None."""
+        deadlines = [request.deadline for request in self.requests]
+        if not deadlines or None in deadlines:
+            return None
+        return max(0.0, max(deadlines) - now)
+
+
+class SolverService:
+    """Runs solve jobs on a bounded pool of worker processes.
+
+    Parameters
+    ----------
+    workers : int, optional
+        The number of worker processes. Default is the number of CPUs.
+
+    max_queue : int, optional
+        The number of searches that may wait for a worker. Default is 64.
+
+    max_expansions : int, optional
+        The expansion limit of requests that do not set one.
+
+    time_limit : float, optional
+        The deadline of requests that do not set one, in seconds.
+
+    cache_path : str, optional
+        The SQLite file of a SolutionCache shared by the workers (see cache.py).
+    """
+
+    def __init__(self, workers=None, max_queue=64, max_expansions=None, time_limit=None, cache_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.max_expansions = max_expansions
+        self.time_limit = time_limit
+        self.cache_path = cache_path
+        self.counters = {'submitted': 0, 'searches': 0, 'coalesced': 0, 'rejected': 0, 'cancelled': 0,
+                         'completed': 0}
+        self._jobs = {}
+        self._requests = {}
+        self._queue = None
+        self._queued = 0
+        self._tasks = []
+        self._processes = []
+
+    async def start(self):
+        """Starts the worker processes."""
+        self._queue = asyncio.Queue()
+        self._processes = [_WorkerProcess(self.cache_path) for _ in range(self.workers)]
+        self._tasks = [asyncio.ensure_future(self._work(process)) for process in self._processes]
+
+    async def close(self):
+        """Cancels every request and stops the worker processes."""
+        for key in list(self._requests):
+            self.cancel(*key)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for process in self._processes:
+            process.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def stats(self):
+        """Returns the counters, the searches waiting for a worker and the running ones."""
+        running = sum(1 for job in self._jobs.values() if job.started is not None)
+        return dict(self.counters, queued=self._queued, running=running)
+
+    async def submit(self, instance, client=None):
+        """Solves an instance, sharing the search of an identical pending request, and
+        returns its result. Request ids must be unique per client among pending requests.
+        """
+        loop = asyncio.get_running_loop()
+        rid = instance.get('id')
+        self.counters['submitted'] += 1
+        if (client, rid) in self._requests:
+            return dict(_EMPTY, id=rid, status='error', message='request %r is already pending' % (rid,),
+                        queue_wait=0.0, run_time=0.0)
+        try:
+            root = make_root(instance)
+        except Exception as e:
+            return dict(_EMPTY, id=rid, status='error', message='%s: %s' % (type(e).__name__, e),
+                        queue_wait=0.0, run_time=0.0)
+        max_expansions = instance.get('max_expansions', self.max_expansions)
+        deadline = instance.get('deadline', self.time_limit)
+        key = (instance.get('problem', 'fifteens'), namespace(root), root.state, max_expansions)
+        job = self._jobs.get(key)
+        if job is None or not job.admits(None if deadline is None else loop.time() + deadline):
+            if self._queued >= self.max_queue:
+                self.counters['rejected'] += 1
+                return dict(_EMPTY, id=rid, status='rejected', message='queue full (%d searches)' % self._queued,
+                            queue_wait=0.0, run_time=0.0)
+            job = self._jobs[key] = _Job(key, instance, max_expansions)
+            self._queue.put_nowait(job)
+            self._queued += 1
+            self.counters['searches'] += 1
+        else:
+            self.counters['coalesced'] += 1
+        request = _Request(client, rid, deadline, bool(job.requests), loop)
+        job.requests.append(request)
+        self._requests[(client, rid)] = (job, request)
+        if request.deadline is not None:
+            request.timer = loop.call_at(request.deadline, self._expire, job, request)
+        return await request.future
+
+    def cancel(self, rid, client=None):
+        """Cancels a pending request; returns False if there is none with that id."""
+        pending = self._requests.get((client, rid))
+        if pending is None:
+            return False
+        job, request = pending
+        self.counters['cancelled'] += 1
+        self._answer(job, request, {'status': 'cancelled'})
+        self._detach(job, request)
+        return True
+
+    def _expire(self, job, request):
+        self._answer(job, request, {'status': 'limit', 'message': 'deadline reached'})
+        self._detach(job, request)
+
+    def _answer(self, job, request, result):
+        if request.future.done():
+            return
+        now = asyncio.get_running_loop().time()
+        started = now if job.started is None else max(job.started, request.submitted)
+        result = dict(_EMPTY, **result)
+        result.update(id=request.id, queue_wait=round(started - request.submitted, 6),
+                      run_time=round(now - started, 6))
+        if request.coalesced:
+            result['coalesced'] = True
+        request.future.set_result(result)
+
+    def _detach(self, job, request):
+        """Forgets a request, and cancels its search if no other request waits for it."""
+        if request.timer is not None:
+            request.timer.cancel()
+        del self._requests[(request.client, request.id)]
+        job.requests.remove(request)
+        if job.requests or job.cancelled:
+            return
+        job.cancelled = True
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        if job.started is None:
+            self._queued -= 1
+        elif job.runner is not None:
+            job.runner.cancel()
+
+    async def _work(self, process):
+        """Runs the queued searches on one worker process."""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            if job.cancelled:
+                continue
+            self._queued -= 1
+            job.started = loop.time()
+            time_limit = job.time_limit(job.started)
+            if time_limit is not None:
+                job.until = job.started + time_limit
+            job.runner = asyncio.ensure_future(process.run(job.instance, job.max_expansions, time_limit))
+            try:
+                result = await job.runner
+            except asyncio.CancelledError:
+                if not job.cancelled:
+                    job.runner.cancel()
+                    raise
+                continue
+            except (EOFError, OSError) as e:
+                process.kill()
+                process.start()
+                result = {'status': 'error', 'message': 'worker failed: %s: %s' % (type(e).__name__, e)}
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            result.pop('id', None)
+            self.counters['completed'] += 1
+            for request in job.requests:
+                self._answer(job, request, result)
+                if request.timer is not None:
+                    request.timer.cancel()
+                del self._requests[(request.client, request.id)]
+            job.requests = []
+
+    async def handle(self, reader, writer, client=None, cancel_on_close=True):
+        """Serves one JSON-lines connection until the end of its input.
+
+        When the input ends, the pending requests of the connection are cancelled if
+        `cancel_on_close`, or else answered before returning.
+        """
+        if client is None:
+            client = object()
+        pending = set()
+
+        def send(message):
+            writer.write((json.dumps(message) + '\n').encode())
+
+        async def respond(request):
+            send(await self.submit(request, client))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('expected a JSON object')
+            except ValueError as e:
+                send({'status': 'error', 'message': 'bad request: %s' % e})
+                continue
+            op = request.pop('op', 'solve')
+            if op == 'solve':
+                task = asyncio.ensure_future(respond(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            elif op == 'cancel':
+                send({'op': 'cancel', 'id': request.get('id'), 'cancelled': self.cancel(request.get('id'), client)})
+            elif op == 'stats':
+                send(dict(self.stats(), op='stats'))
+            else:
+                send({'id': request.get('id'), 'status': 'error', 'message': 'unknown op %r' % (op,)})
+            await writer.drain()
+        if cancel_on_close:
+            for owner, rid in [key for key in self._requests if key[0] is client]:
+                self.cancel(rid, client)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await writer.drain()
+
+
+async def _stdio_streams():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    return reader, writer
+
+
+async def serve(service, socket_path=None, port=None):
+    """Serves the service on a Unix socket, a local TCP port, or else stdin/stdout until
+    the end of the input.
+    """
+    async with service:
+        if socket_path is None and port is None:
+            reader, writer = await _stdio_streams()
+            await service.handle(reader, writer, cancel_on_close=False)
+            return
+
+        async def connection(reader, writer):
+            try:
+                await service.handle(reader, writer)
+            finally:
+                writer.close()
+
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(connection, path=socket_path)
+        else:
+            server = await asyncio.start_server(connection, host='127.0.0.1', port=port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the puzzle solver over JSON lines.')
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument('--socket', default=None, help='Unix socket path (default: stdin/stdout)')
+    where.add_argument('--port', type=int, default=None, help='TCP port on 127.0.0.1')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    parser.add_argument('--max-queue', type=int, default=64,
+                        help='searches that may wait for a worker before requests are rejected (default: 64)')
+    parser.add_argument('--max-expansions', type=int, default=None, help='default node limit per request')
+    parser.add_argument('--time-limit', type=float, default=None, help='default deadline per request, in seconds')
+    parser.add_argument('--cache', default=None, help='SQLite file of the solution cache shared by the workers')
+    args = parser.parse_args(argv)
+    service = SolverService(args.workers, args.max_queue, args.max_expansions, args.time_limit, args.cache)
+    try:
+        asyncio.run(serve(service, args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
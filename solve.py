@@ -0,0 +1,216 @@
+"""Command-line batch solver.
+
+Reads puzzle instances as a stream, solves them on a pool of worker processes and
+writes one JSON result per line as soon as each instance is finished (so results come
+out in completion order, not input order)::
+
+    python solve.py instances.jsonl --workers 8 --time-limit 30 > results.jsonl
+
+Two input formats are accepted:
+
+* ``jsonl`` -- one JSON object per line, e.g.
+  ``{"id": "a", "problem": "fifteens", "board": "1 2 3 4\\n5 6 7 8\\n9 10 0 11\\n13 14 15 12"}``
+  or ``{"id": "b", "problem": "superqueens", "n": 7}``. ``board`` may also be a list of rows,
+  and superqueens instances accept ``"break_symmetry": true``. ``"problem": "sliding"``
+  takes a board of any N x N size (8 puzzle, 24 puzzle...).
+* ``text`` -- FifteensNode ``input_str`` boards separated by blank lines.
+
+With ``--cache solutions.sqlite`` the workers share a persistent SolutionCache (see
+cache.py): repeated instances are answered from it, and searches stop early at states of
+earlier solutions.
+
+Every result holds the instance id, a status ('solved', 'no_solution', 'limit' or
+'error'), the solution moves and cost, the number of expanded and generated nodes and
+the solve time in seconds. Fifteens moves are the directions the empty cell moves in
+('L', 'R', 'U', 'D'); superqueens moves are the rows of the queens, column by column.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cache import SolutionCache
+from problems import PackedFifteensNode, SlidingPuzzleNode, SuperqueensNode, UnsolvableError
+from search import Astar, SearchLimitReached, SearchStats
+
+PROBLEMS = ('fifteens', 'sliding', 'superqueens')
+# Astar options of every problem. Superqueens solutions are all at the same depth and most
+# nodes share f, so a LIFO tie-break dives straight to them.
+SEARCH_OPTIONS = {
+    'fifteens': {'frontier': 'bucket'},
+    'sliding': {'frontier': 'bucket'},
+    'superqueens': {'frontier': 'bucket', 'tie_break': 'lifo'},
+}
+
+
+def read_jsonl(stream):
+    """Yields the instances of a JSONL stream, one line at a time.
+
+    A line that cannot be parsed becomes an instance carrying an 'error', so it is
+    reported in the results instead of stopping the stream.
+    """
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            instance = json.loads(line)
+            if not isinstance(instance, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            instance = {'error': 'line %d: %s' % (number, e)}
+        instance.setdefault('id', number)
+        yield instance
+
+
+def read_text(stream):
+    """Yields a fifteens instance for every block of non-empty lines of a text stream."""
+    number = 0
+    for blank, lines in itertools.groupby(stream, key=lambda line: not line.strip()):
+        if not blank:
+            number += 1
+            yield {'id': number, 'problem': 'fifteens', 'board': ''.join(lines)}
+
+
+def read_instances(stream, fmt='auto'):
+    """Yields the instances of a stream without reading it all into memory.
+
+    Parameters
+    ----------
+    stream : file object
+        The text stream to read.
+
+    fmt : str
+        'jsonl', 'text', or 'auto' to decide from the first non-blank character.
+
+    Returns
+    -------
+        instances : iterator of dicts
+    """
+    if fmt == 'auto':
+        first = []
+        for line in stream:
+            first.append(line)
+            if line.strip():
+                break
+        fmt = 'jsonl' if first and first[-1].lstrip().startswith('{') else 'text'
+        stream = itertools.chain(first, stream)
+    if fmt == 'jsonl':
+        return read_jsonl(stream)
+    if fmt == 'text':
+        return read_text(stream)
+    raise ValueError('Unknown input format %r' % fmt)
+
+
+def make_root(instance):
+    """Builds the root node of an instance."""
+    if 'error' in instance:
+        raise ValueError(instance['error'])
+    problem = instance.get('problem', 'fifteens')
+    if problem in ('fifteens', 'sliding'):
+        node_class = PackedFifteensNode if problem == 'fifteens' else SlidingPuzzleNode
+        board = instance['board']
+        if isinstance(board, str):
+            return node_class(input_str=board)
+        return node_class(board=board)
+    if problem == 'superqueens':
+        return SuperqueensNode(n=int(instance['n']), break_symmetry=bool(instance.get('break_symmetry', False)))
+    raise ValueError('Unknown problem %r, expected one of %s' % (problem, ', '.join(PROBLEMS)))
+
+
+def path_moves(path):
+    """Describes the moves along a solution path."""
+    if isinstance(path[0], SuperqueensNode):
+        return [node.queen_positions[-1][0] for node in path[1:]]
+    size = getattr(path[0], 'size', 4)
+    directions = {-1: 'L', 1: 'R', -size: 'U', size: 'D'}
+    return [directions[child.blank - parent.blank] for parent, child in zip(path, path[1:])]
+
+
+# The cache of every database file opened by this process.
+_CACHES = {}
+
+
+def solve_instance(instance, max_expansions=None, time_limit=None, cache_path=None):
+    """Solves one instance and returns its result as a JSON-serializable dict.
+
+    Errors are reported in the result instead of being raised, so that one bad instance
+    does not stop a batch. If `cache_path` is given, the SolutionCache of that file is used.
+    """
+    result = {'id': instance.get('id')}
+    stats = SearchStats()
+    cache = None
+    if cache_path is not None:
+        cache = _CACHES.get(cache_path)
+        if cache is None:
+            cache = _CACHES[cache_path] = SolutionCache(cache_path)
+    try:
+        root = make_root(instance)
+        options = SEARCH_OPTIONS[instance.get('problem', 'fifteens')]
+        path = Astar(root, stats=stats, max_expansions=max_expansions, time_limit=time_limit, cache=cache,
+                     **options)
+    except SearchLimitReached as e:
+        result.update(status='limit', message=str(e))
+    except UnsolvableError as e:
+        result.update(status='no_solution', message=str(e))
+    except Exception as e:
+        result.update(status='error', message='%s: %s' % (type(e).__name__, e))
+    else:
+        if path is None:
+            result.update(status='no_solution')
+        else:
+            result.update(status='solved', moves=path_moves(path), cost=path[-1].g)
+    result.update(expanded=stats.expanded, generated=stats.generated, seconds=round(stats.elapsed, 6))
+    return result
+
+
+def solve_stream(instances, workers=None, max_expansions=None, time_limit=None, cache_path=None):
+    """Solves instances on a process pool and yields the results in completion order.
+
+    At most a few instances per worker are read ahead, so arbitrarily long streams are
+    processed in constant memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = 4 * workers
+    instances = iter(instances)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for instance in itertools.islice(instances, window):
+            pending.add(pool.submit(solve_instance, instance, max_expansions, time_limit, cache_path))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for instance in itertools.islice(instances, len(done)):
+                pending.add(pool.submit(solve_instance, instance, max_expansions, time_limit, cache_path))
+            for future in done:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve a stream of puzzle instances with A*.')
+    parser.add_argument('input', nargs='?', default='-', help="input file, or '-' for stdin (default)")
+    parser.add_argument('--format', choices=('auto', 'jsonl', 'text'), default='auto', help='input format')
+    parser.add_argument('--output', default='-', help="output file, or '-' for stdout (default)")
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all cores)')
+    parser.add_argument('--max-expansions', type=int, default=None, help='node limit per instance')
+    parser.add_argument('--time-limit', type=float, default=None, help='time limit per instance, in seconds')
+    parser.add_argument('--cache', default=None, help='SQLite file of the solution cache shared by the workers')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        instances = read_instances(source, args.format)
+        for result in solve_stream(instances, args.workers, args.max_expansions, args.time_limit, args.cache):
+            sink.write(json.dumps(result) + '\n')
+            sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == '__main__':
+    main()
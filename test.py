@@ -3,9 +3,36 @@ NOTE: Do not rely on these tests as they are just simple examples.
 Your code will be tested on some secret instances of the problems!
 """
 
+import asyncio
+import collections
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
 import unittest
-from problems import FifteensNode, SuperqueensNode
-from search import Astar
+import arena
+import bench
+import bidirectional
+import cache
+import checkpoint
+import external
+import frontiersearch
+import heuristics
+import parallel
+import patterndb
+import pruning
+import search
+import service
+import solve
+import vectorized
+from frontier import BucketFrontier, HeapFrontier
+from problems import FifteensNode, PackedFifteensNode, SlidingPuzzleNode, SuperqueensNode, UnsolvableError, is_solvable
+from search import ARAstar, Astar, IDAstar, PEAstar, SearchLimitReached, SearchStats, SMAstar
+
+# A 14-move instance, deep enough to exercise duplicate handling.
+FIFTEENS_14_MOVES = '1 6 2 4\n9 3 7 8\n10 14 5 11\n13 0 15 12'
 
 
 class TestFifteens(unittest.TestCase):
@@ -49,6 +76,175 @@ class TestFifteens(unittest.TestCase):
         self.assertTrue(fifteens_path[-1].is_goal())
 
 
+class TestPackedFifteens(unittest.TestCase):
+    def test_compatible_with_fifteens(self):
+        """Test that the packed node prints, evaluates and expands exactly like FifteensNode."""
+        packed_root = PackedFifteensNode(input_str=FIFTEENS_14_MOVES)
+        fifteens_root = FifteensNode(input_str=FIFTEENS_14_MOVES)
+        self.assertEqual(str(packed_root), str(fifteens_root))
+        self.assertEqual(packed_root.f, fifteens_root.f)
+        for packed_child, fifteens_child in zip(packed_root.generate_children(), fifteens_root.generate_children()):
+            self.assertEqual(packed_child.board, fifteens_child.board)
+            self.assertEqual(packed_child.f, fifteens_child.f)
+            self.assertEqual(packed_child.f, PackedFifteensNode(board=packed_child.board).f + 1)
+
+    def test_goal_states(self):
+        """Test that is_goal returns True only for the goal configuration."""
+        self.assertTrue(PackedFifteensNode(input_str="1  2  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0").is_goal())
+        self.assertFalse(PackedFifteensNode(input_str=FIFTEENS_14_MOVES).is_goal())
+
+    def test_a_star_algorithm(self):
+        """Test that A* finds a path of the same length as with FifteensNode."""
+        path = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES))
+        self.assertEqual(len(path), 15)
+        self.assertTrue(path[-1].is_goal())
+
+
+class TestSlidingPuzzle(unittest.TestCase):
+    def test_same_as_fifteens(self):
+        """Test that a 4x4 SlidingPuzzleNode search matches FifteensNode."""
+        path = Astar(SlidingPuzzleNode(input_str=FIFTEENS_14_MOVES))
+        expected = Astar(FifteensNode(input_str=FIFTEENS_14_MOVES))
+        self.assertEqual([node.state for node in path], [node.state for node in expected])
+        self.assertEqual([node.f for node in path], [node.f for node in expected])
+
+    def test_other_sizes(self):
+        """Test that 8 and 24 puzzles are solved optimally."""
+        path = Astar(SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5'))
+        self.assertEqual(len(path), 15)
+        self.assertTrue(path[-1].is_goal())
+        board = [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12, 13, 14, 15], [16, 17, 18, 0, 20], [21, 22, 23, 19, 24]]
+        path = Astar(SlidingPuzzleNode(board=board))
+        self.assertEqual(len(path), 3)
+        self.assertEqual(str(path[-1]).splitlines()[-1], ' 21 22 23 24   ')
+
+    def test_unsolvable(self):
+        """Test that unsolvable and malformed boards are rejected before searching."""
+        with self.assertRaises(UnsolvableError):
+            SlidingPuzzleNode(input_str='1 2 3\n4 5 6\n8 7 0')
+        with self.assertRaises(UnsolvableError):
+            PackedFifteensNode(input_str=FIFTEENS_14_MOVES.replace('14', 'x').replace('15', '14').replace('x', '15'))
+        with self.assertRaises(ValueError):
+            SlidingPuzzleNode(input_str='1 2 3\n4 5 6\n7 7 0')
+
+    def test_is_solvable(self):
+        """Test the parity check against random walks from the goal and swapped tiles."""
+        rng = random.Random(1)
+        for size in (2, 3, 4, 5):
+            node = SlidingPuzzleNode(board=[[(row * size + col + 1) % (size * size) for col in range(size)]
+                                            for row in range(size)])
+            for _ in range(rng.randrange(1, 30)):
+                node = rng.choice(node.generate_children())
+            cells = list(node.state)
+            self.assertTrue(is_solvable(cells, size))
+            i, j = [k for k, tile in enumerate(cells) if tile][:2]
+            cells[i], cells[j] = cells[j], cells[i]
+            self.assertFalse(is_solvable(cells, size))
+
+
+class TestHeuristics(unittest.TestCase):
+    SPECS = ('manhattan', 'linear-conflict', 'walking-distance', 'linear-conflict,walking-distance')
+
+    def test_incremental_updates(self):
+        """Test that the incremental path agrees with a full evaluation along random walks."""
+        rng = random.Random(3)
+        for size in (3, 4):
+            for spec in self.SPECS:
+                heuristic = heuristics.make_heuristic(spec, size)
+                node = SlidingPuzzleNode.with_heuristic(spec)(cells=tuple(range(1, size * size)) + (0,))
+                for _ in range(200):
+                    node = rng.choice(node.generate_children())
+                    self.assertEqual(node.f - node.g, heuristic(node.cells))
+
+    def test_admissible(self):
+        """Test that every heuristic finds optimal paths and the stronger ones expand fewer nodes."""
+        expanded = {}
+        for spec in self.SPECS:
+            stats = SearchStats()
+            path = Astar(SlidingPuzzleNode.with_heuristic(spec)(input_str=FIFTEENS_14_MOVES), stats=stats)
+            self.assertEqual(len(path), 15)
+            self.assertLessEqual(path[0].f, 14)
+            expanded[spec] = stats.expanded
+        self.assertLessEqual(expanded['linear-conflict'], expanded['manhattan'])
+        self.assertLessEqual(expanded['linear-conflict,walking-distance'], expanded['walking-distance'])
+
+    def test_registry(self):
+        """Test that names are checked and that registry heuristics plug into FifteensNode."""
+        with self.assertRaises(ValueError):
+            heuristics.make_heuristic('manhattan,euclid', 4)
+        self.assertEqual(len(heuristics.walking_distance_table(4)), 24964)
+        path = Astar(FifteensNode.with_heuristic('walking-distance')(input_str=FIFTEENS_14_MOVES))
+        self.assertEqual(len(path), 15)
+        self.assertEqual(heuristics.make_heuristic('linear-conflict', 3)((2, 1, 3, 4, 5, 6, 7, 8, 0)), 4)
+
+
+class TestPatternDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        for pattern in patterndb.parse_partition('2-2-2-2-2-2-2-1'):
+            path = os.path.join(cls.directory.name, patterndb.file_name(pattern))
+            patterndb.save(path, pattern, patterndb.build(pattern))
+        cls.heuristic = patterndb.AdditivePDB.load_dir(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        for db in cls.heuristic.databases:
+            db.close()
+        cls.directory.cleanup()
+
+    def test_files(self):
+        """Test that every table of the partition is written and mapped back."""
+        self.assertEqual(len(os.listdir(self.directory.name)), 8)
+        self.assertEqual([db.pattern for db in self.heuristic.databases],
+                         sorted(patterndb.parse_partition('2-2-2-2-2-2-2-1'), key=patterndb.file_name))
+
+    def test_build(self):
+        """Test that the level-by-level build matches a 0-1 BFS over (placement, blank) pairs."""
+        pattern = (6, 7, 11)
+        distances = {}
+        queue = collections.deque([(tuple(tile - 1 for tile in pattern), patterndb.CELLS - 1, 0)])
+        while queue:
+            positions, blank, distance = queue.popleft()
+            if (positions, blank) in distances:
+                continue
+            distances[positions, blank] = distance
+            for target in patterndb._NEIGHBOURS[blank]:
+                if target in positions:
+                    queue.append((tuple(blank if p == target else p for p in positions), target, distance + 1))
+                else:
+                    queue.appendleft((positions, target, distance))
+        expected = bytearray([patterndb.UNSEEN]) * patterndb.table_size(len(pattern))
+        for (positions, _), distance in distances.items():
+            index = patterndb.rank(positions)
+            expected[index] = min(expected[index], distance)
+        self.assertEqual(patterndb.build(pattern), expected)
+        self.assertNotIn(patterndb.UNSEEN, expected)
+
+    def test_partition(self):
+        """Test that only the partitions with buildable patterns are accepted."""
+        self.assertEqual([len(pattern) for pattern in patterndb.parse_partition('6-6-3')], [6, 6, 3])
+        for spec in ('7-8', '5-5-4', '15-0'):
+            with self.assertRaises(ValueError):
+                patterndb.parse_partition(spec)
+
+    def test_dominates_manhattan(self):
+        """Test that the additive PDB is 0 at the goal and never below the Manhattan distance."""
+        Node = FifteensNode.with_heuristic(self.heuristic)
+        goal = Node(input_str="1  2  3  4\n5  6  7  8\n9 10 11 12\n13 14 15  0")
+        self.assertEqual(goal.evaluate_heuristic(), 0)
+        for child in Node(input_str=FIFTEENS_14_MOVES).generate_children():
+            self.assertIsInstance(child, Node)
+            self.assertGreaterEqual(child.evaluate_heuristic(), FifteensNode(board=child.board).evaluate_heuristic())
+
+    def test_a_star_algorithm(self):
+        """Test that A* with the PDB heuristic still finds an optimal path."""
+        Node = FifteensNode.with_heuristic(self.heuristic)
+        path = Astar(Node(input_str=FIFTEENS_14_MOVES))
+        self.assertEqual(len(path), 15)
+        self.assertTrue(path[-1].is_goal())
+
+
 class TestSuperqueens(unittest.TestCase):
     def test_constucting_instances(self):
         """Test that an instance of SuperqueensNode can be created without an error."""
@@ -81,6 +277,57 @@ class TestSuperqueens(unittest.TestCase):
         superqueens_root = SuperqueensNode(n=7)
         superqueens_root.evaluate_heuristic()
 
+    def test_incremental_conflicts(self):
+        """Test that the g of every child counts the attacking pairs of its placement,
+        and that the state and string of a child match a node built from its positions."""
+        rng = random.Random(0)
+        for _ in range(50):
+            n = rng.randint(1, 11)
+            rows = rng.sample(range(n), rng.randint(0, n - 1))
+            queen_positions = [(row, col) for col, row in enumerate(rows)]
+            node = SuperqueensNode(g=count_attacking_pairs(queen_positions), queen_positions=queen_positions, n=n)
+            for child in node.generate_children():
+                self.assertEqual(child.g, count_attacking_pairs(child.queen_positions))
+                rebuilt = SuperqueensNode(queen_positions=child.queen_positions, n=n)
+                self.assertEqual(child.state, rebuilt.state)
+                self.assertEqual(str(child), str(rebuilt))
+                for grandchild in child.generate_children():
+                    self.assertEqual(grandchild.g, count_attacking_pairs(grandchild.queen_positions))
+
+    def test_heuristic_is_admissible(self):
+        """Test that the heuristic never exceeds the cheapest completion, found by brute force."""
+        def cheapest_completion(node):
+            if node.is_goal():
+                return node.g
+            return min(cheapest_completion(child) for child in node.generate_children())
+
+        rng = random.Random(1)
+        for _ in range(150):
+            n = rng.randint(2, 7)
+            rows = rng.sample(range(n), rng.randint(0, n - 1))
+            queen_positions = [(row, col) for col, row in enumerate(rows)]
+            node = SuperqueensNode(g=count_attacking_pairs(queen_positions), queen_positions=queen_positions, n=n)
+            self.assertLessEqual(node.evaluate_heuristic(), cheapest_completion(node) - node.g)
+
+    def test_large_boards(self):
+        """Test that A* with a LIFO tie-break solves a large board without conflicts."""
+        path = Astar(SuperqueensNode(n=20), frontier='bucket', tie_break='lifo', max_expansions=5000)
+        self.assertEqual(len(path), 21)
+        self.assertEqual(path[-1].g, 0)
+        self.assertEqual(count_attacking_pairs(path[-1].queen_positions), 0)
+
+    def test_symmetry_breaking(self):
+        """Test that symmetry breaking keeps the first queen in the upper half, expands fewer
+        nodes and still finds an optimal placement."""
+        root = SuperqueensNode(n=7, break_symmetry=True)
+        self.assertEqual(sorted(child.queen_positions[0][0] for child in root.generate_children()), [0, 1, 2, 3])
+        for n in range(4, 9):
+            path, stats = Astar(SuperqueensNode(n=n), return_stats=True)
+            reduced_path, reduced_stats = Astar(SuperqueensNode(n=n, break_symmetry=True), return_stats=True)
+            self.assertEqual(reduced_path[-1].g, path[-1].g)
+            self.assertTrue(reduced_path[-1].break_symmetry)
+            self.assertLess(reduced_stats.expanded, stats.expanded)
+
     def test_a_star_algorithm(self):
         """Test that the length of the solution path is 8 when the board size is 7,
         the last state is the goal state, and there is no queen in the initial state."""
@@ -91,5 +338,855 @@ class TestSuperqueens(unittest.TestCase):
         self.assertTrue(superqueens_path[-1].is_goal())
 
 
+def count_attacking_pairs(queen_positions):
+    """Counts the pairs of superqueens that attack each other, by brute force."""
+    pairs = 0
+    for i, (r1, c1) in enumerate(queen_positions):
+        for r2, c2 in queen_positions[:i]:
+            dr, dc = abs(r1 - r2), abs(c1 - c2)
+            if r1 == r2 or c1 == c2 or dr == dc or (dr, dc) in ((1, 2), (2, 1)):
+                pairs += 1
+    return pairs
+
+
+class TestFrontier(unittest.TestCase):
+    def test_backends_agree(self):
+        """Test that every frontier backend and tie-break policy finds an optimal path of the same length."""
+        for frontier in ('heap', 'bucket'):
+            for tie_break in ('fifo', 'lifo', 'high-g', 'low-g'):
+                path = Astar(FifteensNode(input_str=FIFTEENS_14_MOVES), frontier=frontier, tie_break=tie_break)
+                self.assertEqual(len(path), 15)
+                self.assertTrue(path[-1].is_goal())
+
+    def test_tie_break_order(self):
+        """Test that nodes with equal f are popped according to the tie-break policy."""
+        class Item:
+            def __init__(self, f, g):
+                self.f, self.g = f, g
+
+        items = [Item(5, 1), Item(5, 3), Item(4, 0), Item(5, 2)]
+        expected = {'fifo': [0, 1, 3], 'lifo': [3, 1, 0], 'high-g': [3, 2, 1], 'low-g': [1, 2, 3]}
+        for cls in (HeapFrontier, BucketFrontier):
+            for tie_break, order in expected.items():
+                frontier = cls(tie_break)
+                for item in items:
+                    frontier.push(item)
+                popped = [frontier.pop() for _ in range(len(items))]
+                self.assertIs(popped[0], items[2])
+                self.assertEqual([item.g if tie_break.endswith('-g') else items.index(item) for item in popped[1:]],
+                                 order)
+
+    def test_bucket_rejects_fractional_f(self):
+        """Test that the bucket frontier refuses non-integer f values."""
+        class Item:
+            f, g = 1.5, 0
+
+        with self.assertRaises(TypeError):
+            BucketFrontier().push(Item())
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_stats_and_hooks(self):
+        """Test that the statistics returned with the path agree with the callbacks."""
+        expanded, generated, goals = [], [], []
+        path, stats = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), return_stats=True,
+                            on_expand=expanded.append, on_generate=generated.append, on_goal=goals.append)
+        self.assertEqual(len(path), 15)
+        self.assertEqual(stats.expanded, len(expanded))
+        self.assertEqual(stats.generated, len(generated))
+        self.assertEqual(goals, [path[-1]])
+        self.assertEqual(stats.max_closed, stats.expanded)
+        self.assertGreater(stats.duplicates, 0)
+        self.assertEqual(stats.reopened, 0)
+        bounds = [f for f, _ in stats.f_progression]
+        self.assertEqual(bounds, sorted(set(bounds)))
+        self.assertEqual(bounds[-1], 14)
+
+    def test_timing(self):
+        """Test that timing splits the run time and leaves the node class untouched."""
+        evaluate_heuristic = FifteensNode.__dict__['evaluate_heuristic']
+        inner = SearchStats()
+
+        def on_expand(node):
+            self.assertIs(FifteensNode.__dict__['evaluate_heuristic'], evaluate_heuristic)
+            if not inner.expanded:
+                Astar(FifteensNode(input_str=FIFTEENS_14_MOVES), stats=inner, timing=True)
+
+        path, stats = Astar(FifteensNode(input_str=FIFTEENS_14_MOVES), return_stats=True, timing=True,
+                            on_expand=on_expand)
+        self.assertIs(FifteensNode.__dict__['evaluate_heuristic'], evaluate_heuristic)
+        self.assertEqual({type(node) for node in path}, {FifteensNode})
+        self.assertGreater(inner.time_heuristic, 0)
+        self.assertGreater(stats.time_heuristic, 0)
+        self.assertGreater(stats.time_successors, 0)
+        self.assertGreater(stats.time_queue, 0)
+        self.assertLessEqual(stats.time_heuristic + stats.time_successors + stats.time_queue, stats.elapsed)
+
+    def test_limit_carries_stats(self):
+        """Test that an interrupted search still reports its counters."""
+        with self.assertRaises(SearchLimitReached) as raised:
+            Astar(SuperqueensNode(n=7), max_expansions=5)
+        self.assertEqual(raised.exception.stats.expanded, 5)
+
+
+class TestIDAstar(unittest.TestCase):
+    def test_fifteens(self):
+        """Test that IDA* finds a path as short as the one found by A*, and reports every iteration."""
+        report = []
+        path = IDAstar(FifteensNode(input_str=FIFTEENS_14_MOVES), report=report)
+        self.assertEqual(len(path), 15)
+        self.assertTrue(path[-1].is_goal())
+        self.assertEqual(path, path[-1].get_path())
+        thresholds = [threshold for threshold, _ in report]
+        self.assertEqual(thresholds, sorted(set(thresholds)))
+        self.assertEqual(thresholds[-1], 14)
+
+    def test_superqueens(self):
+        """Test that IDA* finds a superqueens solution with the same cost as A*."""
+        path = IDAstar(SuperqueensNode(n=7))
+        self.assertEqual(len(path), 8)
+        self.assertTrue(path[-1].is_goal())
+        self.assertEqual(path[-1].g, Astar(SuperqueensNode(n=7))[-1].g)
+
+
+class TestPEAstar(unittest.TestCase):
+    def test_lazy_successors(self):
+        """Test that successors predict the f of the children that make_child builds."""
+        for node in (PackedFifteensNode(input_str=FIFTEENS_14_MOVES),
+                     SlidingPuzzleNode.with_heuristic('linear-conflict')(input_str=FIFTEENS_14_MOVES),
+                     FifteensNode(input_str=FIFTEENS_14_MOVES),
+                     FifteensNode.with_heuristic('linear-conflict')(input_str=FIFTEENS_14_MOVES),
+                     FifteensNode.with_move_pruning()(input_str=FIFTEENS_14_MOVES), SuperqueensNode(n=5)):
+            expected = sorted((child.state, child.f) for child in node.generate_children())
+            built = []
+            for move, delta_f in node.successors():
+                child = node.make_child(move)
+                self.assertIs(child.parent, node)
+                self.assertEqual(child.f, node.f + delta_f)
+                built.append((child.state, child.f))
+            self.assertEqual(sorted(built), expected)
+
+    def test_same_cost_fewer_children(self):
+        """Test that partial expansion finds optimal paths while building fewer children."""
+        for make_root in (lambda: PackedFifteensNode(input_str=FIFTEENS_14_MOVES),
+                          lambda: FifteensNode(input_str=FIFTEENS_14_MOVES),
+                          lambda: FifteensNode.with_move_pruning()(input_str=FIFTEENS_14_MOVES),
+                          lambda: SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5')):
+            astar_stats, pea_stats = SearchStats(), SearchStats()
+            expected = Astar(make_root(), stats=astar_stats)
+            path = PEAstar(make_root(), stats=pea_stats)
+            self.assertEqual(path[-1].g, expected[-1].g)
+            self.assertTrue(path[-1].is_goal())
+            self.assertLess(pea_stats.generated, astar_stats.generated)
+
+    def test_default_successors(self):
+        """Test that the children built by the default successors are all counted, at every
+        partial expansion, so that a class without cheap successors shows no saving.
+        """
+        astar_stats, pea_stats = SearchStats(), SearchStats()
+        expected = Astar(SuperqueensNode(n=7), stats=astar_stats)
+        path = PEAstar(SuperqueensNode(n=7), stats=pea_stats)
+        self.assertEqual(path[-1].g, expected[-1].g)
+        self.assertGreater(pea_stats.expanded, astar_stats.expanded)
+        self.assertGreater(pea_stats.generated, astar_stats.generated)
+
+
+class TestSMAstar(unittest.TestCase):
+    def test_same_cost_within_bound(self):
+        """Test that the memory-bounded search finds optimal paths without exceeding its bound."""
+        for make_root, max_nodes in ((lambda: SuperqueensNode(n=7), 130),
+                                     (lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), 41),
+                                     (lambda: SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5'), 30)):
+            expected = Astar(make_root())
+            stats = search.MemoryBoundedStats()
+            path = SMAstar(make_root(), max_nodes, stats=stats)
+            self.assertEqual(path[-1].g, expected[-1].g)
+            self.assertTrue(path[-1].is_goal())
+            for parent, child in zip(path, path[1:]):
+                self.assertIn(child.state, [node.state for node in parent.generate_children()])
+            self.assertLessEqual(stats.max_frontier, max_nodes)
+            self.assertGreater(stats.forgotten, 0)
+
+    def test_regenerate_children(self):
+        """Test that the forgotten children are rebuilt, and only those."""
+        node = SuperqueensNode(n=5)
+        children = node.generate_children()
+        wanted = {child.state for child in children[1::2]}
+        self.assertEqual([child.state for child in node.regenerate_children(wanted)],
+                         [child.state for child in children[1::2]])
+
+    def test_too_small(self):
+        """Test that a bound below the length of every solution is reported as a limit."""
+        self.assertEqual(len(SMAstar(SuperqueensNode(n=5), 6)), 6)
+        with self.assertRaises(SearchLimitReached):
+            SMAstar(SuperqueensNode(n=5), 5)
+        with self.assertRaises(ValueError):
+            SMAstar(SuperqueensNode(n=5), 1)
+
+
+class TestMovePruning(unittest.TestCase):
+    def test_duplicates(self):
+        """Test that inverse moves and the 2 x 2 cycles are found, and only them up to 8 moves."""
+        self.assertEqual(pruning.find_duplicates(4), ('LR', 'RL', 'UD', 'DU'))
+        duplicates = pruning.find_duplicates(8)
+        self.assertIn('LURDLUR', duplicates)
+        self.assertEqual(len(duplicates), 12)
+
+    def test_automaton(self):
+        """Test that the automaton cuts the strings that end a duplicate and keeps the others."""
+        automaton = pruning.MovePruning.for_depth(8)
+        self.assertFalse(automaton.allowed('ULR'))
+        self.assertFalse(automaton.allowed('DLURDLUR'))
+        self.assertTrue(automaton.allowed('LURDLU'))
+        self.assertTrue(automaton.allowed('LLUURRDD'))
+
+    def test_same_cost_fewer_duplicates(self):
+        """Test that pruned nodes keep the optimal cost and generate fewer duplicates."""
+        for node_class, instance in ((FifteensNode, FIFTEENS_14_MOVES), (PackedFifteensNode, FIFTEENS_14_MOVES),
+                                     (SlidingPuzzleNode, '8 1 3\n4 0 2\n7 6 5')):
+            plain_stats, pruned_stats = SearchStats(), SearchStats()
+            expected = Astar(node_class(input_str=instance), stats=plain_stats)
+            path = Astar(node_class.with_move_pruning()(input_str=instance), stats=pruned_stats)
+            self.assertEqual(path[-1].g, expected[-1].g)
+            self.assertTrue(path[-1].is_goal())
+            self.assertLess(pruned_stats.duplicates, plain_stats.duplicates)
+            self.assertEqual(len(IDAstar(node_class.with_move_pruning()(input_str=instance))), len(expected))
+
+    def test_pruned_children(self):
+        """Test that pruning drops the move back to the grandparent and keeps the other children."""
+        root = PackedFifteensNode.with_move_pruning()(input_str=FIFTEENS_14_MOVES)
+        for child in root.generate_children():
+            states = [grandchild.state for grandchild in child.generate_children()]
+            self.assertNotIn(root.state, states)
+            self.assertEqual(len(states), len(child.from_state(child.state).generate_children()) - 1)
+
+    def test_bench_report(self):
+        """Test that the benchmark reports the fraction of duplicates removed."""
+        records = bench.move_pruning_effect([FIFTEENS_14_MOVES])
+        self.assertEqual([record['nodes'] for record in records], ['plain', 'pruned'])
+        self.assertEqual(records[0]['cost'], records[1]['cost'])
+        self.assertGreater(records[1]['removed'], 0)
+
+
+class TestARAstar(unittest.TestCase):
+    def test_improving_solutions(self):
+        """Test that the published solutions improve, respect their bounds and end optimal."""
+        solutions = list(ARAstar(PackedFifteensNode(input_str='0 8 6 3\n9 15 5 2\n7 1 14 4\n10 13 12 11'),
+                                 weights=(5, 2, 1)))
+        self.assertGreater(len(solutions), 1)
+        for previous, solution in zip(solutions, solutions[1:]):
+            self.assertTrue(solution.cost < previous.cost or solution.bound < previous.bound)
+        for solution in solutions:
+            self.assertLessEqual(solution.cost, solution.bound * 40)
+            self.assertTrue(solution.path[-1].is_goal())
+            self.assertEqual(len(solution.path) - 1, solution.cost)
+        self.assertEqual((solutions[-1].cost, solutions[-1].bound), (40, 1.0))
+
+    def test_budget(self):
+        """Test that the search stops cleanly when the expansion budget runs out."""
+        solutions = list(ARAstar(PackedFifteensNode(input_str='0 8 6 3\n9 15 5 2\n7 1 14 4\n10 13 12 11'),
+                                 max_expansions=200))
+        self.assertEqual(solutions, [])
+        solutions = list(ARAstar(SuperqueensNode(n=7), weights=(2, 1), max_expansions=5000))
+        self.assertEqual(solutions[-1].cost, 3)
+
+
+class TestArena(unittest.TestCase):
+    def test_same_search_as_astar(self):
+        """Test that ArenaAstar expands the same nodes as Astar and returns real nodes."""
+        astar_stats, arena_stats = SearchStats(), SearchStats()
+        expected = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), stats=astar_stats)
+        path = arena.ArenaAstar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), stats=arena_stats)
+        self.assertEqual([node.state for node in path], [node.state for node in expected])
+        self.assertEqual(arena_stats.expanded, astar_stats.expanded)
+        self.assertIsInstance(path[-1], PackedFifteensNode)
+        self.assertEqual(path[-1].get_path(), path)
+
+    def test_list_states(self):
+        """Test that non-integer states are kept in a list."""
+        path, nodes = arena.ArenaAstar(SuperqueensNode(n=7), return_arena=True)
+        self.assertIsInstance(nodes.states, list)
+        self.assertEqual(path[-1].g, count_attacking_pairs(path[-1].queen_positions))
+        self.assertEqual(len(path), 8)
+
+    def test_views(self):
+        """Test that views follow the parent indices."""
+        nodes = arena.NodeArena()
+        root = nodes.add(7, 0, 3)
+        child = nodes.add(9, 1, 3, root)
+        view = nodes.view(child)
+        self.assertEqual((view.state, view.g, view.f, view.parent.state), (9, 1, 3, 7))
+        self.assertIsNone(view.parent.parent)
+        self.assertEqual([node.index for node in view.get_path()], [root, child])
+        with self.assertRaises(AttributeError):
+            view.extra = 1
+
+    def test_state_index(self):
+        """Test that the hash table finds every state after growing."""
+        nodes = arena.NodeArena()
+        index = arena.StateIndex(nodes, bits=2)
+        for state in range(0, 5000, 7):
+            index.put(state, nodes.add(state, 0, 0))
+        self.assertEqual(len(index), len(nodes))
+        self.assertTrue(all(nodes.states[index.get(state)] == state for state in range(0, 5000, 7)))
+        self.assertEqual(index.get(3), -1)
+
+    def test_index_buckets(self):
+        """Test that the lowest f is popped first, in insertion order."""
+        fringe = arena.IndexBuckets()
+        for f, i in ((3, 0), (1, 1), (3, 2), (1, 3), (2, 4)):
+            fringe.push(f, i)
+        self.assertEqual([fringe.pop() for _ in range(5)], [1, 3, 4, 0, 2])
+        self.assertEqual(len(fringe), 0)
+
+
+class _Unrebuildable(PackedFifteensNode):
+    def from_state(self, state, parent=None, g=0):
+        raise NotImplementedError('cannot be rebuilt')
+
+
+class _Crashing(PackedFifteensNode):
+    def generate_children(self):
+        os._exit(3)
+
+
+class TestHDAstar(unittest.TestCase):
+    def assertValidPath(self, path):
+        for parent, child in zip(path, path[1:]):
+            self.assertIn(child.state, [node.state for node in parent.generate_children()])
+            self.assertEqual(child.g, parent.g + 1)
+        self.assertTrue(path[-1].is_goal())
+
+    def test_optimal(self):
+        """Test that any number of workers finds a path as short as the sequential search."""
+        for workers in (1, 3):
+            stats = SearchStats()
+            path = parallel.HDAstar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), workers=workers,
+                                    batch_size=8, stats=stats)
+            self.assertEqual(len(path), 15)
+            self.assertValidPath(path)
+            self.assertGreater(stats.expanded, 0)
+
+    def test_superqueens(self):
+        """Test that costs other than path lengths are optimal too."""
+        path = parallel.HDAstar(SuperqueensNode(n=7), workers=2)
+        self.assertEqual(path[-1].g, Astar(SuperqueensNode(n=7))[-1].g)
+        self.assertEqual(len(path), 8)
+
+    def test_worker_failure(self):
+        """Test that the exception of a worker is raised again and a dead worker is reported."""
+        with self.assertRaises(NotImplementedError) as raised:
+            parallel.HDAstar(_Unrebuildable(input_str=FIFTEENS_14_MOVES), workers=2)
+        self.assertIsInstance(raised.exception.__cause__, parallel.WorkerError)
+        self.assertIn('cannot be rebuilt', str(raised.exception.__cause__))
+        with self.assertRaises(NotImplementedError):
+            parallel.HDAstar(_Unrebuildable(input_str=FIFTEENS_14_MOVES), workers=2, time_limit=60)
+        with self.assertRaisesRegex(parallel.WorkerError, 'exited with code 3'):
+            parallel.HDAstar(_Crashing(input_str=FIFTEENS_14_MOVES), workers=2)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = cache.SolutionCache(os.path.join(self.directory.name, 'cache.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_hit(self):
+        """Test that a solved root, and any state of its path, is answered without searching."""
+        path = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=self.cache)
+        stats = SearchStats()
+        again = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=self.cache, stats=stats)
+        self.assertEqual([node.state for node in again], [node.state for node in path])
+        self.assertEqual(stats.expanded, 0)
+        middle = Astar(PackedFifteensNode(packed=path[4].state), cache=self.cache)
+        self.assertEqual(middle[-1].g, 10)
+        self.assertEqual(self.cache.counters(), {'hits': 2, 'partial_hits': 0, 'misses': 1})
+
+    def test_partial_hit(self):
+        """Test that a search stops at a cached state and still returns an optimal path."""
+        path = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=self.cache)
+        states = {node.state for node in path}
+        off = [child for child in path[3].generate_children() if child.state not in states][0]
+        expected = Astar(PackedFifteensNode(packed=off.state))
+        stats = SearchStats()
+        found = Astar(PackedFifteensNode(packed=off.state), cache=self.cache, stats=stats)
+        self.assertEqual(len(found), len(expected))
+        self.assertTrue(found[-1].is_goal())
+        for parent, child in zip(found, found[1:]):
+            self.assertIn(child.state, [node.state for node in parent.generate_children()])
+        self.assertEqual(self.cache.counters()['partial_hits'], 1)
+
+    def test_backward(self):
+        """Test that the solutions of backward searches are kept apart from forward ones."""
+        for node_class in (PackedFifteensNode, FifteensNode, SlidingPuzzleNode):
+            root = node_class(input_str=FIFTEENS_14_MOVES)
+            backward = Astar(root.backward_root(), cache=self.cache)
+            self.assertEqual(backward[-1].state, root.state)
+            goal = root.from_state(backward[0].state)
+            self.assertIsNone(self.cache.lookup(goal))
+            self.assertNotIn(goal.state, self.cache.exact_costs(goal))
+            path = Astar(root, cache=self.cache)
+            self.assertEqual(len(path), 15)
+            self.assertTrue(path[-1].is_goal())
+        self.assertEqual(self.cache.counters()['hits'], 0)
+
+    def test_reads_do_not_write(self):
+        """Test that warm searches neither write to the database nor reload the exact costs."""
+        path = Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=self.cache)
+        exact = self.cache.exact_costs(path[0])
+        self.assertEqual(exact[path[3].state], 11)
+        changes = self.cache.connection.total_changes
+        for _ in range(3):
+            Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=self.cache)
+            Astar(PackedFifteensNode(packed=path[2].state), cache=self.cache)
+        self.assertIs(self.cache.exact_costs(path[0]), exact)
+        self.assertEqual(self.cache.connection.total_changes, changes)
+        self.assertEqual(self.cache.counters(), {'hits': 6, 'partial_hits': 0, 'misses': 1})
+        self.assertGreater(self.cache.connection.total_changes, changes)
+
+    def test_namespaces_and_eviction(self):
+        """Test that superqueens sizes do not share entries and old entries are evicted."""
+        small = cache.SolutionCache(self.cache.path, max_entries=12)
+        Astar(SuperqueensNode(n=5), cache=small)
+        self.assertEqual(len(small), 6)
+        Astar(SuperqueensNode(n=7), cache=small)
+        self.assertEqual(len(small), int(12 * cache.EVICT_TO))
+        self.assertEqual(Astar(SuperqueensNode(n=7), cache=small)[-1].g, Astar(SuperqueensNode(n=7))[-1].g)
+        Astar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), cache=small)
+        self.assertEqual(len(small), int(12 * cache.EVICT_TO))
+        self.assertIsNone(small.lookup(SuperqueensNode(n=5)))
+        small.close()
+
+    def test_shared_by_processes(self):
+        """Test that the workers of solve.py share one cache file."""
+        instances = [{'id': n, 'problem': 'fifteens', 'board': FIFTEENS_14_MOVES} for n in range(6)]
+        results = list(solve.solve_stream(iter(instances), workers=2, cache_path=self.cache.path))
+        self.assertTrue(all(result['cost'] == 14 for result in results))
+        counters = self.cache.counters()
+        self.assertEqual(counters['hits'] + counters['misses'], 6)
+        self.assertGreater(counters['hits'], 0)
+
+
+class TestCheckpoint(unittest.TestCase):
+    INSTANCE = '2 7 4 8\n1 3 6 0\n5 10 11 12\n13 14 9 15'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'search.ckpt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertResumes(self, expected, expected_stats, node_class=PackedFifteensNode, **options):
+        stats = SearchStats()
+        path = checkpoint.CheckpointedAstar(node_class(input_str=self.INSTANCE), self.path, resume=True,
+                                            stats=stats, **options)
+        self.assertEqual([node.state for node in path], [node.state for node in expected])
+        self.assertEqual([node.g for node in path], [node.g for node in expected])
+        self.assertEqual(stats.expanded, expected_stats.expanded)
+        self.assertEqual(stats.generated, expected_stats.generated)
+
+    def test_resume(self):
+        """Test that an interrupted search resumes to the same path as Astar's."""
+        for frontier, tie_break in (('heap', 'fifo'), ('bucket', 'high-g')):
+            expected_stats = SearchStats()
+            expected = Astar(PackedFifteensNode(input_str=self.INSTANCE), frontier=frontier, tie_break=tie_break,
+                             stats=expected_stats)
+            with self.assertRaises(SearchLimitReached):
+                checkpoint.CheckpointedAstar(PackedFifteensNode(input_str=self.INSTANCE), self.path,
+                                             frontier=frontier, tie_break=tie_break, max_expansions=200)
+            self.assertResumes(expected, expected_stats, frontier=frontier, tie_break=tie_break)
+
+    def test_resume_pruned(self):
+        """Test that a resumed search prunes the moves of its rebuilt frontier as Astar does."""
+        for node_class in (PackedFifteensNode.with_move_pruning(), FifteensNode.with_move_pruning(),
+                           SlidingPuzzleNode.with_move_pruning()):
+            expected_stats = SearchStats()
+            expected = Astar(node_class(input_str=self.INSTANCE), stats=expected_stats)
+            with self.assertRaises(SearchLimitReached):
+                checkpoint.CheckpointedAstar(node_class(input_str=self.INSTANCE), self.path, max_expansions=200)
+            self.assertResumes(expected, expected_stats, node_class=node_class)
+
+    def test_torn_record(self):
+        """Test that a record cut short by a crash is dropped and the search goes on before it."""
+        expected_stats = SearchStats()
+        expected = Astar(PackedFifteensNode(input_str=self.INSTANCE), stats=expected_stats)
+        with self.assertRaises(SearchLimitReached):
+            checkpoint.CheckpointedAstar(PackedFifteensNode(input_str=self.INSTANCE), self.path, interval=0,
+                                         max_expansions=150)
+        records, end = checkpoint.read_records(self.path)
+        with open(self.path, 'r+b') as file:
+            file.truncate(end - 3)
+        self.assertEqual(len(checkpoint.read_records(self.path)[0]), len(records) - 1)
+        self.assertResumes(expected, expected_stats)
+
+    def test_other_search(self):
+        """Test that a checkpoint is not resumed for another root or frontier."""
+        checkpoint.CheckpointedAstar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), self.path)
+        with self.assertRaises(checkpoint.CheckpointError):
+            checkpoint.CheckpointedAstar(PackedFifteensNode(input_str=self.INSTANCE), self.path, resume=True)
+        with self.assertRaises(checkpoint.CheckpointError):
+            checkpoint.CheckpointedAstar(PackedFifteensNode(input_str=FIFTEENS_14_MOVES), self.path, resume=True,
+                                         frontier='bucket')
+
+
+class TestBidirectional(unittest.TestCase):
+    def test_backward_root(self):
+        """Test that the backward root is the goal board searching for the root's board."""
+        for root in (FifteensNode(input_str=FIFTEENS_14_MOVES), PackedFifteensNode(input_str=FIFTEENS_14_MOVES),
+                     SlidingPuzzleNode(input_str=FIFTEENS_14_MOVES)):
+            goal = root.backward_root()
+            self.assertFalse(goal.is_goal())
+            self.assertEqual(goal.f, root.f)
+            path = Astar(goal)
+            self.assertEqual(path[-1].state, root.state)
+            self.assertEqual(path[-1].g, 14)
+            self.assertEqual(type(path[-1]).__name__, type(root).__name__)
+
+    def test_same_cost(self):
+        """Test that MM finds optimal paths of forward nodes, expanding in both directions."""
+        for make_root in (lambda: PackedFifteensNode(input_str=bench.random_walk_instance(40, 0)),
+                          lambda: FifteensNode(input_str=FIFTEENS_14_MOVES),
+                          lambda: SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5')):
+            stats = bidirectional.BidirectionalStats()
+            path = bidirectional.BidirectionalMM(make_root(), stats=stats)
+            self.assertEqual(path[-1].g, Astar(make_root())[-1].g)
+            self.assertEqual(path[0].state, make_root().state)
+            self.assertTrue(path[-1].is_goal())
+            self.assertEqual([type(node) for node in path[1:]], [type(path[0])] * (len(path) - 1))
+            for parent, child in zip(path, path[1:]):
+                self.assertIs(child.parent, parent)
+                self.assertIn(child.state, [node.state for node in parent.generate_children()])
+            self.assertGreater(stats.expanded_forward, 0)
+            self.assertGreater(stats.expanded_backward, 0)
+            self.assertEqual(stats.expanded, stats.expanded_forward + stats.expanded_backward)
+
+    def test_root_is_goal(self):
+        """Test that a solved root is returned alone."""
+        path = bidirectional.BidirectionalMM(PackedFifteensNode(input_str='1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 15 0'))
+        self.assertEqual(len(path), 1)
+
+
+class TestExternal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSameCost(self, make_root, **options):
+        stats = SearchStats()
+        path = external.ExternalAstar(make_root(), directory=self.directory.name, stats=stats, **options)
+        self.assertEqual(path[-1].g, Astar(make_root())[-1].g)
+        self.assertEqual(path[0].state, make_root().state)
+        self.assertTrue(path[-1].is_goal())
+        for parent, child in zip(path, path[1:]):
+            self.assertIn(child.state, [node.state for node in parent.generate_children()])
+        self.assertEqual(os.listdir(self.directory.name), [])
+        return stats
+
+    def test_same_cost(self):
+        """Test that the disk-backed search finds paths as short as Astar's."""
+        self.assertSameCost(lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), locality=2)
+        self.assertSameCost(lambda: SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5'))
+        self.assertSameCost(lambda: SuperqueensNode(n=6))
+
+    def test_max_records(self):
+        """Test that a small record limit splits the buckets without changing the cost."""
+        stats = self.assertSameCost(lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), locality=2,
+                                    max_records=16)
+        unbounded = self.assertSameCost(lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), locality=2)
+        self.assertLess(stats.max_frontier, unbounded.max_frontier)
+        self.assertLessEqual(stats.max_frontier, 16 // 2)
+
+    def test_limit(self):
+        """Test that an interrupted search removes its files."""
+        with self.assertRaises(SearchLimitReached):
+            external.ExternalAstar(PackedFifteensNode(input_str=TestCheckpoint.INSTANCE),
+                                   directory=self.directory.name, max_expansions=50)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class TestFrontierSearch(unittest.TestCase):
+    def test_operator_children(self):
+        """Test that the inverse of every move leads back and that used moves are skipped."""
+        for root in (FifteensNode(input_str=FIFTEENS_14_MOVES), PackedFifteensNode(input_str=FIFTEENS_14_MOVES),
+                     SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5')):
+            pairs = list(root.operator_children())
+            self.assertEqual(sorted(child.state for child, _ in pairs),
+                             sorted(child.state for child in root.generate_children()))
+            for child, inverse in pairs:
+                back = [node for node, _ in child.operator_children(~(1 << inverse))]
+                self.assertEqual([node.state for node in back], [root.state])
+                self.assertNotIn(root.state, [node.state for node, _ in child.operator_children(1 << inverse)])
+        with self.assertRaises(NotImplementedError):
+            SuperqueensNode(n=6).operator_children()
+
+    def test_same_cost(self):
+        """Test that frontier search finds optimal paths without a closed list."""
+        for make_root in (lambda: PackedFifteensNode(input_str=bench.random_walk_instance(40, 0)),
+                          lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE),
+                          lambda: FifteensNode(input_str=FIFTEENS_14_MOVES),
+                          lambda: SlidingPuzzleNode(input_str='8 1 3\n4 0 2\n7 6 5')):
+            stats = SearchStats()
+            path = frontiersearch.FrontierAstar(make_root(), stats=stats)
+            self.assertEqual(path[-1].g, Astar(make_root())[-1].g)
+            self.assertEqual(path[0].state, make_root().state)
+            self.assertTrue(path[-1].is_goal())
+            for parent, child in zip(path, path[1:]):
+                self.assertIs(child.parent, parent)
+                self.assertEqual(child.g, parent.g + 1)
+                self.assertIn(child.state, [node.state for node in parent.generate_children()])
+            self.assertEqual(stats.max_closed, 0)
+            self.assertGreater(stats.max_frontier, 0)
+
+    def test_root_is_goal(self):
+        """Test that a solved root is returned alone."""
+        path = frontiersearch.FrontierAstar(PackedFifteensNode(input_str='1 2 3 4\n5 6 7 8\n9 10 11 12\n13 14 15 0'))
+        self.assertEqual(len(path), 1)
+
+    def test_limit(self):
+        """Test that the expansion limit is enforced."""
+        stats = SearchStats()
+        with self.assertRaises(SearchLimitReached):
+            frontiersearch.FrontierAstar(PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), stats=stats,
+                                         max_expansions=50)
+        self.assertEqual(stats.expanded, 50)
+
+
+@unittest.skipUnless(vectorized.np, 'needs numpy')
+class TestVectorized(unittest.TestCase):
+    def test_expand(self):
+        """Test that a block expands into the children and heuristics of PackedFifteensNode."""
+        np = vectorized.np
+        nodes = [PackedFifteensNode(input_str=FIFTEENS_14_MOVES)]
+        nodes += nodes[0].generate_children()
+        states = np.array([node.state for node in nodes], dtype=np.uint64)
+        self.assertEqual(vectorized.manhattan(vectorized.unpack(states)).tolist(),
+                         [node.evaluate_heuristic() for node in nodes])
+        children, h, parents = vectorized.expand(states, np.array([node.evaluate_heuristic() for node in nodes]))
+        expected = sorted((child.state, child.evaluate_heuristic(), i)
+                          for i, node in enumerate(nodes) for child in node.generate_children())
+        self.assertEqual(sorted(zip(children.tolist(), h.tolist(), parents.tolist())), expected)
+
+    def test_same_cost(self):
+        """Test that the batched search finds paths as short as Astar's, for any batch size."""
+        for make_root in (lambda: PackedFifteensNode(input_str=TestCheckpoint.INSTANCE),
+                          lambda: FifteensNode(input_str=FIFTEENS_14_MOVES)):
+            expected = Astar(make_root())[-1].g
+            for batch_size in (1, 64, 4096):
+                path = vectorized.BatchAstar(make_root(), batch_size=batch_size)
+                self.assertEqual(path[-1].g, expected)
+                self.assertIs(type(path[-1]), type(make_root()))
+                self.assertTrue(path[-1].is_goal())
+                for parent, child in zip(path, path[1:]):
+                    self.assertIn(child.state, [node.state for node in parent.generate_children()])
+
+    def test_limit(self):
+        """Test that the expansion limit is exact."""
+        stats = SearchStats()
+        with self.assertRaises(SearchLimitReached):
+            vectorized.BatchAstar(PackedFifteensNode(input_str=TestCheckpoint.INSTANCE), batch_size=64,
+                                  stats=stats, max_expansions=100)
+        self.assertEqual(stats.expanded, 100)
+
+
+class TestSolve(unittest.TestCase):
+    def test_read_instances(self):
+        """Test that both input formats are recognized and parsed lazily."""
+        text = io.StringIO('\n' + FIFTEENS_14_MOVES + '\n\n\n' + FIFTEENS_14_MOVES + '\n')
+        instances = list(solve.read_instances(text))
+        self.assertEqual([instance['id'] for instance in instances], [1, 2])
+        self.assertEqual(instances[0]['board'].split(), FIFTEENS_14_MOVES.split())
+
+        jsonl = io.StringIO('{"id": "q", "problem": "superqueens", "n": 5}\n\n[1]\n')
+        instances = list(solve.read_instances(jsonl))
+        self.assertEqual(instances[0], {'id': 'q', 'problem': 'superqueens', 'n': 5})
+        self.assertIn('error', instances[1])
+
+    def test_solve_instance(self):
+        """Test that a result holds moves that lead to the goal, the cost and the counters."""
+        result = solve.solve_instance({'id': 1, 'problem': 'fifteens', 'board': FIFTEENS_14_MOVES})
+        self.assertEqual(result['status'], 'solved')
+        self.assertEqual(result['cost'], len(result['moves']))
+        self.assertEqual(result['cost'], 14)
+        self.assertGreater(result['expanded'], 0)
+        limited = solve.solve_instance({'id': 2, 'problem': 'superqueens', 'n': 7}, max_expansions=10)
+        self.assertEqual(limited['status'], 'limit')
+        self.assertEqual(limited['expanded'], 10)
+        broken = solve.solve_instance({'id': 3, 'problem': 'chess'})
+        self.assertEqual(broken['status'], 'error')
+        unsolvable = solve.solve_instance({'id': 4, 'problem': 'sliding', 'board': [[2, 1], [3, 0]]})
+        self.assertEqual(unsolvable['status'], 'no_solution')
+        eight = solve.solve_instance({'id': 5, 'problem': 'sliding', 'board': '1 2 3\n4 5 6\n0 7 8'})
+        self.assertEqual(eight['moves'], ['R', 'R'])
+
+    def test_solve_stream(self):
+        """Test that every instance of a stream gets exactly one result from the process pool."""
+        instances = [{'id': n, 'problem': 'superqueens', 'n': n} for n in range(1, 7)]
+        results = list(solve.solve_stream(iter(instances), workers=2))
+        self.assertEqual(sorted(result['id'] for result in results), list(range(1, 7)))
+        self.assertTrue(all(result['status'] == 'solved' for result in results))
+
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+    # A 200-move random walk (bench.random_walk_instance(200, 1)) that keeps a worker busy.
+    HARD = '13 15 8 7\n6 2 12 3\n4 5 0 11\n1 9 10 14'
+
+    async def asyncSetUp(self):
+        self.service = service.SolverService(workers=1, max_queue=1)
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_solve(self):
+        """Test that a request is answered with the result of solve.py and its timings."""
+        result = await self.service.submit({'id': 1, 'board': FIFTEENS_14_MOVES})
+        self.assertEqual(result['status'], 'solved')
+        self.assertEqual(result['cost'], 14)
+        self.assertEqual(result['id'], 1)
+        self.assertGreaterEqual(result['queue_wait'], 0)
+        self.assertGreaterEqual(result['run_time'], result['seconds'])
+        broken = await self.service.submit({'id': 2, 'problem': 'chess'})
+        self.assertEqual(broken['status'], 'error')
+
+    async def test_coalesce_reject_cancel(self):
+        """Test that identical requests share a search, that a full queue rejects requests and
+        that cancelling a running search replaces its worker.
+        """
+        first = asyncio.ensure_future(self.service.submit({'id': 1, 'board': self.HARD}))
+        second = asyncio.ensure_future(self.service.submit({'id': 2, 'board': self.HARD}))
+        await asyncio.sleep(0.1)
+        waiting = asyncio.ensure_future(self.service.submit({'id': 3, 'board': FIFTEENS_14_MOVES}))
+        await asyncio.sleep(0)
+        rejected = await self.service.submit({'id': 4, 'board': FIFTEENS_14_MOVES.replace('0 15', '15 0')})
+        self.assertEqual(rejected['status'], 'rejected')
+        self.assertEqual(self.service.stats()['queued'], 1)
+        self.assertTrue(self.service.cancel(1))
+        self.assertEqual(self.service.stats()['running'], 1)
+        self.assertTrue(self.service.cancel(2))
+        self.assertFalse(self.service.cancel(2))
+        results = await asyncio.gather(first, second)
+        self.assertEqual([result['status'] for result in results], ['cancelled', 'cancelled'])
+        self.assertTrue(results[1]['coalesced'])
+        self.assertEqual((await waiting)['cost'], 14)
+        self.assertEqual(self.service.stats()['searches'], 2)
+
+    async def test_deadline(self):
+        """Test that a request is answered when its deadline passes."""
+        result = await self.service.submit({'id': 1, 'board': self.HARD, 'deadline': 0.2})
+        self.assertEqual(result['status'], 'limit')
+        self.assertLess(result['run_time'], 1)
+        self.assertEqual((await self.service.submit({'id': 2, 'board': FIFTEENS_14_MOVES}))['cost'], 14)
+
+    async def test_later_deadline(self):
+        """Test that a request only joins a running search whose time limit covers its
+        deadline, and otherwise starts its own.
+        """
+        await self.service.close()
+        self.service = service.SolverService(workers=2, max_queue=1)
+        await self.service.start()
+        first = asyncio.ensure_future(self.service.submit({'id': 1, 'board': self.HARD, 'deadline': 0.5}))
+        await asyncio.sleep(0.1)
+        earlier = asyncio.ensure_future(self.service.submit({'id': 2, 'board': self.HARD, 'deadline': 0.1}))
+        later = asyncio.ensure_future(self.service.submit({'id': 3, 'board': self.HARD}))
+        self.assertEqual((await first)['status'], 'limit')
+        result = await earlier
+        self.assertEqual(result['status'], 'limit')
+        self.assertTrue(result['coalesced'])
+        await asyncio.sleep(0.3)
+        self.assertFalse(later.done())
+        self.assertEqual(self.service.stats()['searches'], 2)
+        self.assertTrue(self.service.cancel(3))
+        result = await later
+        self.assertEqual(result['status'], 'cancelled')
+        self.assertNotIn('coalesced', result)
+
+    async def test_handle(self):
+        """Test the JSON-lines protocol on a stream."""
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"id": "a", "board": "1 2 3 4\\n5 6 7 8\\n9 10 11 12\\n13 14 0 15"}\n'
+                         b'{"op": "cancel", "id": "b"}\nnot json\n')
+        reader.feed_eof()
+        output = io.BytesIO()
+
+        class Writer:
+            write = output.write
+
+            async def drain(self):
+                pass
+
+        await self.service.handle(reader, Writer(), cancel_on_close=False)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[0], {'op': 'cancel', 'id': 'b', 'cancelled': False})
+        self.assertEqual(lines[1]['status'], 'error')
+        self.assertEqual((lines[2]['id'], lines[2]['moves']), ('a', ['R']))
+
+
+class TestBench(unittest.TestCase):
+    def test_random_walk_instance(self):
+        """Test that instances are reproducible and no deeper than the walk."""
+        instance = bench.random_walk_instance(12, seed=4)
+        self.assertEqual(instance, bench.random_walk_instance(12, seed=4))
+        self.assertLessEqual(len(Astar(PackedFifteensNode(input_str=instance))), 13)
+
+    def test_run_case(self):
+        """Test that a case record holds the measurements."""
+        record = bench.run_case({'problem': 'superqueens', 'label': 'n=5', 'instance': 5, 'variant': 'plain',
+                                 'engine': 'astar-bucket', 'options': {}})
+        self.assertEqual(record['status'], 'solved')
+        for field in ('cost', 'expanded', 'seconds', 'expansions_per_sec', 'peak_rss_kb', 'max_frontier'):
+            self.assertIsNotNone(record[field])
+
+    def test_run_case_error(self):
+        """Test that an engine raising an exception gives an error record instead of aborting."""
+        record = bench.run_case({'problem': 'superqueens', 'label': 'n=5', 'instance': 5, 'variant': 'plain',
+                                 'engine': 'frontier-astar', 'options': {}})
+        self.assertEqual(record['status'], 'error')
+        self.assertIn('NotImplementedError', record['error'])
+        self.assertIsNone(record['cost'])
+
+    def test_run_skips_unsupported(self):
+        """Test that a run leaves out the engines a node class cannot serve and writes its results."""
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, 'results.json')
+            with contextlib.redirect_stderr(io.StringIO()):
+                status = bench.main(['run', '--depths', '', '--queens', '5', '--engines', 'astar-bucket,frontier-astar',
+                                     '--time-limit', '10', '--out', out])
+            self.assertEqual(status, 0)
+            with open(out) as f:
+                records = json.load(f)['results']
+        self.assertEqual([(record['variant'], record['engine'], record['status']) for record in records],
+                         [('plain', 'astar-bucket', 'solved'), ('symmetric', 'astar-bucket', 'solved')])
+
+    def test_compare(self):
+        """Test that slower cases and changed costs are flagged, and faster ones are not."""
+        def results(seconds, cost):
+            return {'results': [{'problem': 'superqueens', 'label': 'n=5', 'variant': 'plain', 'engine': 'idastar',
+                                 'status': 'solved', 'cost': cost, 'seconds': seconds, 'peak_rss_kb': 1000,
+                                 'expansions_per_sec': 100 / seconds}]}
+
+        self.assertEqual(bench.compare(results(1.0, 3), results(0.5, 3), 0.2), [])
+        regressions = bench.compare(results(1.0, 3), results(2.0, 4), 0.2)
+        self.assertEqual(len(regressions), 3)
+
+    def test_heuristic_tradeoff(self):
+        """Test that savings are relative to the first heuristic."""
+        records = bench.heuristic_tradeoff([FIFTEENS_14_MOVES], ['manhattan', 'linear-conflict'], samples=50)
+        self.assertEqual(records[0]['saved'], 0.0)
+        self.assertGreaterEqual(records[1]['saved'], 0.0)
+        self.assertGreater(records[1]['us_per_evaluation'], 0)
+
+    def test_measure_memory(self):
+        """Test that the arena stores the same nodes in fewer bytes."""
+        records = bench.measure_memory(lambda: PackedFifteensNode(input_str=FIFTEENS_14_MOVES))
+        self.assertEqual(records['astar']['length'], records['arena']['length'])
+        self.assertLess(records['arena']['peak_bytes'], records['astar']['peak_bytes'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,344 @@
+"""A* on the 15 puzzle with the nodes expanded in batches by NumPy.
+
+``BatchAstar`` runs the same search as ``search.Astar`` with the Manhattan distance, but
+it never builds a node object while it searches. A state is the packed board of
+``PackedFifteensNode`` (cell i in bits 4*i to 4*i+3) held in a ``uint64`` array, and the
+search works on blocks of them:
+
+* the frontier keeps the states in buckets by f, and pops up to `batch_size` states of the
+  smallest f at once, the most recently pushed first;
+* a block is unpacked into a ``uint8`` array of shape (k, 16), where the empty cell of
+  every board is found with one ``argmax`` and the moving tile of every move with one
+  fancy index;
+* the children's heuristic is the parent's, updated by table lookups of the distances of
+  the moving tiles before and after the move;
+* the best g, the parent and the expanded flag of every state reached are kept in the
+  arrays of an open-addressing hash table, probed for a whole block at once.
+
+So the Python interpreter runs a few dozen NumPy calls per block instead of a few dozen
+bytecodes per node, which pays off from blocks of a few hundred states. The returned path
+is a list of nodes of the root's class, rebuilt with ``Node.from_state``, and its cost is
+the optimal one, as for Astar with the Manhattan distance.
+
+NumPy is optional: the module imports without it, and ``BatchAstar`` raises ImportError.
+
+    >>> path = BatchAstar(PackedFifteensNode(input_str=s), batch_size=4096)
+"""
+
+import functools
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from search import SearchLimitReached, SearchStats
+
+# The packed goal board and the parent of the root, which is no board.
+_GOAL = sum(((i + 1) % 16) << (4 * i) for i in range(16))
+_NO_PARENT = 0
+
+
+@functools.lru_cache(maxsize=None)
+def _tables():
+    """Returns the shifts of the cells, the Manhattan distance of every tile on every cell,
+    and the cell the empty cell moves to from every cell with every move (-1 if none).
+    """
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(4)
+    manhattan = np.zeros((16, 16), dtype=np.int32)
+    for tile in range(1, 16):
+        for pos in range(16):
+            manhattan[tile, pos] = abs(pos // 4 - (tile - 1) // 4) + abs(pos % 4 - (tile - 1) % 4)
+    neighbours = np.full((16, 4), -1, dtype=np.int64)
+    for pos in range(16):
+        for move, (target, ok) in enumerate(((pos - 1, pos % 4 != 0), (pos + 1, pos % 4 != 3),
+                                             (pos - 4, pos >= 4), (pos + 4, pos < 12))):
+            if ok:
+                neighbours[pos, move] = target
+    return shifts, manhattan, neighbours
+
+
+def unpack(states):
+    """Returns the boards of packed states as a (k, 16) uint8 array of cells."""
+    shifts = _tables()[0]
+    return ((states[:, None] >> shifts) & np.uint64(15)).astype(np.uint8)
+
+
+def manhattan(cells):
+    """Returns the Manhattan distance of every board of a (k, 16) array of cells."""
+    return _tables()[1][cells, np.arange(16)].sum(axis=1)
+
+
+def expand(states, h):
+    """Generates the children of a block of states.
+
+    Parameters
+    ----------
+    states : uint64 array
+        The packed boards.
+
+    h : int array
+        Their Manhattan distances.
+
+    Returns
+    -------
+        children, child_h, parents : arrays
+            The packed boards of the children, their Manhattan distances and the index
+            in `states` of their parents, grouped by move.
+    """
+    _, distances, neighbours = _tables()
+    cells = unpack(states)
+    blank = np.argmax(cells == 0, axis=1)
+    children, child_h, parents = [], [], []
+    for move in range(4):
+        target = neighbours[blank, move]
+        rows = np.flatnonzero(target >= 0)
+        source, target = blank[rows], target[rows]
+        tile = cells[rows, target]
+        wide = tile.astype(np.uint64)
+        children.append(states[rows] - (wide << (np.uint64(4) * target.astype(np.uint64)))
+                        + (wide << (np.uint64(4) * source.astype(np.uint64))))
+        child_h.append(h[rows] + distances[tile, source] - distances[tile, target])
+        parents.append(rows)
+    return np.concatenate(children), np.concatenate(child_h), np.concatenate(parents)
+
+
+class _StateTable:
+    """The best g, parent and expanded flag of every state reached, in an open-addressing
+    hash table of arrays. Lookups and insertions probe all the states of a block at once,
+    one round per probe, with linear probing from a multiplicative hash. The table doubles
+    when it gets half full.
+    """
+
+    # 2**64 divided by the golden ratio, the multiplier of Fibonacci hashing.
+    _MULTIPLIER = 0x9E3779B97F4A7C15
+
+    def __init__(self, bits=16):
+        self.size = 0
+        self._allocate(bits)
+
+    def _allocate(self, bits):
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.states = np.zeros(1 << bits, dtype=np.uint64)
+        self.g = np.zeros(1 << bits, dtype=np.int32)
+        self.parents = np.zeros(1 << bits, dtype=np.uint64)
+        self.expanded = np.zeros(1 << bits, dtype=bool)
+
+    def _home(self, states):
+        return ((states * np.uint64(self._MULTIPLIER)) >> np.uint64(64 - self.bits)).astype(np.int64)
+
+    def find(self, states):
+        """Returns the slot of every state, or -1 for the states not in the table."""
+        slots = np.full(len(states), -1, dtype=np.int64)
+        rows = np.arange(len(states))
+        probe = self._home(states)
+        while len(rows):
+            stored = self.states[probe]
+            hit = stored == states[rows]
+            slots[rows[hit]] = probe[hit]
+            going = ~hit & (stored != 0)
+            rows, probe = rows[going], (probe[going] + 1) & self.mask
+        return slots
+
+    def insert(self, states, g, parents):
+        """Adds distinct states that are not in the table; returns their slots."""
+        if 2 * (self.size + len(states)) > len(self.states):
+            self._grow(self.size + len(states))
+        slots = np.empty(len(states), dtype=np.int64)
+        rows = np.arange(len(states))
+        probe = self._home(states)
+        while len(rows):
+            free = self.states[probe] == 0
+            # Claim the free slots: of the states that probe the same slot, the last
+            # written wins it and the others probe on.
+            self.states[probe[free]] = states[rows[free]]
+            won = free & (self.states[probe] == states[rows])
+            slots[rows[won]] = probe[won]
+            rows, probe = rows[~won], (probe[~won] + 1) & self.mask
+        self.g[slots] = g
+        self.parents[slots] = parents
+        self.size += len(states)
+        return slots
+
+    def _grow(self, size):
+        used = np.flatnonzero(self.states)
+        columns = self.states[used], self.g[used], self.parents[used], self.expanded[used]
+        bits = self.bits
+        while 2 * size > 1 << bits:
+            bits += 1
+        self._allocate(bits)
+        self.size = 0
+        slots = self.insert(*columns[:3])
+        self.expanded[slots] = columns[3]
+
+    def __len__(self):
+        return self.size
+
+
+class _Buckets:
+    """The frontier: chunks of (states, g, h) arrays in buckets by f."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.size = 0
+
+    def push(self, states, g, h):
+        f = g + h
+        for value in np.unique(f):
+            rows = f == value
+            self.buckets.setdefault(int(value), []).append((states[rows], g[rows], h[rows]))
+        self.size += len(states)
+
+    def pop(self, limit):
+        """Removes up to `limit` states of the smallest f, the most recently pushed first;
+        returns their f and their (states, g, h) arrays.
+        """
+        f = min(self.buckets)
+        chunks = self.buckets[f]
+        taken = []
+        count = 0
+        while chunks and count < limit:
+            states, g, h = chunks.pop()
+            if count + len(states) > limit:
+                keep = len(states) - (limit - count)
+                chunks.append((states[:keep], g[:keep], h[:keep]))
+                states, g, h = states[keep:], g[keep:], h[keep:]
+            taken.append((states, g, h))
+            count += len(states)
+        if not chunks:
+            del self.buckets[f]
+        self.size -= count
+        return f, tuple(np.concatenate(column) for column in zip(*taken))
+
+    def __len__(self):
+        return self.size
+
+
+def BatchAstar(root, batch_size=4096, stats=None, max_expansions=None, time_limit=None):
+    """Runs A* with the Manhattan distance on a 15 puzzle, expanding the nodes in batches.
+
+    Parameters
+    ----------
+    root: Node
+        The start node: a 4x4 board with the usual goal, e.g. a PackedFifteensNode or a
+        FifteensNode. Its class must implement ``Node.from_state``; its own heuristic is
+        not used.
+
+    batch_size: int, optional
+        The largest number of states of the same f expanded at once. Default is 4096.
+
+    stats: SearchStats, optional
+        If given, it is filled in with the counters of the search.
+
+    max_expansions: int, optional
+        Gives up after expanding this many nodes.
+
+    time_limit: float, optional
+        Gives up after running for this many seconds.
+
+    Returns
+    -------
+        path: list of Nodes or None
+            The solution, a path from the initial node to the goal node, or None.
+
+    Raises
+    ------
+    ImportError
+        If NumPy is not installed.
+
+    SearchLimitReached
+        If max_expansions or time_limit is exceeded.
+    """
+    if np is None:
+        raise ImportError('BatchAstar needs numpy')
+    cells = [cell for row in root.board for cell in row]
+    if len(cells) != 16:
+        raise ValueError('BatchAstar needs a 4x4 board')
+    if stats is None:
+        stats = SearchStats()
+    clock = time.perf_counter
+    start = clock()
+    deadline = None if time_limit is None else start + time_limit
+    start_state = np.array([sum(cell << (4 * i) for i, cell in enumerate(cells))], dtype=np.uint64)
+    start_g = np.array([root.g], dtype=np.int32)
+    start_h = manhattan(unpack(start_state)).astype(np.int32)
+    table = _StateTable()
+    table.insert(start_state, start_g, np.array([_NO_PARENT], dtype=np.uint64))
+    fringe = _Buckets()
+    fringe.push(start_state, start_g, start_h)
+    goal = None
+    try:
+        while fringe:
+            if len(fringe) > stats.max_frontier:
+                stats.max_frontier = len(fringe)
+            f, (states, g, h) = fringe.pop(batch_size)
+            slots = table.find(states)
+            # Stale entries: superseded by a cheaper path, or already expanded.
+            live = (table.g[slots] == g) & ~table.expanded[slots]
+            stats.duplicates += len(states) - int(live.sum())
+            states, g, h, slots = states[live], g[live], h[live], slots[live]
+            if not len(states):
+                continue
+            if not stats.f_progression or f > stats.f_progression[-1][0]:
+                stats.f_progression.append((f, stats.expanded))
+            reached = np.flatnonzero(states == np.uint64(_GOAL))
+            if len(reached):
+                goal = int(states[reached[0]])
+                break
+            if max_expansions is not None:
+                if stats.expanded >= max_expansions:
+                    raise SearchLimitReached('expansion limit of %d reached' % max_expansions, stats)
+                remaining = max_expansions - stats.expanded
+                states, g, h, slots = states[:remaining], g[:remaining], h[:remaining], slots[:remaining]
+            if deadline is not None and clock() > deadline:
+                raise SearchLimitReached('time limit of %gs reached' % time_limit, stats)
+            table.expanded[slots] = True
+            stats.expanded += len(states)
+            children, child_h, parents = expand(states, h)
+            child_g = g[parents] + 1
+            stats.generated += len(children)
+            # Keep the cheapest copy of every state of the block, then the ones cheaper
+            # than the table's.
+            order = np.lexsort((child_g, children))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = children[order[1:]] != children[order[:-1]]
+            stats.duplicates += len(order) - int(first.sum())
+            order = order[first]
+            children, child_h, child_g, parents = children[order], child_h[order], child_g[order], states[parents[order]]
+            slots = table.find(children)
+            known = slots >= 0
+            better = ~known | (child_g < table.g[slots])
+            stats.duplicates += len(children) - int(better.sum())
+            improved = known & better
+            if improved.any():
+                slots = slots[improved]
+                stats.reopened += int(table.expanded[slots].sum())
+                table.g[slots] = child_g[improved]
+                table.parents[slots] = parents[improved]
+                table.expanded[slots] = False
+            table.insert(children[~known], child_g[~known], parents[~known])
+            fringe.push(children[better], child_g[better], child_h[better])
+    finally:
+        stats.max_closed = stats.expanded - stats.reopened
+        stats.elapsed = clock() - start
+    if goal is None:
+        return None
+    return _trace_path(root, table, goal)
+
+
+def _trace_path(root, table, state):
+    """Follows the parents of a state back to the root and builds the nodes of the path."""
+    states = []
+    while state != _NO_PARENT:
+        states.append(state)
+        state = int(table.parents[table.find(np.array([state], dtype=np.uint64))[0]])
+    states.reverse()
+    packed = isinstance(root.state, int)
+    path = [root]
+    for state in states[1:]:
+        if not packed:
+            state = tuple((state >> (4 * i)) & 15 for i in range(16))
+        path.append(root.from_state(state, parent=path[-1], g=path[-1].g + 1))
+    return path